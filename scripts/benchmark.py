@@ -0,0 +1,214 @@
+"""
+This script benchmarks the ingestion, training and scoring stages of the House Pricing
+Predictor project.
+
+It generates synthetic housing datasets of the given sizes, times and memory-profiles
+every stage on them and stores the results as JSON. When a baseline is given, the stages
+slower or larger than the baseline beyond the tolerance are reported and the script
+exits with status 1.
+
+Modules
+-------
+- benchmarking: Functions for generating data, measuring stages and comparing results.
+
+Usage
+-----
+python scripts/benchmark.py ./benchmark_data --rows 10000 100000 --output
+./benchmarks/results.json --baseline ./benchmarks/baseline.json --model-family
+hist_gradient_boosting --log-level INFO
+
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from house_pricing_predictor_YUKTHAMAJELLA.benchmarking import (
+    compare_to_baseline,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
+
+
+def benchmark(
+    work_dir,
+    rows,
+    output_path,
+    baseline_path=None,
+    tolerance=0.2,
+    max_train_rows=None,
+    trace_memory=True,
+    **training_kwargs,
+):
+    """
+    Benchmarks every dataset size, stores the results and compares them to a baseline.
+
+    Parameters
+    ----------
+    work_dir : str
+        The directory of the synthetic datasets, one subdirectory per size.
+
+    rows : list of int
+        The dataset sizes.
+
+    output_path : str
+        The JSON file the results are written to.
+
+    baseline_path : str, optional
+        A JSON file of baseline results. Default is None.
+
+    tolerance : float, optional
+        The allowed relative increase of a metric over the baseline. Default is 0.2.
+
+    max_train_rows : int, optional
+        The maximum number of rows the models are trained on. Default is None.
+
+    trace_memory : bool, optional
+        If True, the peak memory of every stage is traced. Default is True.
+
+    **training_kwargs
+        The execution and search parameters of `model_training`.
+
+    Returns
+    -------
+    list of dict
+        The regressions found, empty without a baseline.
+    """
+    logger = logging.getLogger(__name__)
+    results = []
+    for n_rows in rows:
+        logger.info(f"Benchmarking {n_rows} rows...")
+        results.append(
+            run_benchmark(
+                n_rows,
+                os.path.join(work_dir, str(n_rows)),
+                max_train_rows=max_train_rows,
+                trace_memory=trace_memory,
+                **training_kwargs,
+            )
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    save_results(results, output_path)
+    logger.info(f"Benchmark results are stored in {output_path}.")
+
+    if baseline_path is None:
+        return []
+    regressions = compare_to_baseline(
+        results, load_results(baseline_path), tolerance=tolerance
+    )
+    for regression in regressions:
+        logger.warning(
+            f"Regression at {regression['rows']} rows in {regression['stage']}: "
+            f"{regression['metric']} went from {regression['baseline']:.3f} to "
+            f"{regression['current']:.3f} ({regression['ratio']:.2f}x)."
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the ingestion, training and scoring stages."
+    )
+    parser.add_argument("work_dir", help="Path to store the synthetic datasets.")
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[10_000],
+        help='Sizes of the synthetic datasets, from 1e4 to 1e8 (default: 10000)',
+    )
+    parser.add_argument(
+        '--output',
+        default='./benchmarks/results.json',
+        help='Path to store the JSON results (default: ./benchmarks/results.json)',
+    )
+    parser.add_argument(
+        '--baseline',
+        default=None,
+        help='JSON results to compare against (default: None)',
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Allowed relative increase over the baseline (default: 0.2)',
+    )
+    parser.add_argument(
+        '--max-train-rows',
+        type=int,
+        default=None,
+        help='Train on a sample of at most this many rows (default: all rows)',
+    )
+    parser.add_argument(
+        '--no-trace-memory',
+        action='store_true',
+        help='Skip the tracemalloc peak memory measure (default: False)',
+    )
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=None,
+        help='Workers of the hyperparameter searches, -1 for all cores (default: 1)',
+    )
+    parser.add_argument(
+        '--search',
+        default='exhaustive',
+        choices=['exhaustive', 'halving', 'shared', 'warm_start', 'oob'],
+        help='Hyperparameter search mode (default: exhaustive)',
+    )
+    parser.add_argument(
+        '--model-family',
+        default='random_forest',
+        choices=['random_forest', 'hist_gradient_boosting'],
+        help='Model family tuned by the searches (default: random_forest)',
+    )
+    parser.add_argument(
+        '--log-level',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help='Set the logging level (default: INFO)',
+    )
+    parser.add_argument(
+        '--log-path', type=str, default=None, help='Path to log file (default: None)'
+    )
+    parser.add_argument(
+        '--no-console-log',
+        action='store_true',
+        help='Disable console logging (default: True)',
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(
+        log_level=args.log_level,
+        log_path=args.log_path,
+        console_log=not args.no_console_log,
+    )
+
+    logger = logging.getLogger(__name__)
+    logger.info("Starting the benchmark...")
+
+    try:
+        regressions = benchmark(
+            args.work_dir,
+            args.rows,
+            args.output,
+            baseline_path=args.baseline,
+            tolerance=args.tolerance,
+            max_train_rows=args.max_train_rows,
+            trace_memory=not args.no_trace_memory,
+            n_jobs=args.n_jobs,
+            search=args.search,
+            model_family=args.model_family,
+        )
+        logger.info("Benchmark completed successfully.")
+    except Exception as e:
+        logger.error(f"Error during the benchmark: {e}")
+        sys.exit(2)
+    if regressions:
+        sys.exit(1)
@@ -20,80 +20,280 @@ import logging
 import os
 import sys
 
-from sklearn.impute import SimpleImputer
+import numpy as np
 from sklearn.model_selection import train_test_split
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import (
-    clean_strat_data,
-    fetch_housing_data,
+    download_housing_archive,
+    extract_housing_archive,
+    fit_imputer_chunks,
+    housing_archive_version,
     load_housing_data,
-    prepare_test_data,
-    prepare_train_data,
     proportions_comparison,
+    read_housing_chunks,
+    split_housing_chunks,
     stratified_split,
 )
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import (
+    DATASET_FORMATS,
+    save_artifact,
+    save_artifact_chunks,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.ingestion_cache import (
+    IngestionCache,
+    link_files,
+    stage_key,
+)
 from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import (
+    NUMERIC_COLUMNS,
+    HousingPreprocessor,
+    save_preprocessor,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.tracking import AsyncRunLogger
 
 import mlflow
 import mlflow.pyfunc
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+ARTIFACT_NAMES = ['housing_prepared', 'housing_labels', 'X_test_prepared', 'y_test']
+
+DOWNLOAD_ROOT = "https://raw.githubusercontent.com/ageron/handson-ml/master/"
+HOUSING_PATH = os.path.join("datasets", "housing")
+HOUSING_URL = DOWNLOAD_ROOT + "datasets/housing/housing.tgz"
+
+
+def _split_data(housing_path):
+    """
+    Loads the extracted data and splits it into stratified train and test sets.
+
+    Parameters
+    ----------
+    housing_path : str
+        The path to the extracted data.
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The stratified train and test sets.
+    """
+    housing = load_housing_data(housing_path)
+    strat_train_set, strat_test_set = stratified_split(housing)
+    train_set, test_set = train_test_split(housing, test_size=0.2, random_state=42)
+    proportions_comparison(housing, strat_test_set, test_set)
+    return strat_train_set, strat_test_set
+
+
+def _prepare_chunked(housing_path, output_path, chunksize, fmt):
+    """
+    Streams the extracted data through the split, preprocessor fit and preparation.
+
+    Every prepared chunk is written to the processed datasets as soon as it is
+    produced, so memory use does not grow with the size of the data.
+
+    Parameters
+    ----------
+    housing_path : str
+        The path to the extracted data.
 
+    output_path : str
+        The directory path where the stratified sets are spilled and the processed
+        data is saved.
 
+    chunksize : int
+        The maximum number of rows held in memory at once.
+
+    fmt : str
+        The storage format of the processed data, 'parquet' or 'pickle'.
+    """
+    train_path, test_path = split_housing_chunks(housing_path, output_path, chunksize)
+    chunks = read_housing_chunks(train_path, chunksize)
+    imputer = fit_imputer_chunks(
+        (chunk[NUMERIC_COLUMNS] for chunk in chunks), method="sketch"
+    )
+    preprocessor = HousingPreprocessor.from_imputer(imputer, dtype=np.float32)
+    for set_path, names in [
+        (train_path, ARTIFACT_NAMES[:2]),
+        (test_path, ARTIFACT_NAMES[2:]),
+    ]:
+        save_artifact_chunks(
+            (
+                (preprocessor.transform_frame(chunk), chunk["median_house_value"])
+                for chunk in read_housing_chunks(set_path, chunksize)
+            ),
+            output_path,
+            names,
+            fmt,
+        )
+    save_preprocessor(preprocessor, os.path.join(output_path, 'preprocessor.pkl'))
 
 
-def ingest_data(output_path):
+def ingest_data(
+    output_path,
+    chunksize=None,
+    fmt="parquet",
+    cache_dir=None,
+    use_cache=True,
+    refresh=False,
+    sha256=None,
+    parent_run_id=None,
+):
     """
     Ingests raw housing data, preprocesses it, and saves the processed datasets.
 
+    Every stage output is kept in a content-addressed cache, so a re-run only
+    recomputes the stages whose inputs changed.
+
     Parameters
     ----------
     output_path : str
         The directory path where the processed data will be saved.
 
+    chunksize : int, optional
+        If given, the raw data is streamed in chunks of at most `chunksize` rows and
+        the stratified sets are spilled to `output_path` instead of being held in
+        memory. Default is None.
+
+    fmt : str, optional
+        The storage format of the processed data, 'parquet' or 'pickle'. Default is
+        'parquet'.
+
+    cache_dir : str, optional
+        The directory of the stage cache. Default is a 'cache' directory under the
+        raw data path.
+
+    use_cache : bool, optional
+        If False, every stage is recomputed. Default is True.
+
+    refresh : bool, optional
+        If True, the raw archive is downloaded again. Later stages are still reused
+        when its content is unchanged. Default is False.
+
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the raw archive. Default is the digest
+        pinned by its first download, see `download_housing_archive`.
+
+    parent_run_id : str, optional
+        The MLflow run to nest the ingestion run in. Default is None, which nests it
+        in the active run of the current thread, if any.
+
     Returns
     -------
     None
-        This function doesn't return any value. It saves the processed data as pickle
-        files at the specified output path.
+        This function doesn't return any value. It saves the processed data files and
+        the fitted preprocessor at the specified output path.
     """
 
-    DOWNLOAD_ROOT = "https://raw.githubusercontent.com/ageron/handson-ml/master/"
-    HOUSING_PATH = os.path.join("datasets", "housing")
-    HOUSING_URL = DOWNLOAD_ROOT + "datasets/housing/housing.tgz"
+    if cache_dir is None:
+        cache_dir = os.path.join(HOUSING_PATH, "cache")
+    cache = IngestionCache(cache_dir, enabled=use_cache)
 
-    with mlflow.start_run(run_name="data_ingestion", nested=True) as run:
+    if parent_run_id is None:
+        run_context = mlflow.start_run(run_name="data_ingestion", nested=True)
+    else:
+        run_context = mlflow.start_run(
+            run_name="data_ingestion", tags={MLFLOW_PARENT_RUN_ID: parent_run_id}
+        )
+    with run_context as run, AsyncRunLogger(run.info.run_id, replay=True) as tracker:
+
+        archive_dir = cache.cached_dir(
+            "archive",
+            # Keyed on the archive content, so a changed upstream archive is fetched.
+            stage_key(
+                "archive",
+                url=HOUSING_URL,
+                version=housing_archive_version(HOUSING_URL, sha256),
+            ),
+            lambda path: download_housing_archive(
+                HOUSING_URL,
+                os.path.join(path, "housing.tgz"),
+                sha256=sha256,
+                extract_to=os.path.join(path, "extracted"),
+            ),
+            refresh=refresh,
+        )
+        tgz_path = os.path.join(archive_dir, "housing.tgz")
+        streamed_path = os.path.join(archive_dir, "extracted")
+        archive_key = cache.file_hash(tgz_path)
+
+        def extract(path):
+            # Linked rather than moved, so the archive entry stays complete.
+            if os.path.isdir(streamed_path):
+                link_files(streamed_path, path)
+            else:
+                extract_housing_archive(tgz_path, path)
 
-        fetch_housing_data(HOUSING_URL, HOUSING_PATH)
-        housing = load_housing_data(HOUSING_PATH)
+        csv_key = stage_key("extract", archive_key)
+        housing_path = cache.cached_dir("extract", csv_key, extract)
 
         if not os.path.exists(output_path):
             os.makedirs(output_path)
 
-        strat_train_set, strat_test_set = stratified_split(housing)
-        train_set, test_set = train_test_split(housing, test_size=0.2, random_state=42)
-        proportions_comparison(housing, strat_test_set, test_set)
-        housing, housing_labels, housing_num = clean_strat_data(
-            strat_train_set, strat_test_set
-        )
+        # The prepared stage caches the processed data files, which are then linked
+        # into the output path, so no dataset is held in memory to be cached.
+        if chunksize:
+            prepared_key = stage_key(
+                "prepared",
+                csv_key,
+                chunksize=chunksize,
+                test_size=0.2,
+                seed=42,
+                split="hash",
+                imputer="sketch",
+                preprocessor=HousingPreprocessor.__name__,
+                dtype="float32",
+                fmt=fmt,
+            )
+            prepared_dir = cache.cached_dir(
+                "prepared",
+                prepared_key,
+                lambda path: _prepare_chunked(housing_path, path, chunksize, fmt),
+            )
+        else:
+            split_key = stage_key("split", csv_key, test_size=0.2, random_state=42)
+            preprocessor_key = stage_key("preprocessor", split_key, dtype="float32")
+
+            def prepare(path):
+                strat_train_set, strat_test_set = cache.cached(
+                    "split", split_key, lambda: _split_data(housing_path)
+                )
+                preprocessor = cache.cached(
+                    "preprocessor",
+                    preprocessor_key,
+                    lambda: HousingPreprocessor(dtype=np.float32).fit(strat_train_set),
+                )
+                datasets = [
+                    preprocessor.transform_frame(strat_train_set),
+                    strat_train_set["median_house_value"].copy(),
+                    preprocessor.transform_frame(strat_test_set),
+                    strat_test_set["median_house_value"].copy(),
+                ]
+                for data, name in zip(datasets, ARTIFACT_NAMES):
+                    save_artifact(data, path, name, fmt)
+                save_preprocessor(preprocessor, os.path.join(path, 'preprocessor.pkl'))
 
-        imputer = SimpleImputer(strategy="median")
-        imputer.fit(housing_num)
-        housing_prepared = prepare_train_data(imputer, housing, housing_num)
-        X_test_prepared, y_test = prepare_test_data(strat_test_set, imputer)
+            prepared_dir = cache.cached_dir(
+                "prepared", stage_key("prepared", preprocessor_key, fmt=fmt), prepare
+            )
+        link_files(prepared_dir, output_path)
+        # Datasets of another format left by an earlier run would shadow these.
+        for name in ARTIFACT_NAMES:
+            for other_fmt, extension in DATASET_FORMATS.items():
+                stale_path = os.path.join(output_path, name + extension)
+                if other_fmt != fmt and os.path.exists(stale_path):
+                    os.remove(stale_path)
 
-        housing_prepared.to_pickle(f'{output_path}/housing_prepared.pkl')
-        housing_labels.to_pickle(f'{output_path}/housing_labels.pkl')
-        X_test_prepared.to_pickle(f'{output_path}/X_test_prepared.pkl')
-        y_test.to_pickle(f'{output_path}/y_test.pkl')
+        artifact_paths = [
+            os.path.join(output_path, name + DATASET_FORMATS[fmt])
+            for name in ARTIFACT_NAMES
+        ] + [os.path.join(output_path, 'preprocessor.pkl')]
         print(f"Data saved to {output_path}")
 
-        mlflow.log_artifact(f'{output_path}/housing_prepared.pkl')
-        mlflow.log_artifact(f'{output_path}/housing_labels.pkl')
-        mlflow.log_artifact(f'{output_path}/X_test_prepared.pkl')
-        mlflow.log_artifact(f'{output_path}/y_test.pkl')
+        for artifact_path in artifact_paths:
+            tracker.log_artifact(artifact_path)
         print(f"Artifacts saved at: {mlflow.get_artifact_uri()}")
-        
 
 
 if __name__ == "__main__":
@@ -113,6 +313,41 @@ if __name__ == "__main__":
         action='store_true',
         help='Disable console logging (default: True)',
     )
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Stream the raw data in chunks of this many rows (default: None)',
+    )
+    parser.add_argument(
+        '--format',
+        default='parquet',
+        choices=list(DATASET_FORMATS),
+        help='Storage format of the processed data (default: parquet)',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Directory of the ingestion stage cache (default: datasets/housing/cache)',
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Recompute every ingestion stage (default: False)',
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Download the raw archive again (default: False)',
+    )
+    parser.add_argument(
+        '--sha256',
+        type=str,
+        default=None,
+        help='Expected SHA-256 checksum of the raw archive (default: the one pinned '
+        'by its first download)',
+    )
 
     args = parser.parse_args()
 
@@ -126,7 +361,15 @@ if __name__ == "__main__":
     logger.info("Starting data ingestion process...")
     try:
         logger.debug("Ingesting raw data...")
-        ingest_data(args.output_path)
+        ingest_data(
+            args.output_path,
+            args.chunksize,
+            args.format,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+            refresh=args.refresh,
+            sha256=args.sha256,
+        )
         logger.info("Data ingestion completed successfully.")
     except Exception as e:
         logger.error(f"Error during ingestion: {e}")
\ No newline at end of file
@@ -1,30 +1,479 @@
+"""
+This script runs the full workflow of the House Pricing Predictor project as a pipeline
+of stages tracked in MLflow.
+
+The data is ingested, the baselines and both hyperparameter searches are trained
+concurrently, the final model is exported and every candidate model is scored
+concurrently. Every stage logs to its own MLflow run nested in the workflow run, and a
+stage whose inputs and parameters are unchanged since its last run is skipped.
+
+Modules
+-------
+- pipeline: The stage runner.
+- model_training: Functions for training the baselines and the searches.
+- model_scoring: Functions for scoring the trained models.
+
+Usage
+-----
+python scripts/main_mlflow.py --data-path ./processed_data --model-path ./models
+--tracking-uri http://0.0.0.0:5000 --search oob --max-workers 4 --log-level INFO
+
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import (
+    COMPACT_MODEL_NAME,
+    export_forest,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import (
+    DATASET_FORMATS,
+    load_artifact,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
+from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import model_scoring
+from house_pricing_predictor_YUKTHAMAJELLA.model_training import (
+    fit_grid_search,
+    fit_random_search,
+    get_best_model_gridsearch,
+    make_cv,
+    train_baselines,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.pipeline import FAILED, Pipeline, Stage
+from house_pricing_predictor_YUKTHAMAJELLA.tracking import AsyncRunLogger
+
 import mlflow
-from ingest_data import ingest_data
-from train import train_model
-from score import score_model
+from ingest_data import HOUSING_URL, ingest_data
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+CANDIDATE_MODELS = ["lin_reg", "tree_reg", "rnd_search", "final_model"]
+
+
+def _stage_run(name, parent_run_id):
+    """
+    Starts the MLflow run of a stage, nested in the workflow run.
+
+    Stages run in worker threads, which do not see the active run of the main thread,
+    so the parent is set explicitly.
+    """
+    return mlflow.start_run(run_name=name, tags={MLFLOW_PARENT_RUN_ID: parent_run_id})
+
+
+def _dump(obj, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f)
+
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def build_pipeline(
+    data_path,
+    model_path,
+    parent_run_id,
+    fmt="parquet",
+    sha256=None,
+    refresh=False,
+    n_jobs=None,
+    forest_n_jobs=None,
+    backend="processes",
+    search="exhaustive",
+    halving_resource="n_samples",
+    state_dir=None,
+    max_workers=None,
+):
+    """
+    Declares the stages of the workflow and the files they exchange.
+
+    Parameters
+    ----------
+    data_path : str
+        The directory of the processed data and of the predictions.
+
+    model_path : str
+        The directory of the trained models.
+
+    parent_run_id : str
+        The MLflow run ID of the workflow run.
+
+    fmt : str, optional
+        The format of the processed datasets, 'parquet' or 'pickle'. Default is
+        'parquet'.
+
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the raw archive. Default is the digest
+        pinned by its first download.
+
+    refresh : bool, optional
+        If True, the raw archive is downloaded again. Default is False.
 
+    n_jobs, forest_n_jobs, backend, search, halving_resource
+        The execution and search parameters of the training stages, see
+        `model_training`.
 
-def main():
-    remote_server_uri = "http://0.0.0.0:5000"
-    mlflow.set_tracking_uri(remote_server_uri)
+    state_dir : str, optional
+        The directory of the stage fingerprints. Default is `.pipeline` under
+        `model_path`.
 
-    exp_name = "HousePricing_Predictor"
-    mlflow.set_experiment(exp_name)
+    max_workers : int, optional
+        The number of stages run concurrently. Default is one per stage.
+
+    Returns
+    -------
+    Pipeline
+        The workflow pipeline.
+    """
+    datasets = {
+        name: os.path.join(data_path, name + DATASET_FORMATS[fmt])
+        for name in ['housing_prepared', 'housing_labels', 'X_test_prepared', 'y_test']
+    }
+    preprocessor_path = os.path.join(data_path, 'preprocessor.pkl')
+    models = {
+        name: os.path.join(model_path, f'{name}.pkl')
+        for name in ['lin_reg', 'tree_reg', 'rnd_search', 'grid_search', 'final_model']
+    }
+    train_inputs = [datasets['housing_prepared'], datasets['housing_labels']]
+    search_params = {"search": search, "halving_resource": halving_resource}
+    search_kwargs = dict(
+        n_jobs=n_jobs,
+        forest_n_jobs=forest_n_jobs,
+        backend=backend,
+        **search_params,
+    )
+
+    def load_training_data():
+        housing_prepared = load_artifact(data_path, 'housing_prepared', fmt=fmt)
+        housing_labels = load_artifact(data_path, 'housing_labels', fmt=fmt)
+        return housing_prepared, housing_labels
+
+    def ingest():
+        # ingest_data starts its own run, so it is nested in the workflow run directly.
+        ingest_data(
+            data_path,
+            fmt=fmt,
+            refresh=refresh,
+            sha256=sha256,
+            parent_run_id=parent_run_id,
+        )
+
+    def baselines():
+        with _stage_run("baselines", parent_run_id):
+            housing_prepared, housing_labels = load_training_data()
+            cv = make_cv(housing_prepared, housing_labels, search=search)
+            lin_reg, tree_reg = train_baselines(
+                housing_prepared, housing_labels, cv=cv, n_jobs=n_jobs
+            )
+            _dump(lin_reg, models['lin_reg'])
+            _dump(tree_reg, models['tree_reg'])
+
+    def searcher(fit_search, name):
+        def fit():
+            with _stage_run(name, parent_run_id) as run, AsyncRunLogger(
+                run.info.run_id
+            ) as tracker:
+                housing_prepared, housing_labels = load_training_data()
+                cv = make_cv(housing_prepared, housing_labels, search=search)
+                fitted = fit_search(
+                    housing_prepared, housing_labels, cv=cv, **search_kwargs
+                )
+                # The materialized folds are not needed after the fit.
+                fitted.set_params(cv=5)
+                _dump(fitted, models[name])
+                tracker.log_params(fitted.best_params_)
+                tracker.log_param("search", search)
+                tracker.log_metric("best_score", fitted.best_score_)
+
+        return fit
+
+    def final_model():
+        with _stage_run("final_model", parent_run_id) as run, AsyncRunLogger(
+            run.info.run_id
+        ) as tracker:
+            housing_prepared, _ = load_training_data()
+            grid_search = _load(models['grid_search'])
+            model = get_best_model_gridsearch(grid_search, housing_prepared)
+            _dump(model, models['final_model'])
+            compact_path = export_forest(
+                model, os.path.join(model_path, COMPACT_MODEL_NAME)
+            )
+            shutil.copy(preprocessor_path, os.path.join(model_path, 'preprocessor.pkl'))
+            tracker.log_artifact(compact_path)
+            tracker.log_artifact(preprocessor_path)
+            tracker.log_model(model, "gridsearch_model")
+
+    def scorer(name):
+        def score():
+            with _stage_run(f"score_{name}", parent_run_id) as run, AsyncRunLogger(
+                run.info.run_id
+            ) as tracker:
+                model = _load(models[name])
+                model = getattr(model, 'best_estimator_', model)
+                X_test_prepared = load_artifact(data_path, 'X_test_prepared', fmt=fmt)
+                y_test = load_artifact(data_path, 'y_test', fmt=fmt)
+                predictions, mse, rmse, mae = model_scoring(
+                    model, X_test_prepared, y_test
+                )
+                np.save(predictions_path(name), predictions)
+                with open(metrics_path(name), 'w') as f:
+                    json.dump({"mse": mse, "rmse": rmse, "mae": mae}, f)
+                tracker.log_metrics({"mse": mse, "rmse": rmse, "mae": mae})
+                tracker.log_artifact(predictions_path(name))
+
+        return score
+
+    def predictions_path(name):
+        return os.path.join(data_path, 'predictions', f'{name}.npy')
+
+    def metrics_path(name):
+        return os.path.join(data_path, 'predictions', f'{name}_metrics.json')
+
+    os.makedirs(model_path, exist_ok=True)
+    os.makedirs(os.path.join(data_path, 'predictions'), exist_ok=True)
+
+    stages = [
+        Stage(
+            "ingest",
+            ingest,
+            outputs=list(datasets.values()) + [preprocessor_path],
+            params={"fmt": fmt, "url": HOUSING_URL, "sha256": sha256},
+            # The source has no input file to fingerprint. Ingestion reuses its own
+            # cache, and the later stages re-run only if the datasets changed.
+            always_run=True,
+        ),
+        Stage(
+            "baselines",
+            baselines,
+            inputs=train_inputs,
+            outputs=[models['lin_reg'], models['tree_reg']],
+            params=search_params,
+        ),
+        Stage(
+            "rnd_search",
+            searcher(fit_random_search, 'rnd_search'),
+            inputs=train_inputs,
+            outputs=[models['rnd_search']],
+            params=search_params,
+        ),
+        Stage(
+            "grid_search",
+            searcher(fit_grid_search, 'grid_search'),
+            inputs=train_inputs,
+            outputs=[models['grid_search']],
+            params=search_params,
+        ),
+        Stage(
+            "final_model",
+            final_model,
+            inputs=[
+                models['grid_search'],
+                datasets['housing_prepared'],
+                preprocessor_path,
+            ],
+            outputs=[
+                models['final_model'],
+                os.path.join(model_path, COMPACT_MODEL_NAME),
+                os.path.join(model_path, 'preprocessor.pkl'),
+            ],
+        ),
+    ] + [
+        Stage(
+            f"score_{name}",
+            scorer(name),
+            inputs=[models[name], datasets['X_test_prepared'], datasets['y_test']],
+            outputs=[predictions_path(name), metrics_path(name)],
+        )
+        for name in CANDIDATE_MODELS
+    ]
+    return Pipeline(
+        stages,
+        state_dir or os.path.join(model_path, '.pipeline'),
+        max_workers=max_workers,
+    )
+
+
+def main(
+    data_path="./processed_data",
+    model_path="./models",
+    tracking_uri="http://0.0.0.0:5000",
+    experiment="HousePricing_Predictor",
+    force=False,
+    **pipeline_kwargs,
+):
+    """
+    Runs the workflow pipeline inside an MLflow workflow run.
+
+    Parameters
+    ----------
+    data_path : str, optional
+        The directory of the processed data. Default is './processed_data'.
+
+    model_path : str, optional
+        The directory of the trained models. Default is './models'.
+
+    tracking_uri : str, optional
+        The MLflow tracking URI. Default is 'http://0.0.0.0:5000'.
+
+    experiment : str, optional
+        The MLflow experiment name. Default is 'HousePricing_Predictor'.
+
+    force : bool, optional
+        If True, every stage is run even if it is fresh. Default is False.
+
+    **pipeline_kwargs
+        The other parameters of `build_pipeline`.
+
+    Returns
+    -------
+    dict
+        The status of every stage.
+    """
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment(experiment)
 
     with mlflow.start_run(run_name="full_workflow_run") as parent_run:
         mlflow.log_param("workflow", "House Pricing Predictor")
+        pipeline = build_pipeline(
+            data_path, model_path, parent_run.info.run_id, **pipeline_kwargs
+        )
+        statuses = pipeline.run(force=force)
+        print("Stage statuses: {}".format(statuses))
+        return statuses
 
-        with mlflow.start_run(run_name="data_ingestion", nested=True):
-            ingest_data("/home/runner/work/mle-training/mle-training/processed_data")
-            print("Save to: {}".format(mlflow.get_artifact_uri()))
 
-        with mlflow.start_run(run_name="model_training", nested=True):
-            run_id  = train_model("/home/runner/work/mle-training/mle-training/processed_data", "/home/runner/work/mle-training/mle-training/models")
-            print("Save to: {}".format(mlflow.get_artifact_uri()))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the full workflow pipeline.")
+    parser.add_argument(
+        '--data-path',
+        default='./processed_data',
+        help='Path of the processed data (default: ./processed_data)',
+    )
+    parser.add_argument(
+        '--model-path',
+        default='./models',
+        help='Path of the trained models (default: ./models)',
+    )
+    parser.add_argument(
+        '--state-dir',
+        default=None,
+        help='Path of the stage fingerprints (default: <model-path>/.pipeline)',
+    )
+    parser.add_argument(
+        '--tracking-uri',
+        default='http://0.0.0.0:5000',
+        help='MLflow tracking URI (default: http://0.0.0.0:5000)',
+    )
+    parser.add_argument(
+        '--experiment',
+        default='HousePricing_Predictor',
+        help='MLflow experiment name (default: HousePricing_Predictor)',
+    )
+    parser.add_argument(
+        '--format',
+        default='parquet',
+        choices=['parquet', 'pickle'],
+        help='Storage format of the processed datasets (default: parquet)',
+    )
+    parser.add_argument(
+        '--sha256',
+        default=None,
+        help='Expected SHA-256 of the raw archive (default: the pinned one)',
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Download the raw archive again (default: False)',
+    )
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=None,
+        help='Stages run concurrently (default: one per stage)',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Run every stage even if its inputs are unchanged (default: False)',
+    )
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=None,
+        help='Workers of the hyperparameter searches, -1 for all cores (default: 1)',
+    )
+    parser.add_argument(
+        '--forest-n-jobs',
+        type=int,
+        default=None,
+        help='Workers building the trees of each forest (default: 1)',
+    )
+    parser.add_argument(
+        '--backend',
+        default='processes',
+        choices=['processes', 'threads'],
+        help='Execution backend of the parallel work (default: processes)',
+    )
+    parser.add_argument(
+        '--search',
+        default='exhaustive',
+        choices=['exhaustive', 'halving', 'shared', 'warm_start', 'oob'],
+        help='Hyperparameter search mode (default: exhaustive)',
+    )
+    parser.add_argument(
+        '--halving-resource',
+        default='n_samples',
+        choices=['n_samples', 'n_estimators'],
+        help='Budget grown by the halving rounds (default: n_samples)',
+    )
+    parser.add_argument(
+        '--log-level',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help='Set the logging level (default: INFO)',
+    )
+    parser.add_argument(
+        '--log-path', type=str, default=None, help='Path to log file (default: None)'
+    )
+    parser.add_argument(
+        '--no-console-log',
+        action='store_true',
+        help='Disable console logging (default: True)',
+    )
 
-        with mlflow.start_run(run_name="model_scoring", nested=True):
-            score_model("/home/runner/work/mle-training/mle-training/processed_data", "/home/runner/work/mle-training/mle-training/models", run_id)
-            print("Save to: {}".format(mlflow.get_artifact_uri()))
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+    setup_logging(
+        log_level=args.log_level,
+        log_path=args.log_path,
+        console_log=not args.no_console_log,
+    )
+
+    statuses = main(
+        data_path=args.data_path,
+        model_path=args.model_path,
+        tracking_uri=args.tracking_uri,
+        experiment=args.experiment,
+        force=args.force,
+        fmt=args.format,
+        sha256=args.sha256,
+        refresh=args.refresh,
+        n_jobs=args.n_jobs,
+        forest_n_jobs=args.forest_n_jobs,
+        backend=args.backend,
+        search=args.search,
+        halving_resource=args.halving_resource,
+        state_dir=args.state_dir,
+        max_workers=args.max_workers,
+    )
+    if FAILED in statuses.values():
+        sys.exit(1)
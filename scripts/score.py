@@ -17,27 +17,49 @@ DEBUG --log-path ./logs/score.log --no-console-log
 import argparse
 import logging
 import os
-import pickle
 import sys
 
 import numpy as np
-import pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import load_artifact
 from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
-from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import model_scoring
+from house_pricing_predictor_YUKTHAMAJELLA.model_registry import (
+    configure_model_cache,
+    get_model_cache,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import (
+    batch_model_scoring,
+    model_scoring,
+    parallel_model_scoring,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import load_preprocessor
+from house_pricing_predictor_YUKTHAMAJELLA.tracking import AsyncRunLogger
 
 import mlflow
 
 
 
 
-def score_model(data_path, input_model_path, run_id=None):
+def score_model(
+    data_path,
+    input_model_path,
+    run_id=None,
+    batch_input=None,
+    batch_output=None,
+    batch_size=100_000,
+    n_jobs=1,
+    compact=False,
+):
     """
     Reads the scoring data, predicts for the data by loading the pickled models and
     stores the predictions as a pickled file.
 
+    Models are loaded through the process-wide model cache, so repeated calls for the
+    same model version reuse the loaded model and MLflow artifacts are downloaded once
+    into the local mirror.
+
     Parameters
     ----------
     data_path : str
@@ -50,38 +72,97 @@ def score_model(data_path, input_model_path, run_id=None):
         The MLflow run ID of the trained model. If None, the function will attempt
         to load the model from the local path.
 
+    batch_input : str or None, optional
+        A csv or Parquet file of raw housing rows. If given, it is scored in batches
+        of `batch_size` rows instead of the processed test data. Default is None.
+
+    batch_output : str or None, optional
+        The csv or Parquet file the batch predictions are written to. Default is
+        'batch_predictions.parquet' under `data_path`.
+
+    batch_size : int, optional
+        The maximum number of rows held in memory when batch scoring. Default is
+        100000.
+
+    n_jobs : int, optional
+        The number of worker processes sharing the model for prediction, or -1 for
+        all cores. Default is 1.
+
+    compact : bool, optional
+        If True, the compact forest `final_model.cforest` is loaded instead of the
+        pickled model when it exists. Only used without `run_id`. Default is False.
+
     Returns
     -------
     None
         This function doesn't return any value. It saves the predictions for the scored
         data at the specified output path.
     """
-    with mlflow.start_run(run_name="model_scoring", nested=True) as run:
-        X_test_prepared = pd.read_pickle(f'{data_path}/X_test_prepared.pkl')
-        y_test = pd.read_pickle(f'{data_path}/y_test.pkl')
-
+    with mlflow.start_run(
+        run_name="model_scoring", nested=True
+    ) as run, AsyncRunLogger(run.info.run_id, replay=True) as tracker:
+        model_cache = get_model_cache()
         if run_id is not None:
-            model_uri = f"runs:/{run_id}/gridsearch_model"
-            final_model = mlflow.sklearn.load_model(model_uri)
+            final_model = model_cache.load_run(run_id, "gridsearch_model")
             print(f"Model loaded from MLflow with run_id: {run_id}")
         else:
-            with open(f'{input_model_path}/final_model.pkl', 'rb') as m:
-                final_model = pickle.load(m)
+            final_model = model_cache.load_path(input_model_path, compact=compact)
+
+        if batch_input is not None:
+            if run_id is not None:
+                preprocessor_path = model_cache.artifact_path(
+                    run_id, "preprocessor.pkl"
+                )
+            else:
+                preprocessor_path = f'{input_model_path}/preprocessor.pkl'
+            preprocessor = load_preprocessor(preprocessor_path)
+            if batch_output is None:
+                batch_output = f'{data_path}/batch_predictions.parquet'
 
-        housing_predictions, final_mse, final_rmse, final_mae = model_scoring(
-            final_model, X_test_prepared, y_test
+            n_rows, metrics = batch_model_scoring(
+                final_model,
+                preprocessor,
+                batch_input,
+                batch_output,
+                batch_size,
+                n_jobs=n_jobs,
+            )
+            print(f"Output predictions for {n_rows} rows saved to {batch_output}")
+
+            tracker.log_metric("n_rows", n_rows)
+            if metrics is not None:
+                final_mse, final_rmse, final_mae = metrics
+                print("MSE:", final_mse)
+                print("RMSE:", final_rmse)
+                print("MAE:", final_mae)
+                tracker.log_metrics(
+                    {"mse": final_mse, "rmse": final_rmse, "mae": final_mae}
+                )
+            return
+
+        columns = getattr(final_model, "feature_names_in_", None)
+        X_test_prepared = load_artifact(
+            data_path,
+            'X_test_prepared',
+            columns=None if columns is None else list(columns),
         )
+        y_test = load_artifact(data_path, 'y_test')
+
+        if n_jobs == 1:
+            scores = model_scoring(final_model, X_test_prepared, y_test)
+        else:
+            scores = parallel_model_scoring(
+                final_model, X_test_prepared, y_test, n_jobs=n_jobs
+            )
+        housing_predictions, final_mse, final_rmse, final_mae = scores
         np.save(f'{data_path}/housing_test_predictions.npy', housing_predictions)
         print(f"Output predictions saved to {data_path}")
 
-        mlflow.log_metric("mse", final_mse)
-        mlflow.log_metric("rmse", final_rmse)
-        mlflow.log_metric("mae", final_mae)
-        mlflow.log_artifact(f'{data_path}/housing_test_predictions.npy')
+        tracker.log_metrics({"mse": final_mse, "rmse": final_rmse, "mae": final_mae})
+        tracker.log_artifact(f'{data_path}/housing_test_predictions.npy')
         print(f"Artifacts saved at: {mlflow.get_artifact_uri()}")
 
 
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ingest and preprocess data.")
     parser.add_argument("input_data_path", help="Path to load the processed test data.")
@@ -105,6 +186,48 @@ if __name__ == "__main__":
         default = None,
         help='MLFlow run id of the trained model (default: None)',
     )
+    parser.add_argument(
+        '--batch-input',
+        default=None,
+        help='CSV or Parquet file of raw rows to score in batches (default: None)',
+    )
+    parser.add_argument(
+        '--batch-output',
+        default=None,
+        help='CSV or Parquet file for the batch predictions '
+        '(default: <input_data_path>/batch_predictions.parquet)',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=100_000,
+        help='Number of rows scored per batch (default: 100000)',
+    )
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=1,
+        help='Worker processes sharing the model for prediction, -1 for all cores '
+        '(default: 1)',
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Score with the compact forest instead of the pickled model, which loads '
+        'faster but predicts slower (default: False)',
+    )
+    parser.add_argument(
+        '--model-cache-mb',
+        type=int,
+        default=2048,
+        help='Memory budget of the loaded model cache in MiB (default: 2048)',
+    )
+    parser.add_argument(
+        '--artifact-mirror',
+        default=None,
+        help='Local mirror directory of the MLflow artifacts '
+        '(default: ~/.cache/house_pricing_predictor/mlflow_artifacts)',
+    )
     args = parser.parse_args()
 
     setup_logging(
@@ -115,10 +238,22 @@ if __name__ == "__main__":
 
     logger = logging.getLogger(__name__)
     logger.info("Starting model scoring...")
+    configure_model_cache(
+        max_bytes=args.model_cache_mb << 20, mirror_dir=args.artifact_mirror
+    )
 
     try:
         logger.debug("Loading model and scoring data...")
-        score_model(args.input_data_path, args.input_model_path, args.run_id)
+        score_model(
+            args.input_data_path,
+            args.input_model_path,
+            args.run_id,
+            batch_input=args.batch_input,
+            batch_output=args.batch_output,
+            batch_size=args.batch_size,
+            n_jobs=args.n_jobs,
+            compact=args.compact,
+        )
         logger.info("Scoring completed successfully.")
     except Exception as e:
         logger.error(f"Error during scoring: {e}")
\ No newline at end of file
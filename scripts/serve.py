@@ -0,0 +1,138 @@
+"""
+This script serves online predictions for the House Pricing Predictor project.
+
+It loads the trained model and its preprocessor once and answers JSON requests with
+raw housing rows, batching concurrent requests into single predict calls.
+
+Modules
+-------
+- serving: The micro-batching prediction service and its HTTP server.
+
+Usage
+-----
+python scripts/serve.py /path/to/trained_models --port 8080 --max-batch-size 256
+--max-wait-ms 5 --log-level INFO --log-path ./logs/serve.log
+
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
+from house_pricing_predictor_YUKTHAMAJELLA.serving import load_service, make_server
+
+
+def serve(model_path, host, port, max_batch_size, max_wait_ms, compact=False):
+    """
+    Loads the model and serves predictions until interrupted.
+
+    Parameters
+    ----------
+    model_path : str
+        The directory path of the pickled model and preprocessor.
+
+    host : str
+        The host to bind to.
+
+    port : int
+        The port to bind to.
+
+    max_batch_size : int
+        The maximum number of rows per prediction batch.
+
+    max_wait_ms : float
+        The maximum time a request waits for others to join its batch.
+
+    compact : bool, optional
+        If True, the compact forest is served instead of the pickled model when it
+        exists. Default is False.
+
+    Returns
+    -------
+    None
+        This function doesn't return any value. It serves until interrupted.
+    """
+    service = load_service(
+        model_path,
+        compact=compact,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+    server = make_server(service, host, port)
+    print(f"Serving predictions on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve online predictions.")
+    parser.add_argument("input_model_path", help="Path to load the trained models.")
+    parser.add_argument(
+        '--host', default='127.0.0.1', help='Host to bind to (default: 127.0.0.1)'
+    )
+    parser.add_argument(
+        '--port', type=int, default=8080, help='Port to bind to (default: 8080)'
+    )
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=256,
+        help='Maximum number of rows per prediction batch (default: 256)',
+    )
+    parser.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=5,
+        help='Maximum time a request waits for a batch to fill (default: 5)',
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Serve the compact forest instead of the pickled model (default: False)',
+    )
+    parser.add_argument(
+        '--log-level',
+        default='INFO',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help='Set the logging level (default: INFO)',
+    )
+    parser.add_argument(
+        '--log-path', type=str, default=None, help='Path to log file (default: None)'
+    )
+    parser.add_argument(
+        '--no-console-log',
+        action='store_true',
+        help='Disable console logging (default: True)',
+    )
+    args = parser.parse_args()
+
+    setup_logging(
+        log_level=args.log_level,
+        log_path=args.log_path,
+        console_log=not args.no_console_log,
+    )
+
+    logger = logging.getLogger(__name__)
+    logger.info("Starting prediction server...")
+
+    try:
+        serve(
+            args.input_model_path,
+            args.host,
+            args.port,
+            args.max_batch_size,
+            args.max_wait_ms,
+            compact=args.compact,
+        )
+        logger.info("Prediction server stopped.")
+    except Exception as e:
+        logger.error(f"Error while serving: {e}")
@@ -9,8 +9,10 @@ Modules
 
 Usage
 -----
-python scripts/train.py /path/to/processed_data /path/to/trained_models --log-level 
-DEBUG --log-path ./logs/score.log --no-console-log
+python scripts/train.py /path/to/processed_data /path/to/trained_models --n-jobs 8
+--forest-n-jobs 8 --backend threads --search halving --halving-resource n_estimators
+--model-family random_forest --subsample 0.1 --compare-full --log-level DEBUG
+--log-path ./logs/score.log --no-console-log
 
 """
 
@@ -18,26 +20,48 @@ import argparse
 import logging
 import os
 import pickle
+import shutil
 import sys
 
-import pandas as pd
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import (
+    COMPACT_MODEL_NAME,
+    export_forest,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.cross_validation import rank_agreement
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import load_artifact
 from house_pricing_predictor_YUKTHAMAJELLA.logging_config import setup_logging
 from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import model_scoring
 from house_pricing_predictor_YUKTHAMAJELLA.model_training import (
+    fit_grid_search,
+    fit_random_search,
     get_best_model_gridsearch,
+    make_cv,
     model_training,
 )
+from house_pricing_predictor_YUKTHAMAJELLA.tracking import AsyncRunLogger
 
 import mlflow
 
 
 
-def train_model(input_data_path, output_path):
+def train_model(
+    input_data_path,
+    output_path,
+    n_jobs=None,
+    forest_n_jobs=None,
+    backend="processes",
+    search="exhaustive",
+    halving_resource="n_samples",
+    model_family="random_forest",
+    subsample=None,
+    compare_full=False,
+):
     """
-    Reads the training data, trains the models and store them as pickled objects.
+    Reads the training data, trains the models and store them as pickled objects next
+    to the fitted preprocessor of the data. A final forest is also exported as a
+    compact, memory-mappable forest file for fast loading at inference time.
 
     Parameters
     ----------
@@ -47,20 +71,82 @@ def train_model(input_data_path, output_path):
     output_path : str
         The directory path to store the pickled model.
 
+    n_jobs : int, optional
+        The number of workers of the hyperparameter searches. Default is None.
+
+    forest_n_jobs : int, optional
+        The number of workers building the trees of each forest. Default is None.
+
+    backend : str, optional
+        The execution backend, one of 'processes' or 'threads'. Default is
+        'processes'.
+
+    search : str, optional
+        The hyperparameter search mode, 'exhaustive', 'halving', 'shared',
+        'warm_start' or 'oob'. Default is 'exhaustive'.
+
+    halving_resource : str, optional
+        The budget of the halving rounds, 'n_samples' or 'n_estimators'. Default is
+        'n_samples'.
+
+    model_family : str, optional
+        The tuned model family, 'random_forest' or 'hist_gradient_boosting'. Default
+        is 'random_forest'.
+
+    subsample : int or float, optional
+        If given, the searches run on a stratified sample of the training rows, a
+        number of rows if an integer or else a fraction of them, and only their best
+        candidates are refitted on all rows. Default is None.
+
+    compare_full : bool, optional
+        If True and `subsample` is given, the searches are also run on all rows and
+        the agreement of the candidate rankings is logged, see
+        `cross_validation.rank_agreement`. Default is False.
+
     Returns
     -------
-    None
     run_id : str
         The MLflow run ID of the trained model.
     """
-    with mlflow.start_run(run_name="model_training", nested=True) as run:
-        housing_prepared = pd.read_pickle(f'{input_data_path}/housing_prepared.pkl')
-        housing_labels = pd.read_pickle(f'{input_data_path}/housing_labels.pkl')
+    with mlflow.start_run(
+        run_name="model_training", nested=True
+    ) as run, AsyncRunLogger(run.info.run_id, replay=True) as tracker:
+        housing_prepared = load_artifact(input_data_path, 'housing_prepared')
+        housing_labels = load_artifact(input_data_path, 'housing_labels')
 
         lin_reg, tree_reg, rnd_search, grid_search = model_training(
-            housing_prepared, housing_labels
+            housing_prepared,
+            housing_labels,
+            n_jobs=n_jobs,
+            forest_n_jobs=forest_n_jobs,
+            backend=backend,
+            search=search,
+            halving_resource=halving_resource,
+            model_family=model_family,
+            subsample=subsample,
         )
 
+        if subsample is not None and compare_full:
+            search_kwargs = dict(
+                cv=make_cv(housing_prepared, housing_labels, search=search),
+                n_jobs=n_jobs,
+                forest_n_jobs=forest_n_jobs,
+                backend=backend,
+                search=search,
+                halving_resource=halving_resource,
+                model_family=model_family,
+            )
+            for name, fit_search, sampled in [
+                ("rnd_search", fit_random_search, rnd_search),
+                ("grid_search", fit_grid_search, grid_search),
+            ]:
+                full = fit_search(housing_prepared, housing_labels, **search_kwargs)
+                agreement = rank_agreement(sampled, full)
+                print(f"{name} subsample ranking agreement: {agreement}")
+                tracker.log_metrics(
+                    {f"{name}_{key}": value for key, value in agreement.items()}
+                )
+
         final_model = get_best_model_gridsearch(grid_search, housing_prepared)
 
         if not os.path.exists(output_path):
@@ -68,25 +154,108 @@ def train_model(input_data_path, output_path):
 
         with open(f'{output_path}/final_model.pkl', 'wb') as f:
             pickle.dump(final_model, f)
+        compact_path = os.path.join(output_path, COMPACT_MODEL_NAME)
+        if model_family == "random_forest":
+            export_forest(final_model, compact_path)
+            tracker.log_artifact(compact_path)
+        elif os.path.exists(compact_path):
+            # A stale forest would be loaded instead of the new model.
+            os.remove(compact_path)
+
+        preprocessor_path = f'{input_data_path}/preprocessor.pkl'
+        if os.path.exists(preprocessor_path):
+            shutil.copy(preprocessor_path, f'{output_path}/preprocessor.pkl')
+            tracker.log_artifact(preprocessor_path)
 
         print(f"Model saved to {output_path}")
 
-        for param, value in grid_search.best_params_.items():
-            mlflow.log_param(param, value)
+        tracker.log_params(grid_search.best_params_)
+        tracker.log_param("search", search)
+        tracker.log_param("model_family", model_family)
+        tracker.log_param("subsample", subsample)
 
-        mlflow.sklearn.log_model(final_model, "gridsearch_model")
+        tracker.log_model(final_model, "gridsearch_model")
 
         score = grid_search.best_score_
-        mlflow.log_metric("best_score", score)
+        tracker.log_metric("best_score", score)
         print(f"Artifacts saved at: {mlflow.get_artifact_uri()}")
         return run.info.run_id
 
 
+def _subsample_size(value):
+    """
+    Parses `--subsample`: an integer is a number of rows, a decimal a fraction.
+    """
+    try:
+        size = int(value)
+    except ValueError:
+        try:
+            size = float(value)
+        except ValueError:
+            size = None
+        if size is not None and size > 1:
+            size = None
+    if size is None or size <= 0:
+        raise argparse.ArgumentTypeError(
+            f"expected a number of rows or a fraction in (0, 1], got {value!r}"
+        )
+    return size
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Train a model using prepared data.")
     parser.add_argument("input_data_path", help="Path to load the processed data.")
     parser.add_argument("output_path", help="Path to store the trained models.")
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=None,
+        help='Workers of the hyperparameter searches, -1 for all cores (default: 1)',
+    )
+    parser.add_argument(
+        '--forest-n-jobs',
+        type=int,
+        default=None,
+        help='Workers building the trees of each forest (default: 1)',
+    )
+    parser.add_argument(
+        '--backend',
+        default='processes',
+        choices=['processes', 'threads'],
+        help='Execution backend of the parallel work (default: processes)',
+    )
+    parser.add_argument(
+        '--search',
+        default='exhaustive',
+        choices=['exhaustive', 'halving', 'shared', 'warm_start', 'oob'],
+        help='Hyperparameter search mode (default: exhaustive)',
+    )
+    parser.add_argument(
+        '--halving-resource',
+        default='n_samples',
+        choices=['n_samples', 'n_estimators'],
+        help='Budget grown by the halving rounds (default: n_samples)',
+    )
+    parser.add_argument(
+        '--model-family',
+        default='random_forest',
+        choices=['random_forest', 'hist_gradient_boosting'],
+        help='Model family tuned by the searches (default: random_forest)',
+    )
+    parser.add_argument(
+        '--subsample',
+        type=_subsample_size,
+        default=None,
+        help='Run the searches on a stratified sample, a number of rows such as 20000 '
+        'or a fraction such as 0.1, and refit the best candidates on all rows '
+        '(default: None)',
+    )
+    parser.add_argument(
+        '--compare-full',
+        action='store_true',
+        help='Also run the searches on all rows and log the ranking agreement '
+        '(default: False)',
+    )
     parser.add_argument(
         '--log-level',
         default='INFO',
@@ -115,7 +284,18 @@ if __name__ == "__main__":
 
     try:
         logger.debug("Loading processed data and training the model...")
-        train_model(args.input_data_path, args.output_path)
+        train_model(
+            args.input_data_path,
+            args.output_path,
+            n_jobs=args.n_jobs,
+            forest_n_jobs=args.forest_n_jobs,
+            backend=args.backend,
+            search=args.search,
+            halving_resource=args.halving_resource,
+            model_family=args.model_family,
+            subsample=args.subsample,
+            compare_full=args.compare_full,
+        )
         logger.info("Training completed successfully.")
     except Exception as e:
         logger.error(f"Error during training: {e}")
\ No newline at end of file
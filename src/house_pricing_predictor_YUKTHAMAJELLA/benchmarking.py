@@ -0,0 +1,420 @@
+"""
+benchmarking module contains the performance benchmark of the House Pricing Predictor
+project.
+
+Synthetic housing datasets with the schema of the real data are generated at any size,
+and the ingestion, training and scoring stages are timed and memory-profiled on them.
+Results are written as JSON and can be compared against a stored baseline to flag
+regressions.
+
+"""
+
+import json
+import logging
+import os
+import pickle
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.impute import SimpleImputer
+
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import (
+    clean_strat_data,
+    load_housing_data,
+    prepare_test_data,
+    prepare_train_data,
+    stratified_split,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.instrumentation import PeakRss
+from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import model_scoring
+from house_pricing_predictor_YUKTHAMAJELLA.model_training import (
+    get_best_model_gridsearch,
+    model_training,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import (
+    OCEAN_PROXIMITY_CATEGORIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# The share of each ocean_proximity category in the real data.
+OCEAN_PROXIMITY_SHARES = [0.4426, 0.3174, 0.0002, 0.1109, 0.1289]
+
+COMPARED_METRICS = ("wall_s", "peak_traced_mb")
+
+
+def generate_housing_chunk(n_rows, rng):
+    """
+    Generates synthetic housing rows with the schema of the real data.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of rows.
+
+    rng : numpy.random.Generator
+        The random generator.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rows, with the columns of `housing.csv` and about 1% missing
+        `total_bedrooms`.
+    """
+    median_income = np.clip(rng.gamma(4.0, 0.97, n_rows), 0.5, 15.0)
+    households = np.maximum(1.0, rng.lognormal(6.0, 0.7, n_rows)).round()
+    total_rooms = (households * rng.normal(5.3, 1.2, n_rows).clip(1.0)).round()
+    total_bedrooms = (total_rooms * rng.normal(0.21, 0.05, n_rows).clip(0.05)).round()
+    total_bedrooms[rng.random(n_rows) < 0.01] = np.nan
+    population = (households * rng.normal(2.9, 0.8, n_rows).clip(0.5)).round()
+    ocean_proximity = rng.choice(
+        OCEAN_PROXIMITY_CATEGORIES, n_rows, p=OCEAN_PROXIMITY_SHARES
+    )
+    value = 45000.0 * median_income + rng.normal(0.0, 60000.0, n_rows)
+    value += np.where(ocean_proximity == "INLAND", -60000.0, 30000.0)
+    return pd.DataFrame(
+        {
+            "longitude": rng.uniform(-124.35, -114.31, n_rows).round(2),
+            "latitude": rng.uniform(32.54, 41.95, n_rows).round(2),
+            "housing_median_age": rng.integers(1, 53, n_rows).astype(float),
+            "total_rooms": total_rooms,
+            "total_bedrooms": total_bedrooms,
+            "population": population,
+            "households": households,
+            "median_income": median_income.round(4),
+            "median_house_value": value.clip(14999.0, 500001.0).round(),
+            "ocean_proximity": ocean_proximity,
+        }
+    )
+
+
+def generate_housing_data(n_rows, housing_path, chunk_size=1_000_000, random_state=0):
+    """
+    Writes a synthetic `housing.csv` of `n_rows` rows in bounded memory.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of rows.
+
+    housing_path : str
+        The directory of the generated `housing.csv`.
+
+    chunk_size : int, optional
+        The number of rows generated and written at a time. Default is 1000000.
+
+    random_state : int, optional
+        The seed of the generator. Default is 0.
+
+    Returns
+    -------
+    str
+        The path of the generated csv file.
+    """
+    os.makedirs(housing_path, exist_ok=True)
+    csv_path = os.path.join(housing_path, "housing.csv")
+    rng = np.random.default_rng(random_state)
+    for start in range(0, n_rows, chunk_size):
+        chunk = generate_housing_chunk(min(chunk_size, n_rows - start), rng)
+        chunk.to_csv(
+            csv_path, mode="a" if start else "w", header=not start, index=False
+        )
+    return csv_path
+
+
+def measure(stage, func, *args, n_rows=None, trace_memory=True, **kwargs):
+    """
+    Runs a function and measures its wall time, CPU time and memory.
+
+    Parameters
+    ----------
+    stage : str
+        The stage name recorded with the measures.
+
+    func : callable
+        The function to run.
+
+    *args, **kwargs
+        The arguments of the function.
+
+    n_rows : int, optional
+        The number of rows processed, recorded with the measures. Default is None.
+
+    trace_memory : bool, optional
+        If True, the peak of the memory allocated by the function is traced with
+        `tracemalloc`, which slows the function down. Default is True.
+
+    Returns
+    -------
+    result : object
+        The return value of the function.
+
+    record : dict
+        The stage, rows, wall and CPU seconds, traced peak memory in MiB (None if
+        not traced) and the peak resident memory of the process during the stage in
+        MiB.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        with PeakRss() as peak_rss:
+            result = func(*args, **kwargs)
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+            tracemalloc.stop()
+    record = {
+        "stage": stage,
+        "rows": n_rows,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_traced_mb": peak,
+        "max_rss_mb": peak_rss.mb,
+    }
+    logger.info(
+        f"{stage}: {wall:.3f}s wall, {cpu:.3f}s cpu"
+        + ("" if peak is None else f", {peak:.1f} MiB peak")
+    )
+    return result, record
+
+
+def run_benchmark(
+    n_rows,
+    work_dir,
+    max_train_rows=None,
+    trace_memory=True,
+    random_state=0,
+    **training_kwargs,
+):
+    """
+    Benchmarks the ingestion, training and scoring stages on a synthetic dataset.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of rows of the synthetic dataset.
+
+    work_dir : str
+        The directory of the generated `housing.csv`. An existing file with the same
+        number of rows is reused.
+
+    max_train_rows : int, optional
+        If given, the training and scoring stages use a random sample of at most
+        this many prepared training rows. Default is None.
+
+    trace_memory : bool, optional
+        If True, the peak memory of every stage is traced. Default is True.
+
+    random_state : int, optional
+        The seed of the generator and of the training sample. Default is 0.
+
+    **training_kwargs
+        The execution and search parameters of `model_training`.
+
+    Returns
+    -------
+    dict
+        The environment metadata under 'meta' and one record per stage, as returned
+        by `measure`, under 'stages'. The 'model_training' record also holds the
+        pickled size of the final model as 'model_size_mb' and the 'model_scoring'
+        record its test 'rmse'.
+    """
+    csv_path = os.path.join(work_dir, "housing.csv")
+    meta_path = os.path.join(work_dir, "housing.json")
+    generated = {"n_rows": n_rows, "random_state": random_state}
+    existing = None
+    if os.path.exists(csv_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            existing = json.load(f)
+    if existing != generated:
+        logger.info(f"Generating {n_rows} synthetic rows in {csv_path}...")
+        generate_housing_data(n_rows, work_dir, random_state=random_state)
+        with open(meta_path, "w") as f:
+            json.dump(generated, f)
+
+    stages = []
+
+    def run(stage, func, *args, rows=n_rows, **kwargs):
+        result, record = measure(
+            stage, func, *args, n_rows=rows, trace_memory=trace_memory, **kwargs
+        )
+        stages.append(record)
+        return result
+
+    housing = run("load_housing_data", load_housing_data, work_dir)
+    strat_train_set, strat_test_set = run("stratified_split", stratified_split, housing)
+    del housing
+    housing, housing_labels, housing_num = run(
+        "clean_strat_data", clean_strat_data, strat_train_set, strat_test_set
+    )
+    imputer = run(
+        "fit_imputer",
+        SimpleImputer(strategy="median").fit,
+        housing_num,
+        rows=len(housing_num),
+    )
+    housing_prepared = run(
+        "prepare_train_data",
+        prepare_train_data,
+        imputer,
+        housing,
+        rows=len(housing),
+    )
+    X_test_prepared, y_test = run(
+        "prepare_test_data",
+        prepare_test_data,
+        strat_test_set,
+        imputer,
+        rows=len(strat_test_set),
+    )
+    if max_train_rows is not None and len(housing_prepared) > max_train_rows:
+        housing_prepared = housing_prepared.sample(
+            max_train_rows, random_state=random_state
+        )
+        housing_labels = housing_labels.loc[housing_prepared.index]
+    _, _, _, grid_search = run(
+        "model_training",
+        model_training,
+        housing_prepared,
+        housing_labels,
+        rows=len(housing_prepared),
+        **training_kwargs,
+    )
+    final_model = get_best_model_gridsearch(grid_search, housing_prepared)
+    stages[-1]["model_size_mb"] = len(pickle.dumps(final_model)) / (1 << 20)
+    _, _, rmse, _ = run(
+        "model_scoring",
+        model_scoring,
+        final_model,
+        X_test_prepared,
+        y_test,
+        rows=len(X_test_prepared),
+    )
+    stages[-1]["rmse"] = rmse
+
+    return {
+        "meta": {
+            "n_rows": n_rows,
+            "max_train_rows": max_train_rows,
+            "training": {key: str(value) for key, value in training_kwargs.items()},
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": stages,
+    }
+
+
+def save_results(results, path):
+    """
+    Stores benchmark results as a JSON file.
+
+    Parameters
+    ----------
+    results : dict or list of dict
+        The results of `run_benchmark`.
+
+    path : str
+        The path of the JSON file.
+
+    Returns
+    -------
+    str
+        The path of the JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path):
+    """
+    Loads benchmark results stored with `save_results`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the JSON file.
+
+    Returns
+    -------
+    list of dict
+        The results, one per benchmarked dataset size.
+    """
+    with open(path) as f:
+        results = json.load(f)
+    return results if isinstance(results, list) else [results]
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2, metrics=COMPARED_METRICS):
+    """
+    Finds the stages that got slower or use more memory than in a baseline.
+
+    Results are matched to the baseline run with the same number of rows, and stages
+    by name.
+
+    Parameters
+    ----------
+    results : list of dict
+        The current results.
+
+    baseline : list of dict
+        The baseline results.
+
+    tolerance : float, optional
+        The allowed relative increase of a metric. Default is 0.2, i.e. 20%.
+
+    metrics : tuple of str, optional
+        The compared metrics. Default is ('wall_s', 'peak_traced_mb').
+
+    Returns
+    -------
+    list of dict
+        One entry per regression, with the rows, stage, metric, baseline and current
+        values and their ratio.
+    """
+    baseline_by_rows = {run["meta"]["n_rows"]: run for run in baseline}
+    regressions = []
+    for run in results:
+        n_rows = run["meta"]["n_rows"]
+        if n_rows not in baseline_by_rows:
+            logger.warning(f"No baseline for {n_rows} rows.")
+            continue
+        baseline_stages = {
+            stage["stage"]: stage for stage in baseline_by_rows[n_rows]["stages"]
+        }
+        for stage in run["stages"]:
+            reference = baseline_stages.get(stage["stage"])
+            if reference is None:
+                continue
+            for metric in metrics:
+                current, previous = stage.get(metric), reference.get(metric)
+                if current is None or not previous:
+                    continue
+                ratio = current / previous
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        {
+                            "rows": n_rows,
+                            "stage": stage["stage"],
+                            "metric": metric,
+                            "baseline": previous,
+                            "current": current,
+                            "ratio": ratio,
+                        }
+                    )
+    return regressions
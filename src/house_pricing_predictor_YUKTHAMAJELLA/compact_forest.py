@@ -0,0 +1,398 @@
+"""
+compact_forest module contains the compact inference representation of the trained
+forests of the House Pricing Predictor project.
+
+The nodes of all trees are flattened into a few contiguous float32/int32 arrays stored
+in a single memory-mappable file. Loading it maps the arrays instead of unpickling
+thousands of tree objects, and a vectorized evaluator walks all trees of a batch of
+rows at once.
+
+"""
+
+import json
+import logging
+import os
+import pickle
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPACT_MODEL_NAME = "final_model.cforest"
+
+_MAGIC = b"HPFOREST"
+_VERSION = 1
+_ALIGNMENT = 64
+# The number of levels walked between two removals of the finished pairs.
+_PRUNE_EVERY = 4
+_ARRAYS = [
+    ("feature", np.int32),
+    ("threshold", np.float32),
+    ("child", np.int32),
+    ("value", np.float32),
+    ("roots", np.int32),
+    ("missing_right", np.uint8),
+]
+
+
+def _float32_floor(values):
+    """
+    Rounds float64 values down to the nearest float32.
+
+    For a float32 `x`, `x <= t` holds exactly when `x <= _float32_floor(t)`, so the
+    float32 thresholds split float32 features like the float64 ones.
+    """
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _sibling_order(tree):
+    """
+    Renumbers the nodes of a tree breadth-first, so that the right child of every
+    split node directly follows its left child.
+
+    Returns
+    -------
+    numpy.ndarray
+        The old node id of each new node id.
+    """
+    order = [0]
+    for node in order:
+        if tree.children_left[node] != -1:
+            order.append(tree.children_left[node])
+            order.append(tree.children_right[node])
+    return np.array(order, dtype=np.intp)
+
+
+class CompactForest:
+    """
+    A regression forest stored as flat node arrays.
+
+    The right child of a split node directly follows its left child, so a row moves
+    from `node` to `child[node] + (x[feature[node]] > threshold[node])`. A missing
+    value goes right where `missing_right[node]` is set, like in the fitted trees.
+    Leaves are their own child.
+
+    Parameters
+    ----------
+    feature, threshold, child, value : numpy.ndarray
+        The split feature, split threshold, left child and leaf value of every node
+        of every tree, with node ids global to the forest.
+
+    roots : numpy.ndarray
+        The node id of the root of each tree.
+
+    missing_right : numpy.ndarray
+        1 for the nodes sending missing values right, 0 otherwise.
+
+    n_features_in_ : int
+        The number of features.
+
+    feature_names_in_ : numpy.ndarray, optional
+        The feature names seen at training time. Default is None.
+
+    path : str, optional
+        The file the arrays are mapped from. A forest with a path is pickled as its
+        path, so worker processes map the same file instead of copying the arrays.
+        Default is None.
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        child,
+        value,
+        roots,
+        missing_right,
+        n_features_in_,
+        feature_names_in_=None,
+        path=None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.child = child
+        self.value = value
+        self.roots = roots
+        self.missing_right = missing_right
+        self.n_features_in_ = n_features_in_
+        if feature_names_in_ is not None:
+            self.feature_names_in_ = np.asarray(feature_names_in_, dtype=object)
+        self.path = path
+
+    @classmethod
+    def from_estimator(cls, model):
+        """
+        Flattens a fitted scikit-learn regression forest or tree.
+
+        Parameters
+        ----------
+        model : sklearn.ensemble.RandomForestRegressor or
+                sklearn.tree.DecisionTreeRegressor
+            The fitted model, with a single output.
+
+        Returns
+        -------
+        CompactForest
+            The flattened model.
+        """
+        trees = getattr(model, "estimators_", [model])
+        if getattr(model, "n_outputs_", 1) != 1 or not all(
+            hasattr(tree, "tree_") for tree in trees
+        ):
+            raise ValueError(
+                f"Only single-output regression trees and forests can be compacted, "
+                f"got {type(model).__name__}."
+            )
+
+        arrays = {name: [] for name, _ in _ARRAYS}
+        offset = 0
+        for estimator in trees:
+            tree = estimator.tree_
+            order = _sibling_order(tree)
+            new_id = np.empty(tree.node_count, dtype=np.intp)
+            new_id[order] = np.arange(tree.node_count)
+            left = tree.children_left[order]
+            is_leaf = left == -1
+            arrays["feature"].append(np.where(is_leaf, 0, tree.feature[order]))
+            arrays["threshold"].append(
+                np.where(is_leaf, np.inf, _float32_floor(tree.threshold[order]))
+            )
+            arrays["child"].append(
+                offset + np.where(is_leaf, np.arange(tree.node_count), new_id[left])
+            )
+            arrays["value"].append(tree.value[order, 0, 0])
+            arrays["roots"].append([offset])
+            missing_left = getattr(tree, "missing_go_to_left", None)
+            arrays["missing_right"].append(
+                np.zeros(tree.node_count)
+                if missing_left is None
+                else np.where(is_leaf, 0, 1 - missing_left[order])
+            )
+            offset += tree.node_count
+
+        return cls(
+            **{
+                name: np.ascontiguousarray(np.concatenate(arrays[name]), dtype=dtype)
+                for name, dtype in _ARRAYS
+            },
+            n_features_in_=model.n_features_in_,
+            feature_names_in_=getattr(model, "feature_names_in_", None),
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X, block_size=1 << 18):
+        """
+        Predicts the target variable by averaging the leaf values of all trees.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The feature matrix, with columns in training order.
+
+        block_size : int, optional
+            The number of (row, tree) pairs walked at a time. The pairs move down one
+            level per step, and those that reached their leaf are removed from the
+            walk every few levels. Default is 262144.
+
+        Returns
+        -------
+        numpy.ndarray
+            The float64 predictions.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, but the forest expects "
+                f"{self.n_features_in_} features."
+            )
+        missing = np.isnan(X).any(axis=1)
+        predictions = np.empty(len(X))
+        n_features = X.shape[1]
+        roots = np.asarray(self.roots)
+        step = max(1, block_size // self.n_trees)
+        for start in range(0, len(X), step):
+            rows = X[start : start + step].ravel()
+            has_missing = missing[start : start + step].any()
+            n_rows = rows.size // n_features
+            nodes = np.tile(roots, n_rows)
+            pairs = np.arange(nodes.size, dtype=np.int32)
+            row_offsets = np.repeat(
+                np.arange(0, rows.size, n_features, dtype=np.int32), self.n_trees
+            )
+            leaves = np.empty_like(nodes)
+            level = 0
+            while nodes.size:
+                child = self.child.take(nodes)
+                # Drop the (row, tree) pairs that reached their leaf. A pair on a leaf
+                # stays there, so this is only done every few levels, which costs less
+                # than filtering the arrays at every level. Split nodes can also have
+                # an infinite threshold, when they only split off missing values, so
+                # leaves are told apart by being their own child.
+                if level % _PRUNE_EVERY == 0:
+                    done = child == nodes
+                    if done.all():
+                        leaves[pairs] = nodes
+                        break
+                    if done.any():
+                        leaves[pairs[done]] = nodes[done]
+                        active = ~done
+                        nodes = nodes[active]
+                        pairs = pairs[active]
+                        row_offsets = row_offsets[active]
+                        child = child[active]
+                level += 1
+                x = rows.take(row_offsets + self.feature.take(nodes))
+                go_right = x > self.threshold.take(nodes)
+                if has_missing:
+                    go_right |= np.isnan(x) & self.missing_right.take(nodes).view(bool)
+                nodes = child + go_right
+            leaf_values = self.value.take(leaves).reshape(n_rows, self.n_trees)
+            predictions[start : start + step] = leaf_values.mean(
+                axis=1, dtype=np.float64
+            )
+        return predictions
+
+    def save(self, path):
+        """
+        Stores the forest as a single file of aligned arrays behind a json header.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        str
+            The path of the file.
+        """
+        layout = {}
+        offset = 0
+        for name, dtype in _ARRAYS:
+            array = getattr(self, name)
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            layout[name] = {"offset": offset, "length": len(array)}
+            offset += array.size * np.dtype(dtype).itemsize
+        header = {
+            "version": _VERSION,
+            "n_features_in": int(self.n_features_in_),
+            "feature_names_in": (
+                None
+                if getattr(self, "feature_names_in_", None) is None
+                else [str(name) for name in self.feature_names_in_]
+            ),
+            "arrays": layout,
+        }
+        header_bytes = json.dumps(header).encode()
+        data_start = -(-(16 + len(header_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+            for name, dtype in _ARRAYS:
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(getattr(self, name), dtype=dtype).data)
+        os.replace(tmp_path, path)
+        return path
+
+    def __reduce__(self):
+        if self.path is not None:
+            return load_compact_forest, (self.path,)
+        return super().__reduce__()
+
+
+def load_compact_forest(path):
+    """
+    Memory-maps a forest stored with `CompactForest.save`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    CompactForest
+        The forest, with its arrays backed by the file.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(8)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a compact forest file.")
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    if header["version"] != _VERSION:
+        raise ValueError(
+            f"{path} has compact forest version {header['version']}, but only "
+            f"version {_VERSION} is supported."
+        )
+    data_start = -(-(16 + header_size) // _ALIGNMENT) * _ALIGNMENT
+    arrays = {
+        name: np.memmap(
+            path,
+            dtype=dtype,
+            mode="r",
+            offset=data_start + header["arrays"][name]["offset"],
+            shape=(header["arrays"][name]["length"],),
+        )
+        for name, dtype in _ARRAYS
+    }
+    return CompactForest(
+        **arrays,
+        n_features_in_=header["n_features_in"],
+        feature_names_in_=header["feature_names_in"],
+        path=path,
+    )
+
+
+def export_forest(model, path):
+    """
+    Flattens a fitted regression forest and stores it as a compact forest file.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.RandomForestRegressor
+        The fitted forest.
+
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    str
+        The path of the file.
+    """
+    return CompactForest.from_estimator(model).save(path)
+
+
+def load_model(model_path, compact=False):
+    """
+    Loads the final model of a model directory.
+
+    Parameters
+    ----------
+    model_path : str
+        The directory holding `final_model.pkl` and, optionally, `final_model.cforest`.
+
+    compact : bool, optional
+        If True, the compact forest is loaded instead of the pickled model when it
+        exists. It loads near-instantly but predicts about 1.6x slower. Default is
+        False.
+
+    Returns
+    -------
+    object
+        The `CompactForest` or the unpickled model.
+    """
+    compact_path = os.path.join(model_path, COMPACT_MODEL_NAME)
+    if compact and os.path.exists(compact_path):
+        logger.debug(f"Loading the compact forest {compact_path}.")
+        return load_compact_forest(compact_path)
+    with open(os.path.join(model_path, "final_model.pkl"), "rb") as f:
+        return pickle.load(f)
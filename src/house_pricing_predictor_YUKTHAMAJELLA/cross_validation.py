@@ -0,0 +1,612 @@
+"""
+cross_validation module contains the shared cross-validation engine of the House Pricing
+Predictor project.
+
+The fold index arrays and the fold-sliced training and validation matrices are built
+once, as contiguous NumPy arrays, and every model and search candidate is evaluated
+against the same folds. Baselines and forests are therefore scored on identical splits
+without re-slicing the training dataframe for every fit.
+
+"""
+
+import logging
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import kendalltau, rankdata, spearmanr
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+
+logger = logging.getLogger(__name__)
+
+
+class FoldCache:
+    """
+    The materialized folds of a K-fold cross-validation.
+
+    The cache holds `n_splits` copies of the training rows, so it needs about
+    `n_splits` times the memory of the dataset.
+
+    Parameters
+    ----------
+    X : pandas.DataFrame or numpy.ndarray
+        The training features.
+
+    y : pandas.Series or numpy.ndarray
+        The training labels.
+
+    n_splits : int, optional
+        The number of folds. Default is 5.
+
+    shuffle : bool, optional
+        If True, the rows are shuffled before splitting. Default is False, which
+        gives the same folds as `cv=n_splits` in the scikit-learn searches.
+
+    random_state : int, optional
+        The seed of the shuffling. Default is None.
+
+    dtype : numpy.dtype, optional
+        The dtype of the feature matrices. Default is float64.
+    """
+
+    def __init__(self, X, y, n_splits=5, shuffle=False, random_state=None, dtype=None):
+        X = np.ascontiguousarray(X, dtype=dtype or np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        kfold = KFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state)
+        self.X = X
+        self.y = y
+        self.n_splits = n_splits
+        self.indices = list(kfold.split(X))
+        self.folds = [
+            (X[train], y[train], X[test], y[test]) for train, test in self.indices
+        ]
+
+    def split(self, X=None, y=None, groups=None):
+        """
+        Yields the fold index arrays, so the cache can be passed as `cv` to the
+        scikit-learn searches.
+        """
+        yield from self.indices
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.n_splits
+
+    def __len__(self):
+        return self.n_splits
+
+    def __iter__(self):
+        return iter(self.folds)
+
+
+def _fit_and_score(estimator, fold, scorer, return_train_score):
+    X_train, y_train, X_test, y_test = fold
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    test_score = scorer(estimator, X_test, y_test)
+    train_score = scorer(estimator, X_train, y_train) if return_train_score else None
+    return test_score, train_score, fit_time
+
+
+def evaluate_on_folds(estimator, folds, scoring="neg_mean_squared_error", n_jobs=None):
+    """
+    Scores an estimator on every fold of a fold cache.
+
+    Parameters
+    ----------
+    estimator : sklearn.base.BaseEstimator
+        The unfitted estimator, cloned for every fold.
+
+    folds : FoldCache
+        The shared folds.
+
+    scoring : str or callable, optional
+        The scikit-learn scoring. Default is 'neg_mean_squared_error'.
+
+    n_jobs : int, optional
+        The number of folds fitted in parallel. Default is None.
+
+    Returns
+    -------
+    numpy.ndarray
+        The validation score of each fold.
+    """
+    scorer = check_scoring(estimator, scoring=scoring)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score)(clone(estimator), fold, scorer, False)
+        for fold in folds
+    )
+    return np.array([test_score for test_score, _, _ in results])
+
+
+class FoldSearchCV(BaseEstimator):
+    """
+    A hyperparameter search evaluating every candidate on a shared fold cache.
+
+    Exposes the `cv_results_`, `best_index_`, `best_params_`, `best_score_` and
+    `best_estimator_` of the scikit-learn searches.
+
+    Parameters
+    ----------
+    estimator : sklearn.base.BaseEstimator
+        The estimator to tune.
+
+    param_grid : dict or list of dict, optional
+        The parameter grid. Exactly one of `param_grid` and `param_distributions` is
+        required.
+
+    param_distributions : dict, optional
+        The parameter distributions, sampled `n_iter` times.
+
+    n_iter : int, optional
+        The number of sampled candidates. Default is 10.
+
+    cv : int or FoldCache, optional
+        The shared folds, or the number of folds to build from the fitted data.
+        Default is 5.
+
+    scoring : str or callable, optional
+        The scikit-learn scoring. Default is 'neg_mean_squared_error'.
+
+    n_jobs : int, optional
+        The number of candidate and fold fits run in parallel. Default is None.
+
+    refit : bool, optional
+        If True, the best candidate is refitted on the whole data. Default is True.
+
+    return_train_score : bool, optional
+        If True, the training scores are included in `cv_results_`. Default is False.
+
+    random_state : int, optional
+        The seed of the candidate sampling. Default is None.
+    """
+
+    def __init__(
+        self,
+        estimator,
+        param_grid=None,
+        param_distributions=None,
+        n_iter=10,
+        cv=5,
+        scoring="neg_mean_squared_error",
+        n_jobs=None,
+        refit=True,
+        return_train_score=False,
+        random_state=None,
+    ):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.return_train_score = return_train_score
+        self.random_state = random_state
+
+    def _candidates(self):
+        if (self.param_grid is None) == (self.param_distributions is None):
+            raise ValueError(
+                "Exactly one of param_grid and param_distributions is required."
+            )
+        if self.param_grid is not None:
+            return list(ParameterGrid(self.param_grid))
+        return list(
+            ParameterSampler(
+                self.param_distributions, self.n_iter, random_state=self.random_state
+            )
+        )
+
+    def _evaluate(self, candidates, folds, scorer):
+        """
+        Scores every candidate on every fold.
+
+        Returns
+        -------
+        test_scores, train_scores, fit_times : numpy.ndarray
+            The (n_candidates, n_splits) validation scores, training scores (None if
+            not requested) and fit times.
+        """
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(
+                clone(self.estimator).set_params(**params),
+                fold,
+                scorer,
+                self.return_train_score,
+            )
+            for params in candidates
+            for fold in folds
+        )
+        shape = (len(candidates), len(folds))
+        test_scores = np.array([r[0] for r in results]).reshape(shape)
+        fit_times = np.array([r[2] for r in results]).reshape(shape)
+        train_scores = None
+        if self.return_train_score:
+            train_scores = np.array([r[1] for r in results]).reshape(shape)
+        return test_scores, train_scores, fit_times
+
+    def fit(self, X, y):
+        """
+        Evaluates every candidate on every fold and refits the best one.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The training features.
+
+        y : pandas.Series or numpy.ndarray
+            The training labels.
+
+        Returns
+        -------
+        FoldSearchCV
+            The fitted search.
+        """
+        folds = self.cv if isinstance(self.cv, FoldCache) else FoldCache(X, y, self.cv)
+        candidates = self._candidates()
+        scorer = check_scoring(self.estimator, scoring=self.scoring)
+        n_splits = len(folds)
+        test_scores, train_scores, fit_times = self._evaluate(
+            candidates, folds, scorer
+        )
+
+        mean_scores = test_scores.mean(axis=1)
+        ranks = rankdata(-mean_scores, method="min").astype(np.int32)
+
+        self.cv_results_ = {
+            "params": candidates,
+            "mean_fit_time": fit_times.mean(axis=1),
+            "std_fit_time": fit_times.std(axis=1),
+            "mean_test_score": mean_scores,
+            "std_test_score": test_scores.std(axis=1),
+            "rank_test_score": ranks,
+        }
+        for i in range(n_splits):
+            self.cv_results_[f"split{i}_test_score"] = test_scores[:, i]
+        if self.return_train_score:
+            self.cv_results_["mean_train_score"] = train_scores.mean(axis=1)
+            self.cv_results_["std_train_score"] = train_scores.std(axis=1)
+            for i in range(n_splits):
+                self.cv_results_[f"split{i}_train_score"] = train_scores[:, i]
+
+        self.n_splits_ = n_splits
+        self.best_index_ = int(ranks.argmin())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(
+                **self.best_params_
+            )
+            self.best_estimator_.fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+
+class _Predictions(RegressorMixin, BaseEstimator):
+    """
+    Stands in for a fitted estimator whose predictions are already known, so that
+    scikit-learn scorers can score them.
+    """
+
+    def __init__(self, predictions):
+        self.predictions = predictions
+
+    def predict(self, X):
+        return self.predictions
+
+
+def _grow_and_score(estimator, counts, fold, scorer, return_train_score):
+    """
+    Grows one warm-started forest on a fold through increasing tree counts.
+
+    The forest prediction is the mean of its tree predictions, so only the trees
+    added at each step are evaluated and summed into running totals.
+
+    Returns
+    -------
+    list of tuple
+        The (test score, train score, cumulative fit time) at each tree count.
+    """
+    X_train, y_train, X_test, y_test = fold
+    # The trees split on float32 features, as in the forest's own predict.
+    X_train32 = X_train.astype(np.float32) if return_train_score else None
+    X_test32 = X_test.astype(np.float32)
+    estimator.set_params(warm_start=True)
+    test_sum = np.zeros(len(X_test))
+    train_sum = np.zeros(len(X_train)) if return_train_score else None
+    fit_time = 0.0
+    results = []
+    for count in counts:
+        n_before = len(getattr(estimator, "estimators_", []))
+        start = time.perf_counter()
+        estimator.set_params(n_estimators=count).fit(X_train, y_train)
+        fit_time += time.perf_counter() - start
+        for tree in estimator.estimators_[n_before:]:
+            test_sum += tree.predict(X_test32, check_input=False)
+            if return_train_score:
+                train_sum += tree.predict(X_train32, check_input=False)
+        test_score = scorer(_Predictions(test_sum / count), X_test, y_test)
+        train_score = None
+        if return_train_score:
+            train_score = scorer(_Predictions(train_sum / count), X_train, y_train)
+        results.append((test_score, train_score, fit_time))
+    return results
+
+
+def _forest_groups(candidates, default_count, indices=None):
+    """
+    Groups forest candidates by every parameter except `n_estimators`.
+
+    Returns
+    -------
+    counts : list of int
+        The `n_estimators` of every candidate.
+
+    groups : list of tuple
+        The (other parameters, candidate indices, sorted distinct counts) of each
+        group.
+    """
+    counts = [params.get("n_estimators", default_count) for params in candidates]
+    groups = {}
+    for index in range(len(candidates)) if indices is None else indices:
+        others = tuple(
+            sorted((k, v) for k, v in candidates[index].items() if k != "n_estimators")
+        )
+        groups.setdefault(others, []).append(index)
+    return counts, [
+        (others, members, sorted({counts[i] for i in members}))
+        for others, members in groups.items()
+    ]
+
+
+class WarmStartForestSearchCV(FoldSearchCV):
+    """
+    A forest search growing one warm-started forest per fold and per combination of
+    the other parameters, evaluated at every requested `n_estimators`.
+
+    A tree of a warm-started forest is the same as the tree at that position of a
+    forest fitted from scratch with the same integer `random_state`, so the scores
+    equal those of `FoldSearchCV` while the whole `n_estimators` axis costs as much
+    as its largest value. The estimator must be a `RandomForestRegressor` or another
+    forest averaging the predictions of its `estimators_`.
+
+    Parameters
+    ----------
+    See `FoldSearchCV`.
+    """
+
+    def _evaluate(self, candidates, folds, scorer):
+        counts, jobs = _forest_groups(
+            candidates, self.estimator.get_params()["n_estimators"]
+        )
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_grow_and_score)(
+                clone(self.estimator).set_params(**dict(others)),
+                group_counts,
+                fold,
+                scorer,
+                self.return_train_score,
+            )
+            for others, _, group_counts in jobs
+            for fold in folds
+        )
+
+        shape = (len(candidates), len(folds))
+        test_scores = np.empty(shape)
+        train_scores = np.empty(shape) if self.return_train_score else None
+        fit_times = np.empty(shape)
+        results = iter(results)
+        for _, indices, group_counts in jobs:
+            for fold_index in range(len(folds)):
+                by_count = dict(zip(group_counts, next(results)))
+                for i in indices:
+                    test_score, train_score, fit_time = by_count[counts[i]]
+                    test_scores[i, fold_index] = test_score
+                    fit_times[i, fold_index] = fit_time
+                    if self.return_train_score:
+                        train_scores[i, fold_index] = train_score
+        return test_scores, train_scores, fit_times
+
+
+def _grow_and_score_oob(estimator, counts, X, y, scorer, return_train_score):
+    """
+    Grows one warm-started bootstrapped forest on the whole data through increasing
+    tree counts and scores it out-of-bag.
+
+    Each row is predicted by the trees whose bootstrap sample left it out; rows that
+    are in every bootstrap sample so far are not scored.
+
+    Returns
+    -------
+    list of tuple
+        The (out-of-bag score, train score, cumulative fit time) at each tree count.
+    """
+    X32 = X.astype(np.float32)
+    estimator.set_params(warm_start=True)
+    oob_sum = np.zeros(len(X))
+    oob_count = np.zeros(len(X), dtype=np.int64)
+    train_sum = np.zeros(len(X)) if return_train_score else None
+    fit_time = 0.0
+    results = []
+    for count in counts:
+        n_before = len(getattr(estimator, "estimators_", []))
+        start = time.perf_counter()
+        estimator.set_params(n_estimators=count).fit(X, y)
+        fit_time += time.perf_counter() - start
+        new_trees = estimator.estimators_[n_before:]
+        new_samples = estimator.estimators_samples_[n_before:]
+        for tree, samples in zip(new_trees, new_samples):
+            oob = np.ones(len(X), dtype=bool)
+            oob[samples] = False
+            oob_sum[oob] += tree.predict(X32[oob], check_input=False)
+            oob_count[oob] += 1
+            if return_train_score:
+                train_sum += tree.predict(X32, check_input=False)
+        scored = oob_count > 0
+        if not scored.all():
+            logger.debug(
+                f"{(~scored).sum()} rows have no out-of-bag prediction with {count} "
+                "trees and are left out of the score."
+            )
+        oob_score = scorer(
+            _Predictions(oob_sum[scored] / oob_count[scored]), X[scored], y[scored]
+        )
+        train_score = None
+        if return_train_score:
+            train_score = scorer(_Predictions(train_sum / count), X, y)
+        results.append((oob_score, train_score, fit_time))
+    return results
+
+
+class OOBForestSearchCV(WarmStartForestSearchCV):
+    """
+    A forest search scoring bootstrapped candidates by their out-of-bag error from a
+    single warm-started fit on the whole data, instead of one fit per fold.
+
+    Candidates with `bootstrap=False` have no out-of-bag rows and fall back to the
+    K-fold evaluation of `WarmStartForestSearchCV`. The out-of-bag score of a
+    candidate is repeated in every `split<i>_test_score`, and the `score_method`
+    entry of `cv_results_` tells 'oob' and 'kfold' candidates apart.
+
+    Parameters
+    ----------
+    See `FoldSearchCV`.
+    """
+
+    def _evaluate(self, candidates, folds, scorer):
+        default_params = self.estimator.get_params()
+        bootstrapped = [
+            params.get("bootstrap", default_params["bootstrap"])
+            for params in candidates
+        ]
+        self._score_methods = np.where(bootstrapped, "oob", "kfold")
+
+        shape = (len(candidates), len(folds))
+        test_scores = np.empty(shape)
+        train_scores = np.empty(shape) if self.return_train_score else None
+        fit_times = np.empty(shape)
+
+        kfold_indices = [i for i, oob in enumerate(bootstrapped) if not oob]
+        if kfold_indices:
+            kfold_results = super()._evaluate(
+                [candidates[i] for i in kfold_indices], folds, scorer
+            )
+            for target, source in zip(
+                (test_scores, train_scores, fit_times), kfold_results
+            ):
+                if target is not None:
+                    target[kfold_indices] = source
+
+        counts, jobs = _forest_groups(
+            candidates,
+            default_params["n_estimators"],
+            [i for i, oob in enumerate(bootstrapped) if oob],
+        )
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_grow_and_score_oob)(
+                clone(self.estimator).set_params(**dict(others)),
+                group_counts,
+                folds.X,
+                folds.y,
+                scorer,
+                self.return_train_score,
+            )
+            for others, _, group_counts in jobs
+        )
+        for (_, indices, group_counts), group_results in zip(jobs, results):
+            by_count = dict(zip(group_counts, group_results))
+            for i in indices:
+                test_score, train_score, fit_time = by_count[counts[i]]
+                test_scores[i] = test_score
+                fit_times[i] = fit_time
+                if self.return_train_score:
+                    train_scores[i] = train_score
+        return test_scores, train_scores, fit_times
+
+    def fit(self, X, y):
+        """
+        Evaluates every candidate out-of-bag or on every fold and refits the best one.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The training features.
+
+        y : pandas.Series or numpy.ndarray
+            The training labels.
+
+        Returns
+        -------
+        OOBForestSearchCV
+            The fitted search.
+        """
+        super().fit(X, y)
+        self.cv_results_["score_method"] = self._score_methods
+        return self
+
+
+def _candidate_scores(search):
+    """
+    Returns the mean validation score of every candidate of a fitted search, keyed by
+    its parameters. A candidate of several halving rounds keeps its last score.
+    """
+    results = search.cv_results_
+    return {
+        repr(sorted(params.items())): score
+        for params, score in zip(results["params"], results["mean_test_score"])
+    }
+
+
+def rank_agreement(search, reference, top_k=3):
+    """
+    Measures how closely the candidate ranking of a search tracks a reference one.
+
+    Typically `search` ran on a subsample and `reference` on the full data, over the
+    same candidates. Only the candidates scored by both are compared.
+
+    Parameters
+    ----------
+    search : sklearn.model_selection.BaseSearchCV or FoldSearchCV
+        The fitted search.
+
+    reference : sklearn.model_selection.BaseSearchCV or FoldSearchCV
+        The fitted reference search.
+
+    top_k : int, optional
+        The size of the compared top candidates. Default is 3.
+
+    Returns
+    -------
+    dict
+        'n_candidates', the number of compared candidates, 'spearman' and 'kendall',
+        the rank correlations of their scores, 'top_k_overlap', the fraction of the
+        reference top `top_k` also in the top `top_k` of the search, and
+        'best_rank', the reference rank of the best candidate of the search, 1 if
+        both agree.
+    """
+    scores = _candidate_scores(search)
+    reference_scores = _candidate_scores(reference)
+    keys = [key for key in scores if key in reference_scores]
+    if len(keys) < 2:
+        raise ValueError(
+            f"Only {len(keys)} candidates are shared by the searches, at least 2 are "
+            f"required."
+        )
+    values = np.array([scores[key] for key in keys])
+    reference_values = np.array([reference_scores[key] for key in keys])
+    top_k = min(top_k, len(keys))
+    top = set(np.argsort(-values, kind="stable")[:top_k])
+    reference_top = set(np.argsort(-reference_values, kind="stable")[:top_k])
+    reference_ranks = rankdata(-reference_values, method="min")
+    return {
+        "n_candidates": len(keys),
+        "spearman": float(spearmanr(values, reference_values).statistic),
+        "kendall": float(kendalltau(values, reference_values).statistic),
+        "top_k_overlap": len(top & reference_top) / top_k,
+        "best_rank": int(reference_ranks[np.argmax(values)]),
+    }
@@ -7,22 +7,95 @@ it, and stores it in a format that can be used for model training.
 
 """
 
+import hashlib
+import json
 import logging
+import numbers
 import os
 import tarfile
 
 import numpy as np
 import pandas as pd
-from six.moves import urllib
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import SimpleImputer
 from sklearn.model_selection import StratifiedShuffleSplit
 
+from house_pricing_predictor_YUKTHAMAJELLA.downloader import (
+    DownloadError,
+    download_file,
+    remote_version,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.instrumentation import instrument
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import (
+    OCEAN_PROXIMITY_CATEGORIES,
+    HousingPreprocessor,
+)
+
 logger = logging.getLogger(__name__)
 
+HOUSING_DTYPES = {
+    "longitude": "float32",
+    "latitude": "float32",
+    "housing_median_age": "float32",
+    "total_rooms": "float32",
+    "total_bedrooms": "float32",
+    "population": "float32",
+    "households": "float32",
+    "median_income": "float32",
+    "median_house_value": "float32",
+    "ocean_proximity": pd.CategoricalDtype(OCEAN_PROXIMITY_CATEGORIES),
+}
+
+INCOME_CAT_BINS = [0.0, 1.5, 3.0, 4.5, 6.0, np.inf]
+INCOME_CAT_LABELS = [1, 2, 3, 4, 5]
+
+# The SHA-256 of every raw data archive, by url, recorded by its first download.
+HOUSING_SHA256_PATH = os.path.join("datasets", "housing", "housing_sha256.json")
+
+
+def _read_pins():
+    if not os.path.exists(HOUSING_SHA256_PATH):
+        return {}
+    with open(HOUSING_SHA256_PATH) as f:
+        return json.load(f)
+
+
+def pinned_housing_sha256(housing_url):
+    """
+    Returns the SHA-256 pinned for a raw data archive by its first download.
+
+    Parameters
+    ----------
+    housing_url : str
+        The url to the source data.
+
+    Returns
+    -------
+    str or None
+        The SHA-256 hex digest, or None if the archive was never downloaded.
+    """
+    return _read_pins().get(housing_url)
+
 
-def fetch_housing_data(housing_url, housing_path):
+def _pin_housing_sha256(housing_url, digest):
+    pins = _read_pins()
+    pins[housing_url] = digest
+    os.makedirs(os.path.dirname(HOUSING_SHA256_PATH) or ".", exist_ok=True)
+    tmp_path = HOUSING_SHA256_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(pins, f, indent=2)
+    os.replace(tmp_path, HOUSING_SHA256_PATH)
+    logger.info(f"Pinned the SHA-256 of {housing_url} in {HOUSING_SHA256_PATH}.")
+
+
+@instrument
+def fetch_housing_data(housing_url, housing_path, sha256=None):
     """
     Extract data from the specified url link.
 
+    The archive is downloaded with resumable, concurrent byte ranges and extracted
+    while it downloads.
+
     Parameters
     ----------
     housing_url : str
@@ -31,6 +104,10 @@ def fetch_housing_data(housing_url, housing_path):
     housing_path : str
         The path to store the extracted data.
 
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the archive. Default is the pinned one, see
+        `download_housing_archive`.
+
     Returns
     -------
     None
@@ -41,16 +118,116 @@ def fetch_housing_data(housing_url, housing_path):
         logger.info("Extracting data from source...")
         os.makedirs(housing_path, exist_ok=True)
         tgz_path = os.path.join(housing_path, "housing.tgz")
-        urllib.request.urlretrieve(housing_url, tgz_path)
-        housing_tgz = tarfile.open(tgz_path)
-        housing_tgz.extractall(path=housing_path)
-        housing_tgz.close()
+        download_housing_archive(
+            housing_url, tgz_path, sha256=sha256, extract_to=housing_path
+        )
         logger.debug("Data extracted successfully.")
     except Exception as e:
         logger.error(f"Error while extracting data: {e}")
+        raise
+
+
+def download_housing_archive(housing_url, tgz_path, sha256=None, extract_to=None):
+    """
+    Download the raw data archive from the specified url link.
+
+    Parameters
+    ----------
+    housing_url : str
+        The url to the source data.
+
+    tgz_path : str
+        The path to store the downloaded archive. An interrupted download is resumed
+        from the partial file next to it.
+
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the archive. Default is the digest pinned
+        in `HOUSING_SHA256_PATH` by the first download, which pins it if it is not.
+
+    extract_to : str, optional
+        If given, the archive is extracted into this directory while it downloads.
+        Default is None.
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the downloaded archive.
+
+    Raises
+    ------
+    downloader.DownloadError
+        If the archive does not match its checksum.
+    """
+    pinned = pinned_housing_sha256(housing_url)
+    try:
+        digest = download_file(
+            housing_url, tgz_path, sha256=sha256 or pinned, extract_to=extract_to
+        )
+    except DownloadError as e:
+        if sha256 is None and pinned is not None:
+            raise DownloadError(
+                f"{e}. The archive differs from the one pinned in "
+                f"{HOUSING_SHA256_PATH}; remove the pin to accept it."
+            ) from e
+        raise
+    if pinned is None:
+        _pin_housing_sha256(housing_url, digest)
+    return digest
+
+
+def housing_archive_version(housing_url, sha256=None):
+    """
+    Identifies the content of the raw data archive, to key its cache entry.
+
+    Parameters
+    ----------
+    housing_url : str
+        The url to the source data.
+
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the archive. Default is the pinned one, see
+        `pinned_housing_sha256`.
+
+    Returns
+    -------
+    str or None
+        The checksum if given or pinned, else the version reported by the server, see
+        `downloader.remote_version`. None if the server reports no version or cannot
+        be reached.
+    """
+    sha256 = sha256 or pinned_housing_sha256(housing_url)
+    if sha256 is not None:
+        return f"sha256:{sha256}"
+    try:
+        return remote_version(housing_url)
+    except OSError as e:
+        logger.warning(f"Could not check the version of {housing_url}: {e}")
+        return None
+
+
+def extract_housing_archive(tgz_path, housing_path):
+    """
+    Extract the raw data archive into the specified directory.
+
+    Parameters
+    ----------
+    tgz_path : str
+        The path to the downloaded archive.
+
+    housing_path : str
+        The path to store the extracted data.
+
+    Returns
+    -------
+    str
+        The path of the extracted data.
+    """
+    with tarfile.open(tgz_path) as housing_tgz:
+        housing_tgz.extractall(path=housing_path)
+    return housing_path
 
 
-def load_housing_data(housing_path):
+def load_housing_data(housing_path, chunksize=None):
     """
     Load the data from extracted path as dataframe.
 
@@ -59,16 +236,73 @@ def load_housing_data(housing_path):
     housing_path : str
         The path to the extracted data.
 
+    chunksize : int, optional
+        If given, the data is streamed in chunks of at most `chunksize` rows with the
+        compact `HOUSING_DTYPES` instead of being read at once. Default is None.
+
     Returns
     -------
-    pandas.DataFrame
-        The loaded data as a pandas DataFrame.
+    pandas.DataFrame or iterator of pandas.DataFrame
+        The loaded data as a pandas DataFrame, or an iterator over its chunks when
+        `chunksize` is given.
 
     """
     csv_path = os.path.join(housing_path, "housing.csv")
+    if chunksize is None:
+        return _read_housing_csv(csv_path)
+    # Not instrumented: the chunks are read, and timed, by the stages consuming them.
+    return read_housing_chunks(csv_path, chunksize)
+
+
+@instrument(stage="load_housing_data")
+def _read_housing_csv(csv_path):
     return pd.read_csv(csv_path)
 
 
+def read_housing_chunks(csv_path, chunksize):
+    """
+    Stream a housing csv file in bounded-size chunks with compact dtypes.
+
+    Parameters
+    ----------
+    csv_path : str
+        The path to a csv file with the housing schema.
+
+    chunksize : int
+        The maximum number of rows per chunk.
+
+    Returns
+    -------
+    iterator of pandas.DataFrame
+        The chunks of the file, with float32 numeric columns and a categorical
+        `ocean_proximity` column over `OCEAN_PROXIMITY_CATEGORIES`.
+    """
+    return pd.read_csv(csv_path, dtype=HOUSING_DTYPES, chunksize=chunksize)
+
+
+def add_income_cat(housing):
+    """
+    Add the `income_cat` column used as the stratum of the train/test split.
+
+    Parameters
+    ----------
+    housing : pandas.DataFrame
+        The input data as a pandas Dataframe.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The input data with the `income_cat` column added.
+    """
+    housing["income_cat"] = pd.cut(
+        housing["median_income"],
+        bins=INCOME_CAT_BINS,
+        labels=INCOME_CAT_LABELS,
+    )
+    return housing
+
+
+@instrument
 def stratified_split(housing):
     """
     Split the data into train and test sets using stratified sampling.
@@ -87,11 +321,7 @@ def stratified_split(housing):
         The test dataset as a pandas DataFrame.
 
     """
-    housing["income_cat"] = pd.cut(
-        housing["median_income"],
-        bins=[0.0, 1.5, 3.0, 4.5, 6.0, np.inf],
-        labels=[1, 2, 3, 4, 5],
-    )
+    housing = add_income_cat(housing)
 
     split = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
     for train_index, test_index in split.split(housing, housing["income_cat"]):
@@ -100,6 +330,266 @@ def stratified_split(housing):
     return strat_train_set, strat_test_set
 
 
+def stratified_split_chunks(chunks, test_size=0.2, random_state=42):
+    """
+    Split streamed chunks into train and test sets stratified on `income_cat`.
+
+    The number of test rows of every stratum is kept at the rounded `test_size`
+    fraction of the rows seen so far, so the overall proportions are exact while only
+    one chunk is held in memory.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The input data chunks, e.g. from `load_housing_data` with a `chunksize`.
+
+    test_size : float, optional
+        The fraction of rows assigned to the test set. Default is 0.2.
+
+    random_state : int, optional
+        The seed of the row selection. Default is 42.
+
+    Yields
+    ------
+    tuple of pandas.DataFrame
+        The train and test rows of each chunk, with the `income_cat` column.
+    """
+    rng = np.random.default_rng(random_state)
+    n_strata = len(INCOME_CAT_LABELS) + 1
+    seen = np.zeros(n_strata, dtype=np.int64)
+    assigned = np.zeros(n_strata, dtype=np.int64)
+    for chunk in chunks:
+        chunk = add_income_cat(chunk)
+        strata = chunk["income_cat"].cat.codes.to_numpy() + 1
+        is_test = np.zeros(len(chunk), dtype=bool)
+        for stratum in np.unique(strata):
+            rows = np.flatnonzero(strata == stratum)
+            seen[stratum] += len(rows)
+            target = int(np.floor(test_size * seen[stratum] + 0.5))
+            n_test = target - assigned[stratum]
+            assigned[stratum] = target
+            is_test[rng.choice(rows, size=n_test, replace=False)] = True
+        yield chunk[~is_test], chunk[is_test]
+
+
+def _hash_key(random_state):
+    """
+    Returns the 16 character key of `pandas.util.hash_pandas_object` for a seed.
+    """
+    return hashlib.sha256(str(random_state).encode()).hexdigest()[:16]
+
+
+def hash_split_chunks(
+    chunks, test_size=0.2, random_state=42, key_columns=None, window=4096
+):
+    """
+    Split streamed chunks into train and test sets by hashing the rows within their
+    `income_cat` stratum.
+
+    The rows of every stratum are taken in windows of `window` rows in file order. In
+    each window, the rows with the smallest hashes go to the test set, as many as keep
+    the test rows of the stratum at the rounded `test_size` fraction of its rows seen
+    so far. The proportions are exact and the assignment only depends on the file
+    content, order and seed, not on the chunk size or the machine.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The input data chunks, e.g. from `load_housing_data` with a `chunksize`.
+
+    test_size : float, optional
+        The fraction of rows assigned to the test set. Default is 0.2.
+
+    random_state : int, optional
+        The seed of the row hashes. Default is 42.
+
+    key_columns : list of str, optional
+        The columns hashed to identify a row. Default is all input columns.
+
+    window : int, optional
+        The number of rows of a stratum assigned at once. At most `window` rows of
+        every stratum are held back between chunks. Default is 4096.
+
+    Yields
+    ------
+    tuple of pandas.DataFrame
+        The train and test rows of the windows completed by each chunk, and of the
+        last partial windows after the last chunk, with the `income_cat` column.
+    """
+    hash_key = _hash_key(random_state)
+    n_strata = len(INCOME_CAT_LABELS) + 1
+    seen = np.zeros(n_strata, dtype=np.int64)
+    assigned = np.zeros(n_strata, dtype=np.int64)
+    pending = [[] for _ in range(n_strata)]
+    n_pending = np.zeros(n_strata, dtype=np.int64)
+
+    def assign(stratum, rows, hashes):
+        seen[stratum] += len(rows)
+        target = int(np.floor(test_size * seen[stratum] + 0.5))
+        n_test = target - assigned[stratum]
+        assigned[stratum] = target
+        is_test = np.zeros(len(rows), dtype=bool)
+        is_test[np.argsort(hashes, kind="stable")[:n_test]] = True
+        return rows[~is_test], rows[is_test]
+
+    def drain(stratum, last=False):
+        # Assigns the complete windows of the stratum, or all its rows after the last
+        # chunk. The pending rows are concatenated once and sliced window by window.
+        n_rows = int(n_pending[stratum])
+        n_taken = n_rows if last else n_rows - n_rows % window
+        if not n_taken:
+            return
+        parts = pending[stratum]
+        rows = pd.concat([part for part, _ in parts]) if len(parts) > 1 else parts[0][0]
+        hashes = np.concatenate([h for _, h in parts])
+        for start in range(0, n_taken, window):
+            stop = min(start + window, n_taken)
+            yield assign(stratum, rows.iloc[start:stop], hashes[start:stop])
+        pending[stratum] = []
+        if n_taken < n_rows:
+            pending[stratum].append((rows.iloc[n_taken:], hashes[n_taken:]))
+        n_pending[stratum] = n_rows - n_taken
+
+    for chunk in chunks:
+        columns = list(key_columns or chunk.columns)
+        hashes = pd.util.hash_pandas_object(
+            chunk[columns], index=False, hash_key=hash_key
+        ).to_numpy()
+        chunk = add_income_cat(chunk)
+        strata = chunk["income_cat"].cat.codes.to_numpy() + 1
+        train_parts, test_parts = [], []
+        for stratum in np.unique(strata):
+            rows = np.flatnonzero(strata == stratum)
+            pending[stratum].append((chunk.iloc[rows], hashes[rows]))
+            n_pending[stratum] += len(rows)
+            for train_rows, test_rows in drain(stratum):
+                train_parts.append(train_rows)
+                test_parts.append(test_rows)
+        if train_parts:
+            yield pd.concat(train_parts), pd.concat(test_parts)
+
+    train_parts, test_parts = [], []
+    for stratum in range(n_strata):
+        for train_rows, test_rows in drain(stratum, last=True):
+            train_parts.append(train_rows)
+            test_parts.append(test_rows)
+    if train_parts:
+        yield pd.concat(train_parts), pd.concat(test_parts)
+
+
+def split_housing_chunks(
+    housing_path, output_path, chunksize, test_size=0.2, random_state=42, method="hash"
+):
+    """
+    Stream the housing data through the stratified split and spill both sets to disk.
+
+    Parameters
+    ----------
+    housing_path : str
+        The path to the extracted data.
+
+    output_path : str
+        The directory where `strat_train_set.csv` and `strat_test_set.csv` are written.
+
+    chunksize : int
+        The maximum number of rows held in memory at once.
+
+    test_size : float, optional
+        The fraction of rows assigned to the test set. Default is 0.2.
+
+    random_state : int, optional
+        The seed of the row selection. Default is 42.
+
+    method : str, optional
+        'hash' for `hash_split_chunks`, whose split does not depend on `chunksize`, or
+        'shuffle' for `stratified_split_chunks`. Default is 'hash'.
+
+    Returns
+    -------
+    train_path : str
+        The path of the stratified train set csv, without `income_cat`.
+
+    test_path : str
+        The path of the stratified test set csv, without `income_cat`.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    train_path = os.path.join(output_path, "strat_train_set.csv")
+    test_path = os.path.join(output_path, "strat_test_set.csv")
+    splitters = {"hash": hash_split_chunks, "shuffle": stratified_split_chunks}
+    if method not in splitters:
+        raise ValueError(
+            f"Unknown split method {method!r}, expected one of {list(splitters)}."
+        )
+    chunks = load_housing_data(housing_path, chunksize=chunksize)
+    header = True
+    for train_chunk, test_chunk in splitters[method](
+        chunks, test_size=test_size, random_state=random_state
+    ):
+        mode = "w" if header else "a"
+        for set_, path in ((train_chunk, train_path), (test_chunk, test_path)):
+            set_.drop("income_cat", axis=1).to_csv(
+                path, mode=mode, header=header, index=False
+            )
+        header = False
+    return train_path, test_path
+
+
+def stratified_subsample(housing, housing_labels, size, random_state=42):
+    """
+    Samples rows stratified on the `income_cat` strata of their `median_income`.
+
+    Parameters
+    ----------
+    housing : pandas.DataFrame
+        The rows, with a `median_income` column, e.g. the prepared training data.
+
+    housing_labels : pandas.Series
+        The labels of the rows.
+
+    size : int or float
+        The number of rows kept if an integer, else the fraction of rows kept, in
+        (0, 1].
+
+    random_state : int, optional
+        The seed of the sampling. Default is 42.
+
+    Returns
+    -------
+    tuple
+        The sampled rows and their labels, or the inputs if `size` covers all rows.
+
+    Raises
+    ------
+    ValueError
+        If `size` is not a positive integer or a fraction in (0, 1], or if the sample
+        is too small to hold a row of every stratum.
+    """
+    if isinstance(size, numbers.Integral) and size > 0:
+        n_rows = int(size)
+    elif isinstance(size, numbers.Real) and 0 < size <= 1:
+        n_rows = int(np.ceil(size * len(housing)))
+    else:
+        raise ValueError(
+            f"size must be a positive number of rows or a fraction in (0, 1], got "
+            f"{size!r}."
+        )
+    if n_rows >= len(housing):
+        return housing, housing_labels
+    strata = add_income_cat(pd.DataFrame({"median_income": housing["median_income"]}))
+    n_strata = strata["income_cat"].nunique()
+    if n_rows < n_strata:
+        raise ValueError(
+            f"A subsample of {n_rows} rows cannot hold the {n_strata} income strata; "
+            f"use at least {n_strata} rows."
+        )
+    split = StratifiedShuffleSplit(
+        n_splits=1, train_size=n_rows, random_state=random_state
+    )
+    rows, _ = next(split.split(housing, strata["income_cat"].cat.codes))
+    rows = np.sort(rows)
+    return housing.iloc[rows], housing_labels.iloc[rows]
+
+
 def income_cat_proportions(data):
     """
     data : Calculates the proportion of each unique value in the "income_cat" column of
@@ -225,6 +715,36 @@ def prepare_dataframe(X, housing_num, housing):
     return housing_tr.join(pd.get_dummies(housing_cat, drop_first=True))
 
 
+def prepare_features(imputer, housing, dtype=np.float32):
+    """
+    Builds the feature dataframe of housing rows in one vectorized pass.
+
+    The imputed numeric features, the three ratio features and the one-hot columns of
+    `ocean_proximity` are written into a single preallocated matrix, without
+    intermediate dataframes. The one-hot columns cover `OCEAN_PROXIMITY_CATEGORIES`
+    minus the first category, whatever categories the rows contain.
+
+    Parameters
+    ----------
+    imputer : sklearn.impute.SimpleImputer
+        The median imputer fitted on the numeric features.
+
+    housing : pandas.DataFrame
+        The housing rows. The label and other extra columns are ignored.
+
+    dtype : numpy.dtype, optional
+        The dtype of the features. Default is float32.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The prepared features, with the index of `housing`.
+    """
+    preprocessor = HousingPreprocessor.from_imputer(imputer, dtype=dtype)
+    return preprocessor.transform_frame(housing)
+
+
+@instrument
 def clean_strat_data(strat_train_set, strat_test_set):
     """
     Cleans the stratified training and test datasets.
@@ -251,18 +771,336 @@ def clean_strat_data(strat_train_set, strat_test_set):
     for set_ in (strat_train_set, strat_test_set):
         set_.drop("income_cat", axis=1, inplace=True)
 
-    housing = strat_train_set.copy()
+    return data_manipulation(strat_train_set)
 
-    corr_matrix = housing.corr(numeric_only=True)
-    corr_matrix["median_house_value"].sort_values(ascending=False)
 
-    housing = add_features(housing)
+class StreamingMedianImputer(TransformerMixin, BaseEstimator):
+    """
+    Median imputer fitted on streamed chunks with a mergeable quantile sketch.
 
-    housing, housing_labels, housing_num = data_manipulation(strat_train_set)
-    return housing, housing_labels, housing_num
+    Every column keeps the counts of its values in logarithmic buckets, one set for the
+    positive and one for the negative values, so the sketch size only grows with the
+    log of the value range. A bucket stands for all values within `relative_accuracy`
+    of its center, hence the learned medians are within that relative error of the
+    exact ones. Sketches fitted on separate chunks, e.g. by parallel workers, are
+    combined with `merge`, and the result does not depend on how the data was split.
+
+    It exposes `statistics_` and `feature_names_in_` like a fitted
+    `SimpleImputer(strategy="median")`, so it can be used in its place.
+
+    Parameters
+    ----------
+    relative_accuracy : float, optional
+        The maximum relative error of the medians. Default is 0.001.
+
+    min_value : float, optional
+        The absolute values below which values count as zero. Default is 1e-9.
+    """
+
+    def __init__(self, relative_accuracy=0.001, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+
+    @property
+    def _log_gamma(self):
+        return np.log1p(2 * self.relative_accuracy / (1 - self.relative_accuracy))
+
+    def _reset(self, X):
+        if not 0 < self.relative_accuracy < 1:
+            raise ValueError(
+                f"relative_accuracy must be in (0, 1), got {self.relative_accuracy}."
+            )
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        self.positive_ = [{} for _ in range(self.n_features_in_)]
+        self.negative_ = [{} for _ in range(self.n_features_in_)]
+        self.zeros_ = np.zeros(self.n_features_in_, dtype=np.int64)
+
+    def _add(self, buckets, values):
+        keys, counts = np.unique(
+            np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+            return_counts=True,
+        )
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def partial_fit(self, X, y=None):
+        """
+        Adds a chunk of rows to the sketches and updates the medians.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The numeric feature chunk. Missing values are ignored.
+
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        StreamingMedianImputer
+            The updated imputer.
+        """
+        if not hasattr(self, "zeros_"):
+            self._reset(X)
+        elif X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, expected {self.n_features_in_}."
+            )
+        values = np.asarray(X, dtype=np.float64)
+        for j in range(self.n_features_in_):
+            column = values[:, j]
+            column = column[~np.isnan(column)]
+            self._add(self.positive_[j], column[column >= self.min_value])
+            self._add(self.negative_[j], -column[column <= -self.min_value])
+            self.zeros_[j] += np.count_nonzero(np.abs(column) < self.min_value)
+        self._update_statistics()
+        return self
+
+    def fit(self, X, y=None):
+        """
+        Learns the per-column medians of the rows.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The numeric features. Missing values are ignored.
+
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        StreamingMedianImputer
+            The fitted imputer.
+        """
+        self._reset(X)
+        return self.partial_fit(X)
+
+    def merge(self, other):
+        """
+        Adds the sketches of another imputer with the same parameters and columns.
+
+        Parameters
+        ----------
+        other : StreamingMedianImputer
+            The imputer fitted on other rows.
+
+        Returns
+        -------
+        StreamingMedianImputer
+            This imputer, now fitted on the rows of both.
+        """
+        if (other.relative_accuracy, other.min_value) != (
+            self.relative_accuracy,
+            self.min_value,
+        ):
+            raise ValueError("Only imputers with the same parameters can be merged.")
+        if not hasattr(other, "zeros_"):
+            return self
+        if not hasattr(self, "zeros_"):
+            self._reset(np.empty((0, other.n_features_in_)))
+            if hasattr(other, "feature_names_in_"):
+                self.feature_names_in_ = other.feature_names_in_
+        if other.n_features_in_ != self.n_features_in_:
+            raise ValueError(
+                f"Cannot merge an imputer of {other.n_features_in_} features into "
+                f"one of {self.n_features_in_}."
+            )
+        for j in range(self.n_features_in_):
+            for buckets, other_buckets in (
+                (self.positive_[j], other.positive_[j]),
+                (self.negative_[j], other.negative_[j]),
+            ):
+                for key, count in other_buckets.items():
+                    buckets[key] = buckets.get(key, 0) + count
+        self.zeros_ += other.zeros_
+        self._update_statistics()
+        return self
+
+    def _median(self, j):
+        gamma = np.exp(self._log_gamma)
+        # Bucket centers, with all bucket counts in increasing value order.
+        keys = np.array(
+            sorted(self.negative_[j], reverse=True) + sorted(self.positive_[j]),
+            dtype=np.int64,
+        )
+        n_negative = len(self.negative_[j])
+        centers = 2 * gamma ** keys.astype(np.float64) / (gamma + 1)
+        centers[:n_negative] *= -1
+        counts = [self.negative_[j][key] for key in keys[:n_negative].tolist()] + [
+            self.positive_[j][key] for key in keys[n_negative:].tolist()
+        ]
+        centers = np.insert(centers, n_negative, 0.0)
+        counts = np.cumsum(np.insert(counts, n_negative, self.zeros_[j]))
+        if counts[-1] == 0:
+            return np.nan
+        rank = (counts[-1] - 1) / 2
+        lower, upper = np.searchsorted(
+            counts, [np.floor(rank), np.ceil(rank)], side="right"
+        )
+        return (centers[lower] + centers[upper]) / 2
+
+    def _update_statistics(self):
+        self.statistics_ = np.array(
+            [self._median(j) for j in range(self.n_features_in_)]
+        )
+
+    def transform(self, X):
+        """
+        Replaces the missing values by the learned medians.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The numeric features, with the columns the imputer was fitted on.
+
+        Returns
+        -------
+        numpy.ndarray
+            The imputed features.
+        """
+        values = np.array(X, dtype=np.float64)
+        missing = np.isnan(values)
+        values[missing] = np.take(self.statistics_, np.nonzero(missing)[1])
+        return values
+
+
+@instrument
+def fit_imputer_chunks(
+    num_chunks,
+    sample_size=100_000,
+    random_state=42,
+    method="sample",
+    relative_accuracy=0.001,
+):
+    """
+    Fits a median imputer on streamed numeric chunks in bounded memory.
+
+    With `method="sample"`, a uniform reservoir sample of at most `sample_size` rows
+    is kept, so the fitted medians are exact for inputs up to that size and an
+    unbiased estimate above it. With `method="sketch"`, every row is added to a
+    `StreamingMedianImputer`, whose medians are within `relative_accuracy` of the
+    exact ones whatever the input size.
+
+    Parameters
+    ----------
+    num_chunks : iterable of pandas.DataFrame
+        The numeric feature chunks, as returned third by `data_manipulation`.
 
+    sample_size : int, optional
+        The maximum number of rows kept for fitting. Default is 100000.
 
-def prepare_train_data(imputer, housing, housing_num):
+    random_state : int, optional
+        The seed of the reservoir sampling. Default is 42.
+
+    method : str, optional
+        'sample' or 'sketch'. Default is 'sample'.
+
+    relative_accuracy : float, optional
+        The maximum relative error of the sketched medians. Default is 0.001.
+
+    Returns
+    -------
+    sklearn.impute.SimpleImputer or StreamingMedianImputer
+        The fitted median imputer.
+
+    Raises
+    ------
+    ValueError
+        If the chunks hold no rows.
+    """
+    if method == "sketch":
+        imputer = StreamingMedianImputer(relative_accuracy=relative_accuracy)
+        seen = 0
+        for chunk in num_chunks:
+            if len(chunk):
+                imputer.partial_fit(chunk)
+                seen += len(chunk)
+        if not seen:
+            raise ValueError("Cannot fit the imputer: the chunks hold no rows.")
+        return imputer
+    if method != "sample":
+        raise ValueError(
+            f"Unknown imputer method {method!r}, expected 'sample' or 'sketch'."
+        )
+
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    columns = None
+    seen = 0
+    for chunk in num_chunks:
+        values = chunk.to_numpy(dtype=np.float32)
+        if reservoir is None:
+            columns = chunk.columns
+            reservoir = np.empty((sample_size, values.shape[1]), dtype=np.float32)
+        take = min(max(sample_size - seen, 0), len(values))
+        reservoir[seen : seen + take] = values[:take]
+        rest = values[take:]
+        if len(rest):
+            positions = seen + take + np.arange(len(rest))
+            slots = rng.integers(0, positions + 1)
+            keep = slots < sample_size
+            reservoir[slots[keep]] = rest[keep]
+        seen += len(values)
+    if not seen:
+        raise ValueError("Cannot fit the imputer: the chunks hold no rows.")
+
+    sample = pd.DataFrame(reservoir[: min(seen, sample_size)], columns=columns)
+    imputer = SimpleImputer(strategy="median")
+    imputer.fit(sample)
+    return imputer
+
+
+def prepare_data_chunks(imputer, chunks):
+    """
+    Prepares streamed chunks by applying imputation and transforming the features.
+
+    Every prepared chunk has the same one-hot columns, see `prepare_features`.
+
+    Parameters
+    ----------
+    imputer : sklearn.impute.SimpleImputer
+        The fitted imputer object used to handle missing values in the numeric data.
+
+    chunks : iterable of pandas.DataFrame
+        The stratified dataset chunks, containing features and labels.
+
+    Yields
+    ------
+    tuple
+        The prepared features (pandas.DataFrame) and the labels (pandas.Series) of
+        each chunk.
+    """
+    for chunk in chunks:
+        yield prepare_features(imputer, chunk), chunk["median_house_value"].copy()
+
+
+@instrument
+def collect_prepared_chunks(prepared_chunks):
+    """
+    Concatenates prepared chunks into a single feature dataframe and label series.
+
+    Parameters
+    ----------
+    prepared_chunks : iterable of tuple
+        The (features, labels) pairs, as yielded by `prepare_data_chunks`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The prepared features.
+
+    pandas.Series
+        The labels.
+    """
+    frames, labels = zip(*prepared_chunks)
+    return pd.concat(frames), pd.concat(labels)
+
+
+@instrument
+def prepare_train_data(imputer, housing):
     """
     Prepares the training data by applying imputation and transforming the features.
 
@@ -274,24 +1112,21 @@ def prepare_train_data(imputer, housing, housing_num):
     housing : pandas.DataFrame
         The housing training dataset.
 
-    housing_num : pandas.DataFrame
-        The numeric features of the housing dataset.
-
     Returns
     -------
     pandas.DataFrame
-        The prepared training dataset.
+        The prepared float32 training dataset, see `prepare_features`.
     """
     try:
         logger.info("Preparing training dataframe...")
-        X = imputer.transform(housing_num)
-        housing_prepared = prepare_dataframe(X, housing_num, housing)
+        housing_prepared = prepare_features(imputer, housing)
         logger.debug("Training data is prepared successfully.")
     except Exception as e:
         logger.error(f"Error while preparing training data: {e}")
     return housing_prepared
 
 
+@instrument
 def prepare_test_data(strat_test_set, imputer):
     """
     Prepares the test data by applying imputation and transforming the features.
@@ -307,16 +1142,15 @@ def prepare_test_data(strat_test_set, imputer):
     Returns
     -------
     pandas.DataFrame
-        The prepared test dataset.
+        The prepared float32 test dataset, see `prepare_features`.
 
     pandas.Series
         The target labels for the test dataset.
     """
     try:
         logger.info("Preparing test dataframe...")
-        X_test, y_test, X_test_num = data_manipulation(strat_test_set)
-        X_test_prepared = imputer.transform(X_test_num)
-        X_test_prepared = prepare_dataframe(X_test_prepared, X_test_num, X_test)
+        X_test_prepared = prepare_features(imputer, strat_test_set)
+        y_test = strat_test_set["median_house_value"].copy()
         logger.debug("Test data is prepared successfully.")
     except Exception as e:
         logger.error(f"Error while preparing test data: {e}")
@@ -0,0 +1,483 @@
+"""
+data_storage module contains the functions to store and load the processed datasets of
+the House Pricing Predictor project.
+
+Datasets are stored as compressed Parquet files carrying a schema/version header, so
+that training and scoring can memory-map them and read only the columns and row groups
+they need. Pickled datasets written by older versions can still be loaded.
+
+"""
+
+import json
+import logging
+import os
+from contextlib import ExitStack
+
+import pandas as pd
+
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import read_housing_chunks
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "house_pricing_predictor"
+FORMAT_VERSION = 1
+DATASET_FORMATS = {"parquet": ".parquet", "pickle": ".pkl"}
+
+_HEADER_KEY = b"house_pricing_predictor"
+
+
+def _import_pyarrow():
+    """
+    Imports pyarrow, which is only needed for the parquet dataset format.
+
+    Returns
+    -------
+    tuple of module
+        The `pyarrow` and `pyarrow.parquet` modules.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for the parquet dataset format; install it or use "
+            "the pickle format."
+        ) from e
+    return pa, pq
+
+
+def _as_frame(data):
+    if isinstance(data, pd.Series):
+        return data.to_frame(name=str(data.name))
+    return data
+
+
+def _header(data, frame, n_rows):
+    is_series = isinstance(data, pd.Series)
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "kind": "series" if is_series else "frame",
+        "name": data.name if is_series else None,
+        "columns": {str(col): str(dtype) for col, dtype in frame.dtypes.items()},
+        "n_rows": n_rows,
+    }
+
+
+def save_dataset(data, path, compression="zstd", row_group_size=65536):
+    """
+    Stores a dataframe or series as a Parquet file with a schema/version header.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or pandas.Series
+        The dataset to store.
+
+    path : str
+        The path of the Parquet file.
+
+    compression : str, optional
+        The Parquet compression codec. Default is 'zstd'.
+
+    row_group_size : int, optional
+        The maximum number of rows per row group. Default is 65536.
+
+    Returns
+    -------
+    str
+        The path of the stored file.
+    """
+    pa, pq = _import_pyarrow()
+    frame = _as_frame(data)
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[_HEADER_KEY] = json.dumps(_header(data, frame, len(frame))).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    pq.write_table(
+        table, path, compression=compression, row_group_size=row_group_size
+    )
+    return path
+
+
+def read_header(path):
+    """
+    Reads the schema/version header of a stored dataset without reading its data.
+
+    Parameters
+    ----------
+    path : str
+        The path of the Parquet file.
+
+    Returns
+    -------
+    dict
+        The header with the format version, kind, column dtypes and row count.
+    """
+    _, pq = _import_pyarrow()
+    # The file metadata also holds the header of datasets written in batches.
+    metadata = pq.read_metadata(path).metadata or {}
+    if _HEADER_KEY not in metadata:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} dataset.")
+    header = json.loads(metadata[_HEADER_KEY])
+    if header["version"] > FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has dataset format version {header['version']}, but only "
+            f"versions up to {FORMAT_VERSION} are supported."
+        )
+    return header
+
+
+def load_dataset(path, columns=None, row_groups=None, memory_map=True):
+    """
+    Loads a stored dataset, reading only the requested columns and row groups.
+
+    Parameters
+    ----------
+    path : str
+        The path of the Parquet file.
+
+    columns : list of str, optional
+        The columns to read. If None, all columns are read. Default is None.
+
+    row_groups : list of int, optional
+        The row groups to read. If None, all row groups are read. Default is None.
+
+    memory_map : bool, optional
+        If True, the file is memory-mapped instead of read into a buffer. Default is
+        True.
+
+    Returns
+    -------
+    pandas.DataFrame or pandas.Series
+        The dataset, as the same type it was stored as.
+    """
+    _, pq = _import_pyarrow()
+    header = read_header(path)
+    parquet_file = pq.ParquetFile(path, memory_map=memory_map)
+    if row_groups is None:
+        table = parquet_file.read(columns=columns, use_pandas_metadata=True)
+    else:
+        table = parquet_file.read_row_groups(
+            row_groups, columns=columns, use_pandas_metadata=True
+        )
+    frame = table.to_pandas()
+    if header["kind"] == "series":
+        series = frame.iloc[:, 0]
+        series.name = header["name"]
+        return series
+    return frame
+
+
+def iter_dataset_batches(path, batch_size=65536, columns=None):
+    """
+    Streams a stored dataset in batches of at most `batch_size` rows.
+
+    Parameters
+    ----------
+    path : str
+        The path of the Parquet file.
+
+    batch_size : int, optional
+        The maximum number of rows per batch. Default is 65536.
+
+    columns : list of str, optional
+        The columns to read. If None, all columns are read. Default is None.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The batches of the dataset.
+    """
+    _, pq = _import_pyarrow()
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+class DatasetWriter:
+    """
+    Appends dataframe batches to a csv or Parquet file, chosen by its extension.
+
+    Parameters
+    ----------
+    path : str
+        The path of the output file, ending in '.csv' or '.parquet'.
+
+    compression : str, optional
+        The Parquet compression codec. Default is 'zstd'.
+    """
+
+    def __init__(self, path, compression="zstd"):
+        self.path = path
+        self.compression = compression
+        self.n_rows = 0
+        self._writer = None
+
+    def write(self, frame):
+        """
+        Appends a batch to the file.
+
+        Parameters
+        ----------
+        frame : pandas.DataFrame
+            The batch, with the same columns for every call.
+        """
+        if self.path.endswith(".csv"):
+            frame.to_csv(
+                self.path,
+                mode="a" if self.n_rows else "w",
+                header=not self.n_rows,
+                index=False,
+            )
+        else:
+            pa, pq = _import_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(
+                    self.path, table.schema, compression=self.compression
+                )
+            self._writer.write_table(table)
+        self.n_rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_raw_batches(path, batch_size=65536):
+    """
+    Streams raw housing rows from a csv or Parquet file in fixed-size batches.
+
+    Parameters
+    ----------
+    path : str
+        The path of the input file, ending in '.csv' or '.parquet'.
+
+    batch_size : int, optional
+        The maximum number of rows per batch. Default is 65536.
+
+    Returns
+    -------
+    iterator of pandas.DataFrame
+        The batches of raw rows.
+    """
+    if path.endswith(".csv"):
+        return read_housing_chunks(path, batch_size)
+    return iter_dataset_batches(path, batch_size=batch_size)
+
+
+def save_artifact(data, output_path, name, fmt="parquet"):
+    """
+    Stores a processed dataset under `output_path` in the given format.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or pandas.Series
+        The dataset to store.
+
+    output_path : str
+        The directory path of the processed data.
+
+    name : str
+        The dataset name, e.g. 'housing_prepared'.
+
+    fmt : str, optional
+        One of 'parquet' or 'pickle'. Default is 'parquet'.
+
+    Returns
+    -------
+    str
+        The path of the stored file.
+    """
+    path = os.path.join(output_path, name + DATASET_FORMATS[fmt])
+    if fmt == "pickle":
+        data.to_pickle(path)
+        return path
+    return save_dataset(data, path)
+
+
+class ArtifactWriter:
+    """
+    Stores a processed dataset under `output_path` batch by batch.
+
+    Parquet datasets are written one row group per batch, so only the current batch is
+    held in memory. Pickled datasets cannot be appended to, so their batches are
+    concatenated and stored on `close`.
+
+    Parameters
+    ----------
+    output_path : str
+        The directory path of the processed data.
+
+    name : str
+        The dataset name, e.g. 'housing_prepared'.
+
+    fmt : str, optional
+        One of 'parquet' or 'pickle'. Default is 'parquet'.
+
+    compression : str, optional
+        The Parquet compression codec. Default is 'zstd'.
+    """
+
+    def __init__(self, output_path, name, fmt="parquet", compression="zstd"):
+        self.path = os.path.join(output_path, name + DATASET_FORMATS[fmt])
+        self.fmt = fmt
+        self.compression = compression
+        self.n_rows = 0
+        self._header = None
+        self._writer = None
+        self._batches = []
+
+    def write(self, data):
+        """
+        Appends a batch to the dataset.
+
+        Parameters
+        ----------
+        data : pandas.DataFrame or pandas.Series
+            The batch, with the same columns and dtypes for every call.
+        """
+        if self._header is None:
+            self._header = _header(data, _as_frame(data), 0)
+        if self.fmt == "pickle":
+            self._batches.append(data)
+        else:
+            pa, pq = _import_pyarrow()
+            table = pa.Table.from_pandas(_as_frame(data), preserve_index=True)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(
+                    self.path, table.schema, compression=self.compression
+                )
+            self._writer.write_table(table)
+        self.n_rows += len(data)
+
+    def close(self):
+        """
+        Completes the dataset.
+
+        Returns
+        -------
+        str
+            The path of the stored file.
+        """
+        if self._header is None:
+            raise ValueError(f"No rows were written to {self.path}.")
+        if self.fmt == "pickle":
+            if self._batches:
+                pd.concat(self._batches).to_pickle(self.path)
+                self._batches = []
+        elif self._writer is not None:
+            self._header["n_rows"] = self.n_rows
+            self._writer.add_key_value_metadata(
+                {_HEADER_KEY: json.dumps(self._header).encode()}
+            )
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def save_artifact_chunks(chunks, output_path, names, fmt="parquet"):
+    """
+    Stores chunks of several processed datasets as they are produced.
+
+    Parameters
+    ----------
+    chunks : iterable of tuple
+        One batch of every dataset per chunk, e.g. the (features, labels) pairs
+        yielded by `prepare_data_chunks`.
+
+    output_path : str
+        The directory path of the processed data.
+
+    names : list of str
+        The dataset names, in the order of the batches of a chunk.
+
+    fmt : str, optional
+        One of 'parquet' or 'pickle'. Default is 'parquet'.
+
+    Returns
+    -------
+    list of str
+        The paths of the stored files.
+    """
+    with ExitStack() as stack:
+        writers = [
+            stack.enter_context(ArtifactWriter(output_path, name, fmt))
+            for name in names
+        ]
+        for chunk in chunks:
+            for writer, data in zip(writers, chunk):
+                writer.write(data)
+    logger.debug(f"Stored {writers[0].n_rows} rows of {names}.")
+    return [writer.path for writer in writers]
+
+
+def load_artifact(data_path, name, columns=None, row_groups=None, fmt=None):
+    """
+    Loads a processed dataset from `data_path`.
+
+    Parameters
+    ----------
+    data_path : str
+        The directory path of the processed data.
+
+    name : str
+        The dataset name, e.g. 'housing_prepared'.
+
+    columns : list of str, optional
+        The columns to read. If None, all columns are read. Default is None.
+
+    row_groups : list of int, optional
+        The row groups to read. Only supported for Parquet datasets. If None, all
+        row groups are read. Default is None.
+
+    fmt : str, optional
+        The format to load, 'parquet' or 'pickle'. If None, the dataset is loaded from
+        whichever format exists, the most recently written one if both do. Default
+        is None.
+
+    Returns
+    -------
+    pandas.DataFrame or pandas.Series
+        The loaded dataset.
+    """
+    paths = {
+        key: os.path.join(data_path, name + extension)
+        for key, extension in DATASET_FORMATS.items()
+    }
+    if fmt is None:
+        existing = [key for key, path in paths.items() if os.path.exists(path)]
+        if not existing:
+            raise FileNotFoundError(f"No dataset {name} in {data_path}.")
+        fmt = max(existing, key=lambda key: os.path.getmtime(paths[key]))
+        if len(existing) > 1:
+            logger.warning(
+                f"Dataset {name} exists in several formats, loading the newest "
+                f"{paths[fmt]}."
+            )
+
+    if fmt == "parquet":
+        return load_dataset(paths[fmt], columns=columns, row_groups=row_groups)
+    data = pd.read_pickle(paths[fmt])
+    if columns is not None and isinstance(data, pd.DataFrame):
+        data = data[columns]
+    return data
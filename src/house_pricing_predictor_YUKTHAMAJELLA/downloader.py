@@ -0,0 +1,519 @@
+"""
+downloader module contains the functions to download the raw data archive for the House
+Pricing Predictor project.
+
+Byte ranges of the file are fetched concurrently into a partial file whose progress is
+recorded next to it, so an interrupted download resumes where it stopped. The bytes are
+hashed and, optionally, extracted from the tarball in order as soon as they arrive.
+
+"""
+
+import base64
+import binascii
+import hashlib
+import http.client
+import json
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+_STATE_SAVE_INTERVAL = 1 << 20
+# The digest algorithms of the Digest and Repr-Digest headers that are checked.
+_HEADER_ALGORITHMS = {"sha-256": "sha256", "md5": "md5"}
+
+
+class DownloadError(Exception):
+    """
+    Raised when a download fails after all retries or does not match its checksum.
+    """
+
+
+def _probe(url, timeout):
+    """
+    Finds the size of a remote file and whether its server accepts byte ranges.
+
+    Parameters
+    ----------
+    url : str
+        The url of the file.
+
+    timeout : float
+        The socket timeout in seconds.
+
+    Returns
+    -------
+    size : int or None
+        The file size in bytes, or None if the server does not report it.
+
+    accepts_ranges : bool
+        True if the server answers range requests.
+
+    headers : email.message.Message
+        The response headers.
+    """
+    request = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if response.status == 206:
+            content_range = response.headers.get("Content-Range", "")
+            total = content_range.rpartition("/")[2]
+            return (int(total) if total.isdigit() else None), True, response.headers
+        length = response.headers.get("Content-Length")
+        return (int(length) if length is not None else None), False, response.headers
+
+
+def _header_digests(headers, partial):
+    """
+    Reads the digests of a remote file announced by its server.
+
+    The `Repr-Digest` and `Digest` headers describe the whole file. `Content-MD5`
+    only describes the response body, so it is ignored for a partial response.
+
+    Parameters
+    ----------
+    headers : email.message.Message
+        The response headers.
+
+    partial : bool
+        True if the response holds a byte range of the file.
+
+    Returns
+    -------
+    dict
+        The hex digest of the file by `hashlib` algorithm name.
+    """
+    values = []
+    for name in ("Repr-Digest", "Digest"):
+        for item in (headers.get(name) or "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            algorithm = _HEADER_ALGORITHMS.get(algorithm.lower())
+            if algorithm is not None:
+                values.append((algorithm, value.strip(":")))
+    if not partial and headers.get("Content-MD5"):
+        values.append(("md5", headers["Content-MD5"].strip()))
+
+    digests = {}
+    for algorithm, value in values:
+        try:
+            digests.setdefault(algorithm, base64.b64decode(value, validate=True).hex())
+        except binascii.Error:
+            logger.warning(f"Ignoring the malformed {algorithm} digest {value!r}.")
+    return digests
+
+
+def remote_version(url, timeout=30):
+    """
+    Identifies the current version of a remote file without downloading it.
+
+    Parameters
+    ----------
+    url : str
+        The url of the file.
+
+    timeout : float, optional
+        The socket timeout in seconds. Default is 30.
+
+    Returns
+    -------
+    str or None
+        The ETag of the file, else its Last-Modified date and size, or None if the
+        server reports neither.
+    """
+    size, _, headers = _probe(url, timeout)
+    etag = headers.get("ETag")
+    if etag:
+        return f"etag:{etag}"
+    last_modified = headers.get("Last-Modified")
+    if last_modified:
+        return f"modified:{last_modified}:{size}"
+    return None
+
+
+class _RangeProgress:
+    """
+    The shared progress of the byte ranges of one download.
+
+    Parameters
+    ----------
+    state_path : str
+        The path of the json file recording the progress.
+
+    url : str
+        The url of the file.
+
+    size : int or None
+        The file size in bytes, or None if unknown.
+
+    ranges : list of list of int
+        The [start, end, done] triples of the ranges; `end` is None if the size is
+        unknown.
+    """
+
+    def __init__(self, state_path, url, size, ranges):
+        self.state_path = state_path
+        self.url = url
+        self.size = size
+        self.ranges = ranges
+        self.finished = [start + done == end for start, end, done in ranges]
+        self.error = None
+        self._unsaved = 0
+        self._condition = threading.Condition()
+
+    def save(self):
+        state = {"url": self.url, "size": self.size, "ranges": self.ranges}
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self._unsaved = 0
+
+    def advance(self, index, n_bytes):
+        with self._condition:
+            self.ranges[index][2] += n_bytes
+            self._unsaved += n_bytes
+            if self._unsaved >= _STATE_SAVE_INTERVAL:
+                self.save()
+            self._condition.notify_all()
+
+    def reset(self, index):
+        with self._condition:
+            self.ranges[index][2] = 0
+
+    def finish(self, index, error=None):
+        with self._condition:
+            self.finished[index] = True
+            if error is not None and self.error is None:
+                self.error = error
+            self.save()
+            self._condition.notify_all()
+
+    def wait_available(self, pos):
+        """
+        Blocks until bytes from `pos` onwards are written and returns their count.
+
+        Parameters
+        ----------
+        pos : int
+            The file offset to read from.
+
+        Returns
+        -------
+        int
+            The number of contiguous bytes available at `pos`, or 0 at the end of the
+            file.
+        """
+        with self._condition:
+            while True:
+                if self.error is not None:
+                    raise DownloadError(str(self.error))
+                for index, (start, end, done) in enumerate(self.ranges):
+                    if start <= pos and (end is None or pos < end):
+                        available = start + done - pos
+                        if available > 0:
+                            return available
+                        if end is None and self.finished[index]:
+                            return 0
+                        break
+                else:
+                    return 0
+                self._condition.wait()
+
+
+class _OrderedReader:
+    """
+    A file-like view of the partial file that hands out bytes in order as they arrive.
+
+    Parameters
+    ----------
+    part_path : str
+        The path of the partial file.
+
+    progress : _RangeProgress
+        The shared progress of the download.
+
+    algorithms : iterable of str, optional
+        The `hashlib` algorithms of the digests computed as bytes are read. Default is
+        SHA-256 only.
+    """
+
+    def __init__(self, part_path, progress, algorithms=("sha256",)):
+        self._file = open(part_path, "rb")
+        self._progress = progress
+        self._pos = 0
+        self.digests = {name: hashlib.new(name) for name in {"sha256", *algorithms}}
+        self.digest = self.digests["sha256"]
+
+    def read(self, size=-1):
+        chunks = []
+        while size != 0:
+            available = self._progress.wait_available(self._pos)
+            if available == 0:
+                break
+            n_bytes = available if size < 0 else min(size, available)
+            chunk = os.pread(self._file.fileno(), n_bytes, self._pos)
+            self._pos += len(chunk)
+            for digest in self.digests.values():
+                digest.update(chunk)
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def drain(self, block_size=1 << 20):
+        while self.read(block_size):
+            pass
+
+    def close(self):
+        self._file.close()
+
+
+def _fetch_range(url, part_path, progress, index, accepts_ranges, options):
+    """
+    Downloads one byte range into the partial file, retrying from where it stopped.
+
+    Parameters
+    ----------
+    url : str
+        The url of the file.
+
+    part_path : str
+        The path of the partial file.
+
+    progress : _RangeProgress
+        The shared progress of the download.
+
+    index : int
+        The index of the range in `progress.ranges`.
+
+    accepts_ranges : bool
+        True if the server answers range requests.
+
+    options : dict
+        The `block_size`, `retries`, `timeout` and `backoff` of the download.
+    """
+    attempt = 0
+    with open(part_path, "r+b") as f:
+        while True:
+            start, end, done = progress.ranges[index]
+            if end is not None and start + done >= end:
+                progress.finish(index)
+                return
+            headers = {}
+            if accepts_ranges:
+                last = "" if end is None else str(end - 1)
+                headers["Range"] = f"bytes={start + done}-{last}"
+            elif done:
+                progress.reset(index)
+            try:
+                request = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(
+                    request, timeout=options["timeout"]
+                ) as response:
+                    if headers and response.status != 206:
+                        raise DownloadError("server ignored the range request")
+                    while True:
+                        offset = start + progress.ranges[index][2]
+                        limit = options["block_size"]
+                        if end is not None:
+                            limit = min(limit, end - offset)
+                        block = response.read(limit) if limit else b""
+                        if not block:
+                            break
+                        os.pwrite(f.fileno(), block, offset)
+                        progress.advance(index, len(block))
+                start, end, done = progress.ranges[index]
+                if end is not None and start + done < end:
+                    raise DownloadError("connection closed before the range ended")
+                progress.finish(index)
+                return
+            except (OSError, http.client.HTTPException, DownloadError) as e:
+                attempt += 1
+                if attempt > options["retries"]:
+                    logger.error(f"Giving up on byte range {index} of {url}: {e}")
+                    progress.finish(index, error=e)
+                    return
+                logger.warning(f"Retrying byte range {index} of {url} after: {e}")
+                time.sleep(options["backoff"] * 2 ** (attempt - 1))
+
+
+def _extract_stream(reader, extract_to):
+    """
+    Extracts a tarball from a stream into a directory once the stream is complete.
+
+    Members are extracted into a temporary directory as bytes arrive and moved into
+    place only after the whole stream was read.
+
+    Parameters
+    ----------
+    reader : _OrderedReader
+        The in-order stream of the tarball bytes.
+
+    extract_to : str
+        The directory to extract the tarball into.
+
+    Returns
+    -------
+    str
+        The temporary directory holding the extracted members.
+    """
+    os.makedirs(extract_to, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=extract_to, suffix=".tmp")
+    try:
+        with tarfile.open(fileobj=reader, mode="r|*") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(path=tmp_dir, filter="data")
+            else:
+                tar.extractall(path=tmp_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return tmp_dir
+
+
+def download_file(
+    url,
+    dest,
+    sha256=None,
+    extract_to=None,
+    n_parts=4,
+    block_size=1 << 16,
+    retries=3,
+    timeout=30,
+    backoff=0.5,
+):
+    """
+    Downloads a file with concurrent, resumable byte ranges and verifies its checksum.
+
+    The file is also checked against the digests the server announces in its
+    `Repr-Digest`, `Digest` or `Content-MD5` headers.
+
+    Parameters
+    ----------
+    url : str
+        The url of the file.
+
+    dest : str
+        The path to store the file. Progress is kept in `dest + '.part'` and
+        `dest + '.part.json'` until the download completes.
+
+    sha256 : str, optional
+        The expected SHA-256 hex digest of the file. Default is None.
+
+    extract_to : str, optional
+        If given, the file is extracted as a tarball into this directory while it
+        downloads. Default is None.
+
+    n_parts : int, optional
+        The number of byte ranges fetched concurrently. Default is 4.
+
+    block_size : int, optional
+        The number of bytes read from the network at a time. Default is 64 KiB.
+
+    retries : int, optional
+        The number of retries of each byte range. Default is 3.
+
+    timeout : float, optional
+        The socket timeout in seconds. Default is 30.
+
+    backoff : float, optional
+        The delay before the first retry in seconds, doubled on each retry. Default
+        is 0.5.
+
+    Returns
+    -------
+    str
+        The hex SHA-256 digest of the downloaded file.
+    """
+    part_path = dest + ".part"
+    state_path = part_path + ".json"
+    size, accepts_ranges, headers = _probe(url, timeout)
+    expected = _header_digests(headers, partial=accepts_ranges)
+    if sha256 is not None:
+        expected["sha256"] = sha256
+
+    state = None
+    if os.path.exists(part_path) and os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state["url"] != url or state["size"] != size or size is None:
+            state = None
+    if state is not None and accepts_ranges:
+        ranges = state["ranges"]
+        logger.info(f"Resuming download of {url}...")
+    else:
+        n_parts = n_parts if accepts_ranges and size else 1
+        step = -(-size // n_parts) if size else 0
+        ranges = [
+            [start, min(start + step, size) if size else None, 0]
+            for start in (range(0, size, step) if size else [0])
+        ]
+        with open(part_path, "wb") as f:
+            if size:
+                f.truncate(size)
+
+    progress = _RangeProgress(state_path, url, size, ranges)
+    progress.save()
+    options = {
+        "block_size": block_size,
+        "retries": retries,
+        "timeout": timeout,
+        "backoff": backoff,
+    }
+    workers = [
+        threading.Thread(
+            target=_fetch_range,
+            args=(url, part_path, progress, index, accepts_ranges, options),
+            daemon=True,
+        )
+        for index in range(len(ranges))
+    ]
+    for worker in workers:
+        worker.start()
+
+    reader = _OrderedReader(part_path, progress, algorithms=expected)
+    tmp_dir = None
+    extract_error = None
+    try:
+        if extract_to is not None:
+            try:
+                tmp_dir = _extract_stream(reader, extract_to)
+            except tarfile.TarError as e:
+                extract_error = e
+        reader.drain()
+    finally:
+        reader.close()
+        for worker in workers:
+            worker.join()
+
+    digest = reader.digest.hexdigest()
+    for algorithm, expected_digest in expected.items():
+        actual = reader.digests[algorithm].hexdigest()
+        if actual != expected_digest:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.remove(part_path)
+            os.remove(state_path)
+            raise DownloadError(
+                f"Checksum mismatch for {url}: expected {algorithm} "
+                f"{expected_digest}, got {actual}"
+            )
+    if extract_error is not None:
+        raise DownloadError(f"Could not extract {url}: {extract_error}")
+
+    if tmp_dir is not None:
+        for name in os.listdir(tmp_dir):
+            target = os.path.join(extract_to, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.replace(os.path.join(tmp_dir, name), target)
+        os.rmdir(tmp_dir)
+    os.replace(part_path, dest)
+    os.remove(state_path)
+    logger.debug(f"Downloaded {url} with sha256 {digest}.")
+    return digest
@@ -0,0 +1,115 @@
+"""
+histogram_boosting module contains the feature binning of the histogram gradient
+boosting models of the House Pricing Predictor project.
+
+The features are binned once into small integer codes before the hyperparameter search.
+The boosted trees still bin their input at every fit, but on the codes this maps each
+code to its own bin, so the splits are those of the codes. Missing values stay NaN, so
+the trees learn their own split direction for them. The win is memory: the features and
+the materialized folds of every candidate are held as float32 codes instead of float64.
+
+"""
+
+import logging
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureBinner(TransformerMixin, BaseEstimator):
+    """
+    Maps every feature to integer bin codes stored as float32.
+
+    A feature with at most `max_bins` distinct values gets one bin per value, the
+    others get bins bounded by their quantiles. Codes follow the value order, so a tree
+    split on codes is a split on the feature. Missing values stay NaN, so that
+    `HistGradientBoostingRegressor` handles them as missing rather than as the largest
+    code.
+
+    Parameters
+    ----------
+    max_bins : int, optional
+        The maximum number of bins, at most 255. Default is 255.
+
+    subsample : int, optional
+        The number of rows the quantiles are computed on, None for all rows. Default
+        is 200000.
+
+    random_state : int, optional
+        The seed of the subsampling. Default is 42.
+    """
+
+    def __init__(self, max_bins=255, subsample=200_000, random_state=42):
+        self.max_bins = max_bins
+        self.subsample = subsample
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        """
+        Learns the bin thresholds of every feature.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The features.
+
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        FeatureBinner
+            The fitted binner.
+        """
+        if not 2 <= self.max_bins <= 255:
+            raise ValueError(f"max_bins must be in [2, 255], got {self.max_bins}.")
+        if self.subsample is not None and len(X) > self.subsample:
+            rng = np.random.default_rng(self.random_state)
+            rows = np.sort(rng.choice(len(X), self.subsample, replace=False))
+            X = X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+        values = np.asarray(X, dtype=np.float64)
+
+        self.n_features_in_ = values.shape[1]
+        self.thresholds_ = []
+        for j in range(self.n_features_in_):
+            column = values[:, j]
+            column = column[~np.isnan(column)]
+            distinct = np.unique(column)
+            if len(distinct) <= self.max_bins:
+                # Midpoints, so every distinct value gets its own bin.
+                thresholds = (distinct[:-1] + distinct[1:]) / 2
+            else:
+                quantiles = np.linspace(0, 100, self.max_bins + 1)[1:-1]
+                thresholds = np.unique(np.percentile(column, quantiles))
+            self.thresholds_.append(thresholds)
+        return self
+
+    def transform(self, X):
+        """
+        Maps the features to their bin codes.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The features, in the columns order of the fit.
+
+        Returns
+        -------
+        numpy.ndarray
+            The float32 codes, NaN for missing values, in column-major order.
+        """
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, expected {self.n_features_in_}."
+            )
+        codes = np.empty(X.shape, dtype=np.float32, order="F")
+        for j, thresholds in enumerate(self.thresholds_):
+            # One column at a time, to avoid a float64 copy of the whole matrix.
+            column = X.iloc[:, j] if hasattr(X, "iloc") else X[:, j]
+            column = np.asarray(column, dtype=np.float64)
+            # A value equal to a threshold goes to the lower bin.
+            codes[:, j] = np.searchsorted(thresholds, column, side="left")
+            codes[np.isnan(column), j] = np.nan
+        return codes
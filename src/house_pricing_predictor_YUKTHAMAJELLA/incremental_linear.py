@@ -0,0 +1,218 @@
+"""
+incremental_linear module contains the linear regression baseline of the House Pricing
+Predictor project trained from sufficient statistics.
+
+The model only keeps the row count, the column sums and the XᵀX and Xᵀy products of the
+rows it has seen, so it is fitted chunk by chunk in bounded memory. Statistics of
+separate partitions are added together and solved once, and rows appended later are
+added without revisiting the old ones.
+
+"""
+
+import logging
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+
+logger = logging.getLogger(__name__)
+
+
+class SufficientStatsLinearRegression(RegressorMixin, BaseEstimator):
+    """
+    Ordinary least squares linear regression fitted from sufficient statistics.
+
+    The coefficients are solved from the centered XᵀX and Xᵀy, with the columns scaled
+    to unit variance, so they match `sklearn.linear_model.LinearRegression` up to
+    floating point rounding. Constant columns get a zero coefficient.
+
+    Parameters
+    ----------
+    fit_intercept : bool, optional
+        If True, an intercept is fitted. Default is True.
+
+    chunk_size : int, optional
+        The number of rows converted to float64 at once by `fit` and `partial_fit`.
+        Default is 65536.
+    """
+
+    def __init__(self, fit_intercept=True, chunk_size=65536):
+        self.fit_intercept = fit_intercept
+        self.chunk_size = chunk_size
+
+    def _reset(self, X):
+        n_features = X.shape[1]
+        if hasattr(X, "columns"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = n_features
+        self.n_samples_seen_ = 0
+        self.x_sum_ = np.zeros(n_features)
+        self.y_sum_ = 0.0
+        self.xtx_ = np.zeros((n_features, n_features))
+        self.xty_ = np.zeros(n_features)
+
+    def _accumulate(self, X, y):
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, expected {self.n_features_in_}."
+            )
+        y = np.asarray(y, dtype=np.float64)
+        for start in range(0, len(y), self.chunk_size):
+            rows = slice(start, start + self.chunk_size)
+            block = np.asarray(
+                X.iloc[rows] if hasattr(X, "iloc") else X[rows], dtype=np.float64
+            )
+            target = y[rows]
+            self.n_samples_seen_ += len(target)
+            self.x_sum_ += block.sum(axis=0)
+            self.y_sum_ += target.sum()
+            self.xtx_ += block.T @ block
+            self.xty_ += block.T @ target
+
+    def _solve(self):
+        n = self.n_samples_seen_
+        if n == 0:
+            raise ValueError("The model has not seen any rows.")
+        xtx, xty = self.xtx_, self.xty_
+        if self.fit_intercept:
+            x_mean = self.x_sum_ / n
+            xtx = xtx - n * np.outer(x_mean, x_mean)
+            xty = xty - x_mean * self.y_sum_
+        # Unit variance columns keep the small-scale features above the lstsq cutoff.
+        scale = np.sqrt(np.clip(np.diag(xtx), 0, None))
+        scale[scale == 0] = 1
+        coef, _, self.rank_, _ = np.linalg.lstsq(
+            xtx / np.outer(scale, scale), xty / scale, rcond=None
+        )
+        self.coef_ = coef / scale
+        self.intercept_ = (
+            (self.y_sum_ - self.x_sum_ @ self.coef_) / n if self.fit_intercept else 0.0
+        )
+        return self
+
+    def fit(self, X, y):
+        """
+        Fits the model on the rows, forgetting the rows seen before.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The features.
+
+        y : pandas.Series or numpy.ndarray
+            The target.
+
+        Returns
+        -------
+        SufficientStatsLinearRegression
+            The fitted model.
+        """
+        self._reset(X)
+        self._accumulate(X, y)
+        return self._solve()
+
+    def partial_fit(self, X, y):
+        """
+        Adds rows to the statistics and solves the model again.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The new features.
+
+        y : pandas.Series or numpy.ndarray
+            The new target.
+
+        Returns
+        -------
+        SufficientStatsLinearRegression
+            The model fitted on all the rows seen so far.
+        """
+        if not hasattr(self, "xtx_"):
+            self._reset(X)
+        self._accumulate(X, y)
+        return self._solve()
+
+    def merge(self, other):
+        """
+        Adds the statistics of a model fitted on other rows and solves the model again.
+
+        Parameters
+        ----------
+        other : SufficientStatsLinearRegression
+            The model fitted on other rows, with the same columns.
+
+        Returns
+        -------
+        SufficientStatsLinearRegression
+            The model fitted on the rows of both.
+        """
+        if not hasattr(other, "xtx_"):
+            return self
+        if not hasattr(self, "xtx_"):
+            self._reset(np.empty((0, other.n_features_in_)))
+            if hasattr(other, "feature_names_in_"):
+                self.feature_names_in_ = other.feature_names_in_
+        if other.n_features_in_ != self.n_features_in_:
+            raise ValueError(
+                f"Cannot merge a model of {other.n_features_in_} features into one of "
+                f"{self.n_features_in_}."
+            )
+        self.n_samples_seen_ += other.n_samples_seen_
+        self.x_sum_ += other.x_sum_
+        self.y_sum_ += other.y_sum_
+        self.xtx_ += other.xtx_
+        self.xty_ += other.xty_
+        return self._solve()
+
+    def predict(self, X):
+        """
+        Predicts the target of the rows.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or numpy.ndarray
+            The features.
+
+        Returns
+        -------
+        numpy.ndarray
+            The predictions.
+        """
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+def _fit_partition(model, X, y):
+    return model.fit(X, y)
+
+
+def fit_partitions(partitions, model=None, n_jobs=None):
+    """
+    Fits a linear model on every partition in parallel and merges them.
+
+    Parameters
+    ----------
+    partitions : iterable of tuple
+        The features and target of every partition, e.g. the chunks of a file.
+
+    model : SufficientStatsLinearRegression, optional
+        The unfitted model, cloned for every partition. Default is one with the
+        default parameters.
+
+    n_jobs : int, optional
+        The number of partitions fitted in parallel. Default is None, i.e. one worker.
+
+    Returns
+    -------
+    SufficientStatsLinearRegression
+        The model fitted on all partitions.
+    """
+    model = model if model is not None else SufficientStatsLinearRegression()
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_partition)(clone(model), X, y) for X, y in partitions
+    )
+    merged = clone(model)
+    for partition_model in fitted:
+        merged.merge(partition_model)
+    logger.debug(f"Merged the statistics of {len(fitted)} partitions.")
+    return merged
@@ -0,0 +1,232 @@
+"""
+ingestion_cache module contains the content-addressed cache of the data ingestion stages
+for the House Pricing Predictor project.
+
+Every stage output (raw archive, extracted data, stratified split, fitted imputer and
+prepared datasets) is stored under a key derived from the keys of its inputs and the
+parameters of the function producing it. Keys chain back to the hash of the raw
+archive, so a re-run only recomputes the stages whose inputs changed.
+
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path, block_size=1 << 20):
+    """
+    Computes the SHA-256 hash of a file's content.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file.
+
+    block_size : int, optional
+        The number of bytes read at a time. Default is 1 MiB.
+
+    Returns
+    -------
+    str
+        The hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def link_files(src_dir, dst_dir):
+    """
+    Hard-links the files of a cache entry into another directory.
+
+    The files are copied instead when they cannot be linked, e.g. across file systems.
+    Existing files are replaced rather than written through, so the cache entry is
+    never modified.
+
+    Parameters
+    ----------
+    src_dir : str
+        The cache entry directory.
+
+    dst_dir : str
+        The directory receiving the files.
+
+    Returns
+    -------
+    str
+        The path of `dst_dir`.
+    """
+    return shutil.copytree(
+        src_dir, dst_dir, copy_function=_link_or_copy, dirs_exist_ok=True
+    )
+
+
+def stage_key(stage, *input_keys, **params):
+    """
+    Derives the cache key of a stage from its input keys and parameters.
+
+    Parameters
+    ----------
+    stage : str
+        The stage name.
+
+    *input_keys : str
+        The keys or content hashes of the stage inputs.
+
+    **params
+        The parameters of the function producing the stage output.
+
+    Returns
+    -------
+    str
+        The hex digest identifying the stage output.
+    """
+    payload = json.dumps(
+        {"stage": stage, "inputs": list(input_keys), "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IngestionCache:
+    """
+    A directory of stage outputs addressed by their stage key.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory holding the cache entries.
+
+    enabled : bool, optional
+        If False, every stage is recomputed and its cache entry overwritten. Default
+        is True.
+    """
+
+    def __init__(self, cache_dir, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+
+    def _entry_path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def cached(self, stage, key, compute):
+        """
+        Returns the cached output of a stage, computing and storing it on a miss.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+
+        key : str
+            The stage key, as returned by `stage_key`.
+
+        compute : callable
+            Called without arguments to produce the output on a miss. The output must
+            be picklable.
+
+        Returns
+        -------
+        object
+            The stage output.
+        """
+        path = self._entry_path(stage, key) + ".pkl"
+        if self.enabled and os.path.exists(path):
+            logger.info(f"Cache hit for stage {stage}.")
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        logger.info(f"Computing stage {stage}...")
+        value = compute()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return value
+
+    def cached_dir(self, stage, key, compute, refresh=False):
+        """
+        Returns the cached output directory of a stage, filling it on a miss.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+
+        key : str
+            The stage key, as returned by `stage_key`.
+
+        compute : callable
+            Called with an empty directory path to write the output files on a miss.
+
+        refresh : bool, optional
+            If True, the stage is recomputed even on a hit. Default is False.
+
+        Returns
+        -------
+        str
+            The path of the directory holding the stage output files.
+        """
+        path = self._entry_path(stage, key)
+        if self.enabled and not refresh and os.path.isdir(path):
+            logger.info(f"Cache hit for stage {stage}.")
+            return path
+
+        logger.info(f"Computing stage {stage}...")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            compute(tmp_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_dir, path)
+        return path
+
+    def file_hash(self, path):
+        """
+        Returns the content hash of a cached file, computing it at most once.
+
+        Parameters
+        ----------
+        path : str
+            The path to a file inside a cache entry directory.
+
+        Returns
+        -------
+        str
+            The SHA-256 hex digest of the file content.
+        """
+        hash_path = path + ".sha256"
+        if os.path.exists(hash_path) and os.path.getmtime(
+            hash_path
+        ) >= os.path.getmtime(path):
+            with open(hash_path) as f:
+                return f.read().strip()
+
+        digest = hash_file(path)
+        with open(hash_path, "w") as f:
+            f.write(digest)
+        return digest
@@ -0,0 +1,218 @@
+"""
+instrumentation module contains the per-stage instrumentation of the House Pricing
+Predictor project.
+
+The `instrument` decorator records the wall time, CPU time, peak resident memory and row
+count of every call of a pipeline stage. The measures stay meaningful when stages run
+concurrently in threads. It emits them as a structured log record and,
+when an MLflow run is active, as metrics of that run.
+
+"""
+
+import functools
+import logging
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STAGE_METRICS = ("wall_s", "cpu_s", "max_rss_mb", "rss_delta_mb", "rows")
+
+
+def max_rss_mb():
+    """
+    Returns the peak resident memory of the process so far, in MiB.
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return max_rss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+_PAGE_SIZE = resource.getpagesize()
+_SAMPLE_INTERVAL = 0.01
+_open_peaks = {}
+_open_peaks_lock = threading.Lock()
+_sampler = None
+
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1 << 20)
+    except (OSError, IndexError, ValueError):
+        # Without /proc, fall back on the peak of the process so far.
+        return max_rss_mb()
+
+
+def _raise_open_peaks():
+    # Called with the lock held.
+    rss = _current_rss_mb()
+    for key in _open_peaks:
+        _open_peaks[key] = max(_open_peaks[key], rss)
+    return rss
+
+
+def _sample_rss():
+    global _sampler
+    while True:
+        time.sleep(_SAMPLE_INTERVAL)
+        with _open_peaks_lock:
+            if not _open_peaks:
+                _sampler = None
+                return
+            _raise_open_peaks()
+
+
+def running_sampler_threads():
+    """
+    Returns the number of running RSS sampler threads of `PeakRss`, 0 or 1.
+
+    The sampler holds no lock a forked child could need, so it does not make forking
+    unsafe.
+    """
+    return int(_sampler is not None and _sampler.is_alive())
+
+
+class PeakRss:
+    """
+    Measures the peak resident memory of the process while a block runs, in MiB.
+
+    While any block is open, a sampler thread reads the resident memory every 10 ms,
+    as does every block when it starts and ends, and raises the peak of every open
+    block. Nothing process-wide is reset, so blocks
+    of concurrent threads do not disturb each other, but their allocations count in
+    each other's peaks. `mb` is the peak and `delta_mb` its growth over the resident
+    memory when the block started. Without `/proc`, `mb` is the peak of the process so
+    far.
+    """
+
+    def __enter__(self):
+        global _sampler
+        with _open_peaks_lock:
+            self.start_mb = _raise_open_peaks()
+            _open_peaks[id(self)] = self.start_mb
+            if _sampler is None:
+                _sampler = threading.Thread(
+                    target=_sample_rss, name="rss-sampler", daemon=True
+                )
+                _sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        with _open_peaks_lock:
+            self.mb = max(_open_peaks.pop(id(self)), _raise_open_peaks())
+        self.delta_mb = self.mb - self.start_mb
+
+
+def count_rows(args, result):
+    """
+    Returns the number of rows of the first tabular argument, or of the result.
+
+    Parameters
+    ----------
+    args : tuple
+        The positional arguments of the stage.
+
+    result : object
+        The return value of the stage.
+
+    Returns
+    -------
+    int or None
+        The number of rows, or None if neither holds a table.
+    """
+    tabular = (pd.DataFrame, pd.Series, np.ndarray)
+    candidates = list(args) + [result]
+    if isinstance(result, tuple):
+        candidates += list(result)
+    for candidate in candidates:
+        if isinstance(candidate, tabular) and candidate.ndim:
+            return len(candidate)
+    return None
+
+
+def _log_to_mlflow(stage, metrics):
+    # Only log when the caller already uses MLflow, without importing it here.
+    mlflow = sys.modules.get("mlflow")
+    if mlflow is None or mlflow.active_run() is None:
+        return
+    tracking = sys.modules.get("house_pricing_predictor_YUKTHAMAJELLA.tracking")
+    run_logger = (
+        tracking and tracking.get_run_logger(mlflow.active_run().info.run_id)
+    ) or mlflow
+    try:
+        run_logger.log_metrics(
+            {
+                f"{stage}_{name}": value
+                for name, value in metrics.items()
+                if name in STAGE_METRICS and value is not None
+            }
+        )
+    except Exception as e:
+        logger.warning(f"Error while logging the metrics of {stage} to MLflow: {e}")
+
+
+def instrument(func=None, *, stage=None, rows=count_rows):
+    """
+    Decorates a pipeline stage to record its timing, memory and row count.
+
+    The CPU time is the one of the calling thread, so stages running concurrently in
+    threads do not count each other's; work handed to other threads or processes is
+    not included. The peak resident memory and its growth are the ones reached during
+    the call, see `PeakRss`. Every call emits an INFO record of this module's logger,
+    with the measures under the `stage_metrics` attribute of the record, and logs them
+    as `<stage>_wall_s`, `<stage>_cpu_s`, `<stage>_max_rss_mb`, `<stage>_rss_delta_mb`
+    and `<stage>_rows` metrics of the active MLflow run, if any. The metrics go through
+    the open `tracking.AsyncRunLogger` of the run when there is one.
+
+    Parameters
+    ----------
+    func : callable, optional
+        The decorated function, when the decorator is used without arguments.
+
+    stage : str, optional
+        The stage name. Default is the function name.
+
+    rows : callable, optional
+        Called with the positional arguments and the return value to count the rows
+        processed. Default is `count_rows`.
+
+    Returns
+    -------
+    callable
+        The decorated function, or a decorator if `func` is None.
+    """
+    if func is None:
+        return functools.partial(instrument, stage=stage, rows=rows)
+    stage = stage or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        with PeakRss() as peak_rss:
+            result = func(*args, **kwargs)
+        metrics = {
+            "stage": stage,
+            "wall_s": time.perf_counter() - start_wall,
+            "cpu_s": time.thread_time() - start_cpu,
+            "max_rss_mb": peak_rss.mb,
+            "rss_delta_mb": peak_rss.delta_mb,
+            "rows": rows(args, result),
+        }
+        logger.info(
+            f"Stage {stage} took {metrics['wall_s']:.3f}s wall, "
+            f"{metrics['cpu_s']:.3f}s cpu, {metrics['rows']} rows, "
+            f"{metrics['max_rss_mb']:.1f} MiB peak RSS "
+            f"(+{metrics['rss_delta_mb']:.1f} MiB).",
+            extra={"stage_metrics": metrics},
+        )
+        _log_to_mlflow(stage, metrics)
+        return result
+
+    return wrapper
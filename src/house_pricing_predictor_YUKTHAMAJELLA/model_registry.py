@@ -0,0 +1,277 @@
+"""
+model_registry module contains the process-wide cache of loaded models of the House
+Pricing Predictor project.
+
+Models are kept in memory under a key made of their MLflow run ID and artifact path, or
+of their file path, modification time and size, so a model is deserialized once per
+version. The cache evicts the least recently used models beyond a memory budget. MLflow
+artifacts are mirrored to a local directory, so they are downloaded once per machine.
+
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import (
+    COMPACT_MODEL_NAME,
+    load_model,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 << 30
+DEFAULT_MIRROR_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "house_pricing_predictor", "mlflow_artifacts"
+)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def _disk_size(path):
+    """
+    Returns the size in bytes of a file or of all files under a directory.
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class ModelCache:
+    """
+    An in-memory LRU cache of loaded models with a memory budget.
+
+    The memory of a model is estimated by the size of its serialized form on disk.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The memory budget of the cached models. A model larger than the budget is
+        loaded but not cached. Default is 2 GiB.
+
+    mirror_dir : str, optional
+        The directory mirroring the downloaded MLflow artifacts. Default is
+        `~/.cache/house_pricing_predictor/mlflow_artifacts`.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, mirror_dir=None):
+        self.max_bytes = max_bytes
+        self.mirror_dir = mirror_dir or DEFAULT_MIRROR_DIR
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, load, n_bytes):
+        """
+        Returns the cached model of a key, loading it on a miss.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the model version.
+
+        load : callable
+            Called without arguments to load the model on a miss.
+
+        n_bytes : int or callable
+            The estimated memory of the model, or a callable computing it after the
+            load.
+
+        Returns
+        -------
+        object
+            The model.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Concurrent requests for the same key wait for a single load.
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+            model = load()
+            size = n_bytes() if callable(n_bytes) else n_bytes
+            with self._lock:
+                self.misses += 1
+                self._key_locks.pop(key, None)
+                if size > self.max_bytes:
+                    logger.warning(
+                        f"Model {key} needs {size} bytes, more than the cache budget "
+                        f"of {self.max_bytes} bytes; it is not cached."
+                    )
+                    return model
+                self._entries[key] = (model, size)
+                self.n_bytes += size
+                self._evict()
+            return model
+
+    def _evict(self):
+        while self.n_bytes > self.max_bytes and len(self._entries) > 1:
+            key, (_, size) = self._entries.popitem(last=False)
+            self.n_bytes -= size
+            self.evictions += 1
+            logger.debug(f"Evicted model {key} from the model cache.")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+    def load_path(self, model_path, compact=False):
+        """
+        Returns the final model of a model directory, loading it once per version.
+
+        Parameters
+        ----------
+        model_path : str
+            The directory holding `final_model.pkl` and, optionally,
+            `final_model.cforest`.
+
+        compact : bool, optional
+            If True, the compact forest is loaded when it exists. Default is False.
+
+        Returns
+        -------
+        object
+            The model.
+        """
+        name = COMPACT_MODEL_NAME if compact else "final_model.pkl"
+        file_path = os.path.realpath(os.path.join(model_path, name))
+        if not os.path.exists(file_path):
+            file_path = os.path.realpath(os.path.join(model_path, "final_model.pkl"))
+        stat = os.stat(file_path)
+        key = ("path", file_path, stat.st_mtime_ns, stat.st_size)
+        return self.get(
+            key, lambda: load_model(model_path, compact=compact), stat.st_size
+        )
+
+    def artifact_path(self, run_id, artifact_path):
+        """
+        Returns the local mirror of an MLflow run artifact, downloading it once.
+
+        Parameters
+        ----------
+        run_id : str
+            The MLflow run ID.
+
+        artifact_path : str
+            The path of the artifact in the run, e.g. 'preprocessor.pkl'.
+
+        Returns
+        -------
+        str
+            The local path of the artifact.
+        """
+        import mlflow
+
+        local_path = os.path.join(self.mirror_dir, run_id, artifact_path)
+        if os.path.exists(local_path):
+            logger.debug(f"Using the mirrored artifact {local_path}.")
+            return local_path
+
+        run_dir = os.path.join(self.mirror_dir, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=run_dir, suffix=".tmp")
+        try:
+            downloaded = mlflow.artifacts.download_artifacts(
+                run_id=run_id, artifact_path=artifact_path, dst_path=tmp_dir
+            )
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            os.replace(downloaded, local_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.info(f"Mirrored artifact {artifact_path} of run {run_id}.")
+        return local_path
+
+    def load_run(self, run_id, artifact_path="gridsearch_model"):
+        """
+        Returns a model logged to an MLflow run, loading it once per run.
+
+        Parameters
+        ----------
+        run_id : str
+            The MLflow run ID.
+
+        artifact_path : str, optional
+            The path of the logged model in the run. Default is 'gridsearch_model'.
+
+        Returns
+        -------
+        object
+            The model.
+        """
+        import mlflow
+
+        def load():
+            return mlflow.sklearn.load_model(self.artifact_path(run_id, artifact_path))
+
+        return self.get(
+            ("run", run_id, artifact_path),
+            load,
+            lambda: _disk_size(self.artifact_path(run_id, artifact_path)),
+        )
+
+
+def get_model_cache():
+    """
+    Returns the process-wide model cache, creating it on first use.
+
+    Returns
+    -------
+    ModelCache
+        The model cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ModelCache()
+        return _default_cache
+
+
+def configure_model_cache(max_bytes=DEFAULT_MAX_BYTES, mirror_dir=None):
+    """
+    Replaces the process-wide model cache.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The memory budget of the cached models. Default is 2 GiB.
+
+    mirror_dir : str, optional
+        The directory mirroring the downloaded MLflow artifacts. Default is
+        `~/.cache/house_pricing_predictor/mlflow_artifacts`.
+
+    Returns
+    -------
+    ModelCache
+        The new model cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = ModelCache(max_bytes=max_bytes, mirror_dir=mirror_dir)
+        return _default_cache
@@ -6,13 +6,40 @@ It contains functions to read the data, load the pickled models and score the da
 """
 
 import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import warnings
+from multiprocessing import resource_tracker, shared_memory
 
+import joblib
 import numpy as np
+import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import (
+    CompactForest,
+    load_compact_forest,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import (
+    DatasetWriter,
+    iter_raw_batches,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.instrumentation import (
+    instrument,
+    running_sampler_threads,
+)
+
 logger = logging.getLogger(__name__)
 
+_SHARED = {}
+
 
+@instrument
 def model_scoring(model, housing_prepared, housing_labels):
     """
     Reads the scoring data and predicts the target variable for the data by loading the
@@ -59,3 +86,393 @@ def model_scoring(model, housing_prepared, housing_labels):
     except Exception as e:
         logger.error(f"Error while scoring test data: {e}")
     return housing_predictions, mse, rmse, mae
+
+
+def predict_raw(model, preprocessor, rows):
+    """
+    Predicts the target variable for raw housing rows.
+
+    Parameters
+    ----------
+    model : object
+        The trained machine learning model to be used for making predictions.
+
+    preprocessor : HousingPreprocessor
+        The fitted preprocessor persisted next to the model.
+
+    rows : pandas.DataFrame or list of dict
+        The raw housing rows, with the columns of `housing.csv`.
+
+    Returns
+    -------
+    numpy.ndarray
+        The predicted target values for the rows.
+    """
+    X = preprocessor.transform(rows)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict(X)
+
+
+def _add_exact(partials, x):
+    """
+    Adds `x` to a list of non-overlapping partial sums without rounding error.
+    """
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+
+
+class RunningErrorMetrics:
+    """
+    Accumulates the squared and absolute errors of streamed batches as exact running
+    sums, so the MSE, RMSE and MAE equal the correctly rounded full-data values without
+    holding all predictions at once.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._squared = []
+        self._absolute = []
+
+    def update(self, y_true, y_pred):
+        """
+        Adds the errors of one batch.
+
+        Parameters
+        ----------
+        y_true : array-like
+            The true target values of the batch.
+
+        y_pred : array-like
+            The predicted target values of the batch.
+        """
+        errors = np.asarray(y_true, dtype=np.float64) - np.asarray(
+            y_pred, dtype=np.float64
+        )
+        self.n += len(errors)
+        _add_exact(self._squared, math.fsum(errors * errors))
+        _add_exact(self._absolute, math.fsum(np.abs(errors)))
+
+    def result(self):
+        """
+        Returns the metrics over all batches seen so far.
+
+        Returns
+        -------
+        mse : float
+            The Mean Squared Error (MSE).
+
+        rmse : float
+            The Root Mean Squared Error (RMSE).
+
+        mae : float
+            The Mean Absolute Error (MAE).
+        """
+        mse = math.fsum(self._squared) / self.n
+        return mse, np.sqrt(mse), math.fsum(self._absolute) / self.n
+
+
+@instrument
+def batch_model_scoring(
+    model,
+    preprocessor,
+    input_path,
+    output_path,
+    batch_size=100_000,
+    label_column="median_house_value",
+    n_jobs=1,
+):
+    """
+    Scores raw housing rows streamed from a csv or Parquet file in fixed-size batches
+    and writes the predictions incrementally.
+
+    Parameters
+    ----------
+    model : object
+        The trained machine learning model to be used for making predictions.
+
+    preprocessor : HousingPreprocessor
+        The fitted preprocessor persisted next to the model.
+
+    input_path : str
+        The path of the raw rows, ending in '.csv' or '.parquet'.
+
+    output_path : str
+        The path of the predictions, ending in '.csv' or '.parquet'. It has a
+        'prediction' column, and the `label_column` if the input has labels.
+
+    batch_size : int, optional
+        The maximum number of rows held in memory at once. Default is 100000.
+
+    label_column : str, optional
+        The column of the true target values. If it is absent from the input, no
+        metrics are computed. Default is 'median_house_value'.
+
+    n_jobs : int, optional
+        The number of worker processes predicting each batch, or -1 for all cores.
+        Default is 1.
+
+    Returns
+    -------
+    n_rows : int
+        The number of scored rows.
+
+    metrics : tuple of float or None
+        The MSE, RMSE and MAE over all rows, or None if the input has no labels.
+    """
+    metrics = RunningErrorMetrics()
+    try:
+        logger.info(f"Scoring {input_path} in batches of {batch_size} rows...")
+        with DatasetWriter(output_path) as writer, ParallelPredictor(
+            model, n_jobs
+        ) as predictor:
+            for batch in iter_raw_batches(input_path, batch_size):
+                predictions = predictor.predict(preprocessor.transform(batch))
+                output = pd.DataFrame({"prediction": predictions})
+                if label_column in batch.columns:
+                    labels = batch[label_column].to_numpy()
+                    metrics.update(labels, predictions)
+                    output[label_column] = labels
+                writer.write(output)
+        logger.debug(f"Scored {writer.n_rows} rows successfully.")
+    except Exception as e:
+        logger.error(f"Error while batch scoring: {e}")
+        raise
+    return writer.n_rows, metrics.result() if metrics.n else None
+
+
+def _load_shared_model(token, model):
+    """
+    Attaches a worker process to the model shared by its parent.
+
+    A `CompactForest` arrives as its file path and maps it, any other model is loaded
+    from the path of its joblib dump.
+    """
+    if isinstance(model, str):
+        model = joblib.load(model, mmap_mode="r")
+    _SHARED[token] = model
+
+
+def _predict_partition(args):
+    """
+    Predicts one row range of the input held in shared memory.
+    """
+    token, name, shape, dtype, start, stop = args
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        X = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message="X does not have valid feature names"
+            )
+            predictions = _SHARED[token].predict(X[start:stop])
+        del X
+    finally:
+        block.close()
+    return predictions
+
+
+class ParallelPredictor:
+    """
+    Partitions prediction inputs across a pool of worker processes that share one copy
+    of the model.
+
+    With the 'fork' start method, the workers inherit the parent's model pages
+    copy-on-write, so the forest's node arrays are never pickled or copied. With other
+    start methods, a forest or tree is exported once to a temporary compact forest
+    file that every worker memory-maps, so the node arrays are shared through the page
+    cache. Its predictions match the model's within float32 tolerance. Other models are
+    dumped with joblib and each worker loads its own copy. Each input is placed in a
+    shared memory block that the workers read without copying.
+
+    Every predictor keeps its model under its own token, so several predictors can be
+    open at once.
+
+    Parameters
+    ----------
+    model : object
+        The trained machine learning model to be used for making predictions.
+
+    n_jobs : int, optional
+        The number of worker processes, or -1 for all cores. With 1, predictions run
+        in the calling process. Default is -1.
+
+    start_method : str, optional
+        The multiprocessing start method. Default is None, i.e. 'fork' where available
+        and no other thread is running, else 'forkserver' or 'spawn'.
+    """
+
+    def __init__(self, model, n_jobs=-1, start_method=None):
+        self.model = model
+        self.n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        self.start_method = start_method
+        self._token = uuid.uuid4().hex
+        self._pool = None
+        self._tmp_dir = None
+
+    def _resolve_start_method(self):
+        if self.start_method is not None:
+            return self.start_method
+        methods = multiprocessing.get_all_start_methods()
+        # A fork copies the locks held by other threads, e.g. the tracking uploads,
+        # and the workers can deadlock on them.
+        other_threads = threading.active_count() - 1 - running_sampler_threads()
+        if "fork" in methods and other_threads == 0:
+            return "fork"
+        return "forkserver" if "forkserver" in methods else "spawn"
+
+    def __enter__(self):
+        if self.n_jobs <= 1:
+            return self
+        start_method = self._resolve_start_method()
+        logger.debug(f"Starting {self.n_jobs} workers with the {start_method} method.")
+        context = multiprocessing.get_context(start_method)
+        # Workers must share the parent's tracker, or they unlink its input blocks.
+        resource_tracker.ensure_running()
+        if start_method == "fork":
+            _SHARED[self._token] = self.model
+            self._pool = context.Pool(self.n_jobs)
+        else:
+            self._tmp_dir = tempfile.mkdtemp()
+            self._pool = context.Pool(
+                self.n_jobs,
+                initializer=_load_shared_model,
+                initargs=(self._token, self._share_model(self._tmp_dir)),
+            )
+        return self
+
+    def _share_model(self, tmp_dir):
+        """
+        Stores the model in `tmp_dir` for the workers to load.
+
+        Returns
+        -------
+        CompactForest or str
+            The memory-mapped compact forest, which is pickled as its path, or the path
+            of the joblib dump of a model that cannot be compacted.
+        """
+        if isinstance(self.model, CompactForest) and self.model.path is not None:
+            return self.model
+        try:
+            forest = (
+                self.model
+                if isinstance(self.model, CompactForest)
+                else CompactForest.from_estimator(self.model)
+            )
+        except ValueError:
+            model_path = os.path.join(tmp_dir, "model.joblib")
+            joblib.dump(self.model, model_path)
+            return model_path
+        return load_compact_forest(forest.save(os.path.join(tmp_dir, "model.cforest")))
+
+    def predict(self, X):
+        """
+        Predicts the target variable, splitting the rows across the workers.
+
+        Parameters
+        ----------
+        X : numpy.ndarray or pandas.DataFrame
+            The prepared input features.
+
+        Returns
+        -------
+        numpy.ndarray
+            The predicted target values, in input order.
+        """
+        if self._pool is None:
+            with warnings.catch_warnings():
+                warnings.filterwarnings(
+                    "ignore", message="X does not have valid feature names"
+                )
+                return self.model.predict(X)
+
+        X = np.asarray(X, dtype=np.float64)
+        block = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        try:
+            shared = np.ndarray(X.shape, dtype=X.dtype, buffer=block.buf)
+            shared[:] = X
+            del shared
+            bounds = np.linspace(0, len(X), self.n_jobs + 1).astype(int)
+            partitions = [
+                (self._token, block.name, X.shape, X.dtype.str, start, stop)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+                if stop > start
+            ]
+            predictions = self._pool.map(_predict_partition, partitions)
+        finally:
+            block.close()
+            block.unlink()
+        return np.concatenate(predictions) if predictions else np.empty(0)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        _SHARED.pop(self._token, None)
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@instrument
+def parallel_model_scoring(model, housing_prepared, housing_labels, n_jobs=-1):
+    """
+    Predicts the target variable with a pool of worker processes sharing the model and
+    scores the predictions.
+
+    Parameters
+    ----------
+    model : object
+        The trained machine learning model to be used for making predictions.
+
+    housing_prepared : pandas.DataFrame
+        The input features of the housing data that have been preprocessed and are ready
+        for prediction.
+
+    housing_labels : pandas.Series
+        The true target values of the `housing_prepared` data.
+
+    n_jobs : int, optional
+        The number of worker processes, or -1 for all cores. Default is -1.
+
+    Returns
+    -------
+    housing_predictions : numpy.ndarray
+        The predicted target values for the input data, produced by the model.
+
+    mse : float
+        The Mean Squared Error (MSE) between the predicted and actual values.
+
+    rmse : float
+        The Root Mean Squared Error (RMSE), which is the square root of MSE.
+
+    mae : float
+        The Mean Absolute Error (MAE) between the predicted and actual values.
+    """
+    try:
+        logger.info(f"Predicting for test data with {n_jobs} workers...")
+        with ParallelPredictor(model, n_jobs) as predictor:
+            housing_predictions = predictor.predict(housing_prepared)
+        mse = mean_squared_error(housing_labels, housing_predictions)
+        rmse = np.sqrt(mse)
+        mae = mean_absolute_error(housing_labels, housing_predictions)
+        print("MSE:", mse)
+        print("RMSE:", rmse)
+        print("MAE:", mae)
+        logger.debug("Model scored for test data successfully.")
+    except Exception as e:
+        logger.error(f"Error while scoring test data: {e}")
+    return housing_predictions, mse, rmse, mae
@@ -10,14 +10,47 @@ pickled object.
 import logging
 
 import numpy as np
-from scipy.stats import randint
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+from joblib import parallel_backend
+from scipy.stats import loguniform, randint
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    HalvingRandomSearchCV,
+    RandomizedSearchCV,
+)
+from sklearn.pipeline import make_pipeline
 from sklearn.tree import DecisionTreeRegressor
 
+from house_pricing_predictor_YUKTHAMAJELLA.cross_validation import (
+    FoldCache,
+    FoldSearchCV,
+    OOBForestSearchCV,
+    WarmStartForestSearchCV,
+    evaluate_on_folds,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import stratified_subsample
+from house_pricing_predictor_YUKTHAMAJELLA.histogram_boosting import FeatureBinner
+from house_pricing_predictor_YUKTHAMAJELLA.incremental_linear import (
+    SufficientStatsLinearRegression,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.instrumentation import instrument
+
 logger = logging.getLogger(__name__)
 
+EXECUTION_BACKENDS = {"processes": "loky", "threads": "threading"}
+SEARCH_MODES = ("exhaustive", "halving", "shared", "warm_start", "oob")
+_FOLD_SEARCHES = {
+    "shared": FoldSearchCV,
+    "warm_start": WarmStartForestSearchCV,
+    "oob": OOBForestSearchCV,
+}
+HALVING_RESOURCES = ("n_samples", "n_estimators")
+MODEL_FAMILIES = ("random_forest", "hist_gradient_boosting")
+HGB_MAX_BINS = 255
+
 
 def cv_results(model):
     """
@@ -40,10 +73,487 @@ def cv_results(model):
         print(np.sqrt(-mean_score), params)
 
 
-def model_training(housing_prepared, housing_labels):
+def _max_resource(values):
+    """
+    Returns the largest value of a parameter list or integer distribution.
+    """
+    if hasattr(values, "support"):
+        return int(values.support()[1])
+    return max(values)
+
+
+def make_search(
+    estimator,
+    params,
+    randomized=False,
+    search="exhaustive",
+    halving_resource="n_samples",
+    factor=3,
+    **kwargs,
+):
+    """
+    Builds the hyperparameter search of an estimator.
+
+    The 'shared' mode evaluates every candidate on the materialized folds passed as
+    `cv`, see `cross_validation.FoldSearchCV`. The 'warm_start' mode does the same for
+    forests, but grows one forest per fold and per value of the other parameters and
+    scores it at every `n_estimators`, see `cross_validation.WarmStartForestSearchCV`.
+    The 'oob' mode scores bootstrapped forests by their out-of-bag error from a single
+    fit on the whole data and the others on the folds, see
+    `cross_validation.OOBForestSearchCV`.
+
+    The 'halving' mode runs successive halving: every candidate is first evaluated
+    with a small budget and only the best `1 / factor` of them move on to the next
+    round with `factor` times the budget. The budget is the number of training
+    samples or, for forests, the number of trees, in which case `n_estimators` is
+    removed from the searched parameters and its largest value becomes the maximum
+    budget.
+
+    Parameters
+    ----------
+    estimator : sklearn.base.BaseEstimator
+        The estimator to tune.
+
+    params : dict or list of dict
+        The parameter grid, or the parameter distributions if `randomized`.
+
+    randomized : bool, optional
+        If True, candidates are sampled from `params`. Default is False.
+
+    search : str, optional
+        One of 'exhaustive', 'halving', 'shared', 'warm_start' or 'oob'. Default is
+        'exhaustive'.
+
+    halving_resource : str, optional
+        The budget of the halving rounds, one of 'n_samples' or 'n_estimators'.
+        Default is 'n_samples'.
+
+    factor : int, optional
+        The elimination factor of the halving rounds. Default is 3.
+
+    **kwargs
+        The other parameters of the search, e.g. `cv`, `scoring` or `n_jobs`.
+        `n_iter` is the number of sampled candidates of a randomized search.
+
+    Returns
+    -------
+    sklearn.model_selection.BaseSearchCV
+        The unfitted search.
+    """
+    if search not in SEARCH_MODES:
+        raise ValueError(f"Unknown search {search!r}, expected one of {SEARCH_MODES}.")
+    if halving_resource not in HALVING_RESOURCES:
+        raise ValueError(
+            f"Unknown halving resource {halving_resource!r}, expected one of "
+            f"{HALVING_RESOURCES}."
+        )
+
+    if search in _FOLD_SEARCHES:
+        search_cls = _FOLD_SEARCHES[search]
+        if randomized:
+            return search_cls(estimator, param_distributions=params, **kwargs)
+        kwargs.pop("n_iter", None)
+        kwargs.pop("random_state", None)
+        return search_cls(estimator, param_grid=params, **kwargs)
+
+    if search == "exhaustive":
+        if randomized:
+            return RandomizedSearchCV(estimator, param_distributions=params, **kwargs)
+        kwargs.pop("n_iter", None)
+        kwargs.pop("random_state", None)
+        return GridSearchCV(estimator, params, **kwargs)
+
+    n_candidates = kwargs.pop("n_iter", 10)
+    kwargs.setdefault("random_state", 42)
+    kwargs.setdefault("min_resources", "exhaust")
+    if halving_resource == "n_estimators":
+        grids = params if isinstance(params, list) else [params]
+        max_resources = max(_max_resource(grid["n_estimators"]) for grid in grids)
+        grids = [
+            {name: values for name, values in grid.items() if name != "n_estimators"}
+            for grid in grids
+        ]
+        params = grids if isinstance(params, list) else grids[0]
+        kwargs["max_resources"] = max_resources
+    if randomized:
+        return HalvingRandomSearchCV(
+            estimator,
+            param_distributions=params,
+            n_candidates=n_candidates,
+            resource=halving_resource,
+            factor=factor,
+            **kwargs,
+        )
+    return HalvingGridSearchCV(
+        estimator, params, resource=halving_resource, factor=factor, **kwargs
+    )
+
+
+def check_backend(backend):
+    """
+    Raises a ValueError for an unknown execution backend.
+    """
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(
+            f"Unknown backend {backend!r}, expected one of {list(EXECUTION_BACKENDS)}."
+        )
+
+
+def check_model_family(model_family, search="exhaustive", halving_resource="n_samples"):
+    """
+    Raises a ValueError for an unknown model family or one the search mode does not
+    support.
+    """
+    if model_family not in MODEL_FAMILIES:
+        raise ValueError(
+            f"Unknown model family {model_family!r}, expected one of {MODEL_FAMILIES}."
+        )
+    if model_family == "hist_gradient_boosting" and (
+        search in ("warm_start", "oob") or halving_resource == "n_estimators"
+    ):
+        raise ValueError(
+            "hist_gradient_boosting does not support the 'warm_start' and 'oob' "
+            "searches nor the 'n_estimators' halving resource."
+        )
+
+
+def search_space(model_family, randomized=False, forest_n_jobs=None):
+    """
+    Returns the estimator and the searched hyperparameters of a model family.
+
+    Parameters
+    ----------
+    model_family : str
+        'random_forest' or 'hist_gradient_boosting'.
+
+    randomized : bool, optional
+        If True, the parameter distributions of the randomized search are returned,
+        else the parameter grid. Default is False.
+
+    forest_n_jobs : int, optional
+        The number of workers building the trees of each forest. Default is None.
+
+    Returns
+    -------
+    estimator : sklearn.base.BaseEstimator
+        The unfitted estimator.
+
+    params : dict or list of dict
+        The parameter distributions or grid.
+    """
+    if model_family == "hist_gradient_boosting":
+        estimator = HistGradientBoostingRegressor(
+            max_bins=HGB_MAX_BINS, random_state=42, early_stopping=False
+        )
+        if randomized:
+            return estimator, {
+                "max_iter": randint(low=50, high=300),
+                "learning_rate": loguniform(0.02, 0.3),
+                "max_leaf_nodes": randint(low=15, high=64),
+            }
+        return estimator, [
+            {
+                "max_iter": [100, 300],
+                "learning_rate": [0.05, 0.1],
+                "max_leaf_nodes": [15, 31, 63],
+            }
+        ]
+
+    estimator = RandomForestRegressor(random_state=42, n_jobs=forest_n_jobs)
+    if randomized:
+        return estimator, {
+            "n_estimators": randint(low=1, high=200),
+            "max_features": randint(low=1, high=8),
+        }
+    return estimator, [
+        {"n_estimators": [3, 10, 30], "max_features": [2, 4, 6, 8]},
+        {"bootstrap": [False], "n_estimators": [3, 10], "max_features": [2, 3, 4]},
+    ]
+
+
+def _bin_features(housing_prepared, housing_labels, cv):
+    """
+    Bins the training features once, and the materialized folds if any.
+
+    The codes take at most `HGB_MAX_BINS` values besides NaN, so the binning of the
+    boosted trees keeps one bin per code and its own bin for missing values.
+
+    Returns
+    -------
+    tuple
+        The fitted FeatureBinner, the float32 codes and the folds of the codes.
+    """
+    binner = FeatureBinner(max_bins=HGB_MAX_BINS).fit(housing_prepared)
+    codes = binner.transform(housing_prepared)
+    if isinstance(cv, FoldCache):
+        cv = FoldCache(codes, housing_labels, n_splits=cv.n_splits, dtype=np.float32)
+    return binner, codes, cv
+
+
+def _search_data(
+    housing_prepared, housing_labels, cv, search, subsample, model_family
+):
+    """
+    Returns the data a search runs on: a stratified subsample if `subsample` is given,
+    binned into codes for the histogram gradient boosting family, and its folds.
+
+    Returns
+    -------
+    tuple
+        The fitted FeatureBinner or None, the search features, labels and folds, and
+        the full features and labels if they were subsampled, else None.
+    """
+    full_data = None
+    if subsample is not None:
+        X, y = stratified_subsample(housing_prepared, housing_labels, subsample)
+        if len(X) < len(housing_prepared):
+            full_data = (housing_prepared, housing_labels)
+            housing_prepared, housing_labels = X, y
+            logger.info(f"Searching on a subsample of {len(X)} rows.")
+        if isinstance(cv, FoldCache) and len(cv.X) != len(housing_prepared):
+            cv = make_cv(housing_prepared, housing_labels, search=search)
+    binner = None
+    if model_family == "hist_gradient_boosting":
+        binner, housing_prepared, cv = _bin_features(
+            housing_prepared, housing_labels, cv
+        )
+    return binner, housing_prepared, housing_labels, cv, full_data
+
+
+def _fit_search(search, X, y, backend, binner=None, full_data=None):
+    """
+    Fits a search on the search data of `_search_data`.
+
+    With a binner, the best estimator is preceded by the binner to predict from the
+    features. With `full_data`, the features and labels the search data was sampled
+    from, the best candidate is refitted on them.
+    """
+    with parallel_backend(EXECUTION_BACKENDS[backend]):
+        search.fit(X, y)
+        if full_data is not None:
+            housing_prepared, housing_labels = full_data
+            if binner is not None:
+                housing_prepared = binner.transform(housing_prepared)
+            logger.info(
+                f"Refitting {search.best_params_} on all {len(housing_labels)} rows."
+            )
+            search.best_estimator_ = clone(search.best_estimator_).fit(
+                housing_prepared, housing_labels
+            )
+    if binner is not None:
+        search.best_estimator_ = make_pipeline(binner, search.best_estimator_)
+    return search
+
+
+def make_cv(housing_prepared, housing_labels, search="exhaustive"):
+    """
+    Returns the cross-validation folds used by a search mode.
+
+    Parameters
+    ----------
+    housing_prepared : pandas.DataFrame
+        The preprocessed training data.
+
+    housing_labels : pandas.Series
+        The target labels.
+
+    search : str, optional
+        The hyperparameter search mode. Default is 'exhaustive'.
+
+    Returns
+    -------
+    FoldCache or int
+        The folds materialized once for the fold-based modes, or 5 for the other
+        modes to let scikit-learn split every fit.
+    """
+    if search in _FOLD_SEARCHES:
+        return FoldCache(housing_prepared, housing_labels, n_splits=5)
+    return 5
+
+
+@instrument
+def train_baselines(housing_prepared, housing_labels, cv=5, n_jobs=None):
+    """
+    Trains the linear regression and decision tree baselines.
+
+    The linear regression is solved from the XᵀX and Xᵀy statistics of the rows, see
+    `incremental_linear.SufficientStatsLinearRegression`, so it can be updated with
+    new rows by `partial_fit` without the old ones.
+
+    Parameters
+    ----------
+    housing_prepared : pandas.DataFrame
+        The preprocessed training data.
+
+    housing_labels : pandas.Series
+        The target labels.
+
+    cv : FoldCache or int, optional
+        The folds of `make_cv`. When they are materialized, the CV RMSE of the
+        baselines is logged. Default is 5.
+
+    n_jobs : int, optional
+        The number of workers scoring the folds. Default is None, i.e. one worker.
+
+    Returns
+    -------
+    tuple
+        The fitted SufficientStatsLinearRegression and DecisionTreeRegressor models.
+    """
+    lin_reg = SufficientStatsLinearRegression()
+    tree_reg = DecisionTreeRegressor(random_state=42)
+
+    if isinstance(cv, FoldCache):
+        for name, baseline in [("LinearRegression", lin_reg), ("Tree", tree_reg)]:
+            scores = evaluate_on_folds(baseline, cv, n_jobs=n_jobs)
+            logger.info(f"{name} CV RMSE: {np.sqrt(-scores).mean():.2f}")
+
+    lin_reg.fit(housing_prepared, housing_labels)
+    tree_reg.fit(housing_prepared, housing_labels)
+    return lin_reg, tree_reg
+
+
+@instrument
+def fit_random_search(
+    housing_prepared,
+    housing_labels,
+    cv=5,
+    n_jobs=None,
+    forest_n_jobs=None,
+    backend="processes",
+    search="exhaustive",
+    halving_resource="n_samples",
+    model_family="random_forest",
+    subsample=None,
+):
+    """
+    Fits the randomized search over the hyperparameters of a model family.
+
+    Parameters
+    ----------
+    housing_prepared : pandas.DataFrame
+        The preprocessed training data.
+
+    housing_labels : pandas.Series
+        The target labels.
+
+    cv : FoldCache or int, optional
+        The folds of `make_cv`. Default is 5.
+
+    n_jobs, forest_n_jobs, backend, search, halving_resource, model_family, subsample
+        The execution and search parameters, see `model_training`.
+
+    Returns
+    -------
+    sklearn.model_selection.RandomizedSearchCV or equivalent
+        The fitted search.
+    """
+    check_backend(backend)
+    check_model_family(model_family, search, halving_resource)
+    binner, X, y, cv, full_data = _search_data(
+        housing_prepared, housing_labels, cv, search, subsample, model_family
+    )
+    estimator, param_distribs = search_space(
+        model_family, randomized=True, forest_n_jobs=forest_n_jobs
+    )
+    rnd_search = make_search(
+        estimator,
+        param_distribs,
+        randomized=True,
+        search=search,
+        halving_resource=halving_resource,
+        n_iter=10,
+        cv=cv,
+        scoring="neg_mean_squared_error",
+        random_state=42,
+        n_jobs=n_jobs,
+    )
+    _fit_search(rnd_search, X, y, backend, binner, full_data)
+    cv_results(rnd_search)
+    return rnd_search
+
+
+@instrument
+def fit_grid_search(
+    housing_prepared,
+    housing_labels,
+    cv=5,
+    n_jobs=None,
+    forest_n_jobs=None,
+    backend="processes",
+    search="exhaustive",
+    halving_resource="n_samples",
+    model_family="random_forest",
+    subsample=None,
+):
+    """
+    Fits the grid search over the hyperparameters of a model family.
+
+    Parameters
+    ----------
+    housing_prepared : pandas.DataFrame
+        The preprocessed training data.
+
+    housing_labels : pandas.Series
+        The target labels.
+
+    cv : FoldCache or int, optional
+        The folds of `make_cv`. Default is 5.
+
+    n_jobs, forest_n_jobs, backend, search, halving_resource, model_family, subsample
+        The execution and search parameters, see `model_training`.
+
+    Returns
+    -------
+    sklearn.model_selection.GridSearchCV or equivalent
+        The fitted search.
+    """
+    check_backend(backend)
+    check_model_family(model_family, search, halving_resource)
+    binner, X, y, cv, full_data = _search_data(
+        housing_prepared, housing_labels, cv, search, subsample, model_family
+    )
+    estimator, param_grid = search_space(model_family, forest_n_jobs=forest_n_jobs)
+
+    grid_search = make_search(
+        estimator,
+        param_grid,
+        search=search,
+        halving_resource=halving_resource,
+        cv=cv,
+        scoring="neg_mean_squared_error",
+        return_train_score=True,
+        n_jobs=n_jobs,
+    )
+    _fit_search(grid_search, X, y, backend, binner, full_data)
+    cv_results(grid_search)
+    return grid_search
+
+
+@instrument
+def model_training(
+    housing_prepared,
+    housing_labels,
+    n_jobs=None,
+    forest_n_jobs=None,
+    backend="processes",
+    search="exhaustive",
+    halving_resource="n_samples",
+    model_family="random_forest",
+    subsample=None,
+):
     """
     Trains multiple machine learning models using the provided training data and labels.
 
+    The baselines and the two searches are trained one after the other by
+    `train_baselines`, `fit_random_search` and `fit_grid_search`, which can also run as
+    independent pipeline stages.
+
+    The cross-validation fits of the hyperparameter searches are fanned out over
+    `n_jobs` workers and the trees of every forest are built by `forest_n_jobs` workers,
+    both on the execution `backend`. Keep `n_jobs * forest_n_jobs` at most the number of
+    cores to avoid oversubscription.
+
     Parameters
     ----------
     housing_prepared : pandas.DataFrame
@@ -52,56 +562,83 @@ def model_training(housing_prepared, housing_labels):
     housing_labels : pandas.Series
         The target labels corresponding to the `housing_prepared` dataset.
 
+    n_jobs : int, optional
+        The number of workers fitting the search candidates and folds in parallel, -1
+        for all cores. Default is None, i.e. one worker.
+
+    forest_n_jobs : int, optional
+        The number of workers building the trees of each forest, -1 for all cores.
+        Default is None, i.e. one worker.
+
+    backend : str, optional
+        The execution backend, one of 'processes' or 'threads'. Default is
+        'processes'.
+
+    search : str, optional
+        The hyperparameter search mode, 'exhaustive' to fit every candidate on every
+        fold, 'halving' to drop weak candidates early with successive halving,
+        'shared' to evaluate the baselines and every candidate on folds materialized
+        once, 'warm_start' to also grow a single forest across the `n_estimators`
+        candidates or 'oob' to score bootstrapped forests out-of-bag from a single
+        fit. See `make_search`. Default is 'exhaustive'.
+
+    halving_resource : str, optional
+        The budget of the halving rounds, 'n_samples' or 'n_estimators'. Default is
+        'n_samples'.
+
+    model_family : str, optional
+        The family tuned by the searches, 'random_forest' or 'hist_gradient_boosting'.
+        The histogram gradient boosting searches run on features binned once into
+        float32 codes by a `histogram_boosting.FeatureBinner`, which precedes their
+        best estimator, so the folds are held as float32. They do not support the
+        'warm_start' and 'oob' searches nor the 'n_estimators' halving resource.
+        Default is 'random_forest'.
+
+    subsample : int or float, optional
+        If given, the searches run on a sample of the rows stratified on their
+        `income_cat`, a number of rows if an integer or else a fraction of them, and
+        only their best candidate is refitted on all rows. See
+        `cross_validation.rank_agreement` to compare the ranking of a subsampled
+        search with a full one. Default is None, i.e. all rows.
+
     Returns
     -------
     tuple
         A tuple containing the following trained models:
-        - LinearRegression model
+        - SufficientStatsLinearRegression model
         - DecisionTreeRegressor model
-        - RandomizedSearchCV (RandomForestRegressor)
-        - GridSearchCV (RandomForestRegressor)
+        - RandomizedSearchCV (of the model family)
+        - GridSearchCV (of the model family)
 
     """
+    check_backend(backend)
+    check_model_family(model_family, search, halving_resource)
     try:
-        logger.info("Training the models...")
-
-        lin_reg = LinearRegression()
-        lin_reg.fit(housing_prepared, housing_labels)
-
-        tree_reg = DecisionTreeRegressor(random_state=42)
-        tree_reg.fit(housing_prepared, housing_labels)
-
-        param_distribs = {
-            "n_estimators": randint(low=1, high=200),
-            "max_features": randint(low=1, high=8),
-        }
-        forest_reg = RandomForestRegressor(random_state=42)
-        rnd_search = RandomizedSearchCV(
-            forest_reg,
-            param_distributions=param_distribs,
-            n_iter=10,
-            cv=5,
-            scoring="neg_mean_squared_error",
-            random_state=42,
+        logger.info(
+            f"Training the models with n_jobs={n_jobs}, "
+            f"forest_n_jobs={forest_n_jobs} on {backend}, {search} search of "
+            f"{model_family}..."
         )
-        rnd_search.fit(housing_prepared, housing_labels)
-        cv_results(rnd_search)
 
-        param_grid = [
-            {"n_estimators": [3, 10, 30], "max_features": [2, 4, 6, 8]},
-            {"bootstrap": [False], "n_estimators": [3, 10], "max_features": [2, 3, 4]},
-        ]
-        forest_reg = RandomForestRegressor(random_state=42)
-
-        grid_search = GridSearchCV(
-            forest_reg,
-            param_grid,
-            cv=5,
-            scoring="neg_mean_squared_error",
-            return_train_score=True,
+        cv = make_cv(housing_prepared, housing_labels, search=search)
+        lin_reg, tree_reg = train_baselines(
+            housing_prepared, housing_labels, cv=cv, n_jobs=n_jobs
+        )
+        search_kwargs = dict(
+            # The subsampled searches build their folds on the subsample.
+            cv=cv if subsample is None else 5,
+            n_jobs=n_jobs,
+            forest_n_jobs=forest_n_jobs,
+            backend=backend,
+            search=search,
+            halving_resource=halving_resource,
+            model_family=model_family,
+            subsample=subsample,
         )
-        grid_search.fit(housing_prepared, housing_labels)
-        cv_results(grid_search)
+        rnd_search = fit_random_search(
+            housing_prepared, housing_labels, **search_kwargs
+        )
+        grid_search = fit_grid_search(housing_prepared, housing_labels, **search_kwargs)
 
         logger.debug("Model training is completed successfully.")
     except Exception as e:
@@ -109,6 +646,7 @@ def model_training(housing_prepared, housing_labels):
     return lin_reg, tree_reg, rnd_search, grid_search
 
 
+@instrument
 def get_best_model_gridsearch(grid_search, housing_prepared):
     """
     Identifies and returns the best model from the grid search based on cross-validation
@@ -131,8 +669,11 @@ def get_best_model_gridsearch(grid_search, housing_prepared):
 
     try:
         logger.info("Finging the best models...")
-        feature_importances = grid_search.best_estimator_.feature_importances_
-        sorted(zip(feature_importances, housing_prepared.columns), reverse=True)
+        feature_importances = getattr(
+            grid_search.best_estimator_, "feature_importances_", None
+        )
+        if feature_importances is not None:
+            sorted(zip(feature_importances, housing_prepared.columns), reverse=True)
         logger.debug("Best model is selected successfully.")
     except Exception as e:
         logger.error(f"Error while best model selection process: {e}")
@@ -0,0 +1,306 @@
+"""
+pipeline module contains the stage runner of the House Pricing Predictor project.
+
+A pipeline is a set of stages that declare the files they read and write. The stage
+producing a file runs before the stages reading it, independent stages run
+concurrently, and a stage whose inputs and parameters are unchanged since its last
+successful run is skipped.
+
+"""
+
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from house_pricing_predictor_YUKTHAMAJELLA.ingestion_cache import hash_file, stage_key
+
+logger = logging.getLogger(__name__)
+
+RAN = "ran"
+FRESH = "fresh"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class Stage:
+    """
+    A pipeline stage.
+
+    Parameters
+    ----------
+    name : str
+        The unique stage name.
+
+    func : callable
+        Called without arguments to produce the outputs.
+
+    inputs : list of str, optional
+        The files or directories the stage reads. Default is no inputs.
+
+    outputs : list of str, optional
+        The files or directories the stage writes. Default is no outputs.
+
+    params : dict, optional
+        The parameters the outputs depend on. A change re-runs the stage. Default is
+        no parameters.
+
+    always_run : bool, optional
+        If True, the stage is run even when it is fresh, e.g. because it reads a
+        source the fingerprint cannot see. The stages depending on it are still
+        skipped when its outputs are unchanged. Default is False.
+    """
+
+    def __init__(
+        self, name, func, inputs=(), outputs=(), params=None, always_run=False
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.always_run = always_run
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def _path_stat(path):
+    """
+    Returns the size and modification times of a file or of all files of a directory.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    return sorted(
+        [os.path.relpath(os.path.join(root, name), path)]
+        + _path_stat(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _path_hash(path):
+    """
+    Returns the content hash of a file or of all files of a directory.
+    """
+    if os.path.isfile(path):
+        return hash_file(path)
+    return stage_key(
+        "directory",
+        *[
+            f"{os.path.relpath(os.path.join(root, name), path)}:"
+            f"{hash_file(os.path.join(root, name))}"
+            for root, _, names in sorted(os.walk(path))
+            for name in sorted(names)
+        ],
+    )
+
+
+class Pipeline:
+    """
+    A graph of stages linked by the files they read and write.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        The stages. A stage depends on the stages writing its inputs.
+
+    state_dir : str
+        The directory holding the fingerprint of the last successful run of every
+        stage.
+
+    max_workers : int, optional
+        The number of stages run concurrently. Default is the number of stages.
+    """
+
+    def __init__(self, stages, state_dir, max_workers=None):
+        self.stages = {}
+        producers = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name {stage.name!r}.")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                output = os.path.abspath(output)
+                if output in producers:
+                    raise ValueError(
+                        f"{output} is written by both {producers[output]!r} and "
+                        f"{stage.name!r}."
+                    )
+                producers[output] = stage.name
+        self.dependencies = {
+            stage.name: sorted(
+                {
+                    producers[os.path.abspath(path)]
+                    for path in stage.inputs
+                    if os.path.abspath(path) in producers
+                }
+            )
+            for stage in stages
+        }
+        self.order = self._topological_order()
+        self.state_dir = state_dir
+        self.max_workers = max_workers or max(1, len(stages))
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}.")
+            state[name] = "visiting"
+            for dependency in self.dependencies[name]:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _state_path(self, name):
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def _load_state(self, name):
+        path = self._state_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def fingerprint(self, stage, state=None):
+        """
+        Computes the fingerprint of the inputs and parameters of a stage.
+
+        The content hash of an input is reused from `state` when its size and
+        modification time did not change.
+
+        Parameters
+        ----------
+        stage : Stage
+            The stage.
+
+        state : dict, optional
+            The stored state of the last successful run. Default is None.
+
+        Returns
+        -------
+        dict
+            The stage key under 'key' and the stat and hash of every input under
+            'inputs'.
+        """
+        previous = (state or {}).get("inputs", {})
+        inputs = {}
+        for path in stage.inputs:
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Input {path} of stage {stage.name} is missing."
+                )
+            stat = _path_stat(path)
+            if path in previous and previous[path]["stat"] == stat:
+                digest = previous[path]["hash"]
+            else:
+                digest = _path_hash(path)
+            inputs[path] = {"stat": stat, "hash": digest}
+        key = stage_key(
+            stage.name,
+            *[inputs[path]["hash"] for path in stage.inputs],
+            outputs=stage.outputs,
+            **stage.params,
+        )
+        return {"key": key, "inputs": inputs}
+
+    def is_fresh(self, stage, fingerprint=None):
+        """
+        Tells whether a stage can be skipped.
+
+        A stage is fresh when all its outputs exist and its fingerprint matches the
+        one of its last successful run.
+
+        Parameters
+        ----------
+        stage : Stage
+            The stage.
+
+        fingerprint : dict, optional
+            The current fingerprint of the stage. Default is computed.
+
+        Returns
+        -------
+        bool
+            True if the stage is fresh.
+        """
+        state = self._load_state(stage.name)
+        if state is None or not all(os.path.exists(path) for path in stage.outputs):
+            return False
+        fingerprint = fingerprint or self.fingerprint(stage, state)
+        return fingerprint["key"] == state["key"]
+
+    def _run_stage(self, stage, force):
+        state = self._load_state(stage.name)
+        fingerprint = self.fingerprint(stage, state)
+        if not (force or stage.always_run) and self.is_fresh(stage, fingerprint):
+            logger.info(f"Stage {stage.name} is fresh, skipping it.")
+            return FRESH
+
+        logger.info(f"Running stage {stage.name}...")
+        stage.func()
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing:
+            raise RuntimeError(f"Stage {stage.name} did not write {missing}.")
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(fingerprint, f)
+        os.replace(tmp_path, self._state_path(stage.name))
+        return RAN
+
+    def run(self, force=False):
+        """
+        Runs the stale stages, each as soon as the stages it depends on are done.
+
+        The stages depending on a failed stage are not run.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, every stage is run even if it is fresh. Default is False.
+
+        Returns
+        -------
+        dict
+            The status of every stage: 'ran', 'fresh', 'failed' or 'blocked'.
+        """
+        statuses = {}
+        running = {}
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            while len(statuses) < len(self.stages):
+                for name in self.order:
+                    if name in statuses or name in running.values():
+                        continue
+                    dependencies = [statuses.get(d) for d in self.dependencies[name]]
+                    if any(status in (FAILED, BLOCKED) for status in dependencies):
+                        logger.warning(f"Stage {name} is blocked by a failed stage.")
+                        statuses[name] = BLOCKED
+                    elif all(status in (RAN, FRESH) for status in dependencies):
+                        future = executor.submit(
+                            self._run_stage, self.stages[name], force
+                        )
+                        running[future] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        statuses[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error while running stage {name}: {e}")
+                        statuses[name] = FAILED
+        return statuses
@@ -0,0 +1,262 @@
+"""
+preprocessing module contains the fitted preprocessing transformer of the House Pricing
+Predictor project.
+
+The transformer runs the median imputation, the ratio features and a fixed-vocabulary
+one-hot encoding of `ocean_proximity` in one pass over NumPy arrays. It is persisted
+next to the model so that raw rows can be scored without pandas joins or column
+realignment.
+
+"""
+
+import logging
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+logger = logging.getLogger(__name__)
+
+OCEAN_PROXIMITY_CATEGORIES = ["<1H OCEAN", "INLAND", "ISLAND", "NEAR BAY", "NEAR OCEAN"]
+
+NUMERIC_COLUMNS = [
+    "longitude",
+    "latitude",
+    "housing_median_age",
+    "total_rooms",
+    "total_bedrooms",
+    "population",
+    "households",
+    "median_income",
+]
+
+RATIO_FEATURES = [
+    ("rooms_per_household", "total_rooms", "households"),
+    ("bedrooms_per_room", "total_bedrooms", "total_rooms"),
+    ("population_per_household", "population", "households"),
+]
+
+CATEGORY_COLUMN = "ocean_proximity"
+
+
+def _column(X, name):
+    """
+    Returns one column of raw rows given as a dataframe or a list of dicts.
+    """
+    if isinstance(X, pd.DataFrame):
+        return X[name].to_numpy()
+    return np.array([row.get(name) for row in X], dtype=object)
+
+
+def _category_codes(X, vocabulary):
+    """
+    Returns the position of the `ocean_proximity` of every row in a vocabulary, -1 for
+    categories outside of it.
+
+    The column is factorized once and only its few distinct values are looked up, which
+    avoids building a Python string per row for Arrow-backed columns.
+    """
+    if isinstance(X, pd.DataFrame):
+        values = X[CATEGORY_COLUMN]
+    else:
+        values = _column(X, CATEGORY_COLUMN)
+    codes, uniques = pd.factorize(values)
+    # Missing values get code -1, which picks the appended -1.
+    lookup = np.append(pd.Index(vocabulary).get_indexer(uniques), -1)
+    return lookup[codes]
+
+
+class HousingPreprocessor(TransformerMixin, BaseEstimator):
+    """
+    Turns raw housing rows into the model feature matrix.
+
+    Parameters
+    ----------
+    categories : list of str, optional
+        The vocabulary of `ocean_proximity`. Default is `OCEAN_PROXIMITY_CATEGORIES`.
+
+    drop_first : bool, optional
+        If True, the first category gets no one-hot column. Default is True.
+
+    dtype : numpy.dtype, optional
+        The dtype of the transformed matrix. Default is float64.
+    """
+
+    def __init__(self, categories=None, drop_first=True, dtype=np.float64):
+        self.categories = categories
+        self.drop_first = drop_first
+        self.dtype = dtype
+
+    def _numeric(self, X):
+        num = np.empty((len(X), len(NUMERIC_COLUMNS)), dtype=self.dtype)
+        for j, name in enumerate(NUMERIC_COLUMNS):
+            num[:, j] = _column(X, name)
+        return num
+
+    def _set_vocabulary(self):
+        self.categories_ = list(self.categories or OCEAN_PROXIMITY_CATEGORIES)
+        encoded = self.categories_[1:] if self.drop_first else self.categories_
+        self._codes = {category: j for j, category in enumerate(encoded)}
+        self.feature_names_out_ = np.array(
+            NUMERIC_COLUMNS
+            + [name for name, _, _ in RATIO_FEATURES]
+            + [f"{CATEGORY_COLUMN}_{category}" for category in encoded],
+            dtype=object,
+        )
+
+    def fit(self, X, y=None):
+        """
+        Learns the per-column medians of the numeric features.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or list of dict
+            The raw housing rows.
+
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        HousingPreprocessor
+            The fitted transformer.
+        """
+        self.statistics_ = np.nanmedian(self._numeric(X), axis=0)
+        self._set_vocabulary()
+        return self
+
+    @classmethod
+    def from_imputer(cls, imputer, **kwargs):
+        """
+        Builds a fitted transformer from a median imputer fitted on the numeric
+        features.
+
+        Parameters
+        ----------
+        imputer : sklearn.impute.SimpleImputer
+            The fitted imputer, with statistics in `NUMERIC_COLUMNS` order.
+
+        **kwargs
+            The parameters of the transformer.
+
+        Returns
+        -------
+        HousingPreprocessor
+            The fitted transformer.
+        """
+        names = getattr(imputer, "feature_names_in_", None)
+        if names is not None and list(names) != NUMERIC_COLUMNS:
+            raise ValueError(
+                f"The imputer was fitted on {list(names)}, expected {NUMERIC_COLUMNS}."
+            )
+        preprocessor = cls(**kwargs)
+        preprocessor.statistics_ = np.asarray(imputer.statistics_, dtype=np.float64)
+        preprocessor._set_vocabulary()
+        return preprocessor
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_out_
+
+    def transform(self, X):
+        """
+        Transforms raw housing rows into the feature matrix.
+
+        Categories outside the vocabulary get no one-hot column set.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame or list of dict
+            The raw housing rows. Extra columns are ignored.
+
+        Returns
+        -------
+        numpy.ndarray
+            The column-major feature matrix, with columns in `feature_names_out_`
+            order.
+        """
+        n_num = len(NUMERIC_COLUMNS)
+        n_ratio = len(RATIO_FEATURES)
+        # Column-major, so every feature is written as one contiguous column.
+        out = np.zeros(
+            (len(X), len(self.feature_names_out_)), dtype=self.dtype, order="F"
+        )
+
+        num = out[:, :n_num]
+        for j, name in enumerate(NUMERIC_COLUMNS):
+            column = num[:, j]
+            column[:] = _column(X, name)
+            np.copyto(column, self.statistics_[j], where=np.isnan(column))
+
+        for k, (_, numerator, denominator) in enumerate(RATIO_FEATURES):
+            np.divide(
+                num[:, NUMERIC_COLUMNS.index(numerator)],
+                num[:, NUMERIC_COLUMNS.index(denominator)],
+                out=out[:, n_num + k],
+            )
+
+        codes = _category_codes(X, list(self._codes))
+        rows = np.flatnonzero(codes >= 0)
+        out[rows, n_num + n_ratio + codes[rows]] = 1
+        return out
+
+    def transform_frame(self, X):
+        """
+        Transforms raw housing rows into a feature dataframe.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+            The raw housing rows. Extra columns are ignored.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The feature dataframe, with the index of `X`.
+        """
+        return pd.DataFrame(
+            self.transform(X),
+            columns=list(self.feature_names_out_),
+            index=X.index,
+            copy=False,
+        )
+
+
+def save_preprocessor(preprocessor, path):
+    """
+    Stores a fitted preprocessor as a pickled object.
+
+    Parameters
+    ----------
+    preprocessor : HousingPreprocessor
+        The fitted preprocessor.
+
+    path : str
+        The path of the pickle file.
+
+    Returns
+    -------
+    str
+        The path of the pickle file.
+    """
+    with open(path, "wb") as f:
+        pickle.dump(preprocessor, f)
+    return path
+
+
+def load_preprocessor(path):
+    """
+    Loads a fitted preprocessor stored with `save_preprocessor`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the pickle file.
+
+    Returns
+    -------
+    HousingPreprocessor
+        The fitted preprocessor.
+    """
+    with open(path, "rb") as f:
+        return pickle.load(f)
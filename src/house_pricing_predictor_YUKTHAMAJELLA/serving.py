@@ -0,0 +1,407 @@
+"""
+serving module contains the online prediction service of the House Pricing Predictor
+project.
+
+The trained model and its preprocessor are loaded once and kept warm. Raw housing rows
+posted as JSON by concurrent clients are gathered into micro-batches, so one `predict`
+call serves many requests. Latency percentiles and throughput are exposed as metrics.
+
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from house_pricing_predictor_YUKTHAMAJELLA.model_registry import get_model_cache
+from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import predict_raw
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import (
+    CATEGORY_COLUMN,
+    NUMERIC_COLUMNS,
+    load_preprocessor,
+)
+
+logger = logging.getLogger(__name__)
+
+ROW_KEYS = NUMERIC_COLUMNS + [CATEGORY_COLUMN]
+
+
+def validate_rows(rows):
+    """
+    Checks that a request holds raw housing rows.
+
+    Parameters
+    ----------
+    rows : object
+        The decoded `rows` of a request.
+
+    Returns
+    -------
+    list of dict
+        The rows.
+
+    Raises
+    ------
+    ValueError
+        If `rows` is not a non-empty list of dicts with all the keys of `ROW_KEYS`.
+    """
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("rows must be a non-empty list of objects.")
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {i} is not an object.")
+        missing = [key for key in ROW_KEYS if key not in row]
+        if missing:
+            raise ValueError(f"Row {i} misses {missing}.")
+    return rows
+
+
+class LatencyStats:
+    """
+    Thread-safe request counters and a window of recent request latencies.
+
+    Parameters
+    ----------
+    window : int, optional
+        The number of most recent latencies used for the percentiles. Default is
+        10000.
+    """
+
+    def __init__(self, window=10000):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    def record_request(self, latency, n_rows):
+        with self._lock:
+            self._latencies.append(latency)
+            self.requests += 1
+            self.rows += n_rows
+
+    def record_batch(self, n_rows):
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += n_rows
+
+    def snapshot(self):
+        """
+        Returns the current metrics.
+
+        Returns
+        -------
+        dict
+            The request, row and batch counts, the mean batch size, the p50/p99
+            latencies in milliseconds and the request and row throughput per second.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies)
+            uptime = time.perf_counter() - self._start
+            p50, p99 = (
+                np.percentile(latencies, [50, 99]) * 1000
+                if len(latencies)
+                else (None, None)
+            )
+            return {
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "mean_batch_size": (
+                    self.batched_rows / self.batches if self.batches else None
+                ),
+                "p50_ms": None if p50 is None else float(p50),
+                "p99_ms": None if p99 is None else float(p99),
+                "requests_per_s": self.requests / uptime,
+                "rows_per_s": self.rows / uptime,
+                "uptime_s": uptime,
+            }
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent prediction requests into batches for a single predict call.
+
+    A batch is closed once it holds `max_batch_size` rows or `max_wait_ms` has passed
+    since its first request.
+
+    Parameters
+    ----------
+    predict_fn : callable
+        Called with a list of raw rows and returning one prediction per row.
+
+    max_batch_size : int, optional
+        The maximum number of rows per batch. Default is 256.
+
+    max_wait_ms : float, optional
+        The maximum time a request waits for others to join its batch. Default is 5.
+
+    stats : LatencyStats, optional
+        The stats recording the batch sizes. Default is None.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait_ms=5, stats=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = stats
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, rows):
+        """
+        Queues raw rows for prediction.
+
+        Parameters
+        ----------
+        rows : list of dict
+            The raw housing rows.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future of the list of predictions for the rows.
+        """
+        rows = list(rows)
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def predict(self, rows, timeout=None):
+        return self.submit(rows).result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _predict(self, rows):
+        predictions = np.asarray(self.predict_fn(rows)).tolist()
+        if len(predictions) != len(rows):
+            raise ValueError(
+                f"Got {len(predictions)} predictions for {len(rows)} rows."
+            )
+        return predictions
+
+    def _run_batch(self, batch):
+        rows = [row for item_rows, _ in batch for row in item_rows]
+        try:
+            predictions = self._predict(rows)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error while predicting a request: {e}")
+                batch[0][1].set_exception(e)
+                return
+            # Predict every request on its own, so a bad one only fails itself.
+            logger.warning(f"Error while predicting a batch, splitting it: {e}")
+            for item in batch:
+                self._run_batch([item])
+            return
+        if self.stats is not None:
+            self.stats.record_batch(len(rows))
+        start = 0
+        for item_rows, future in batch:
+            future.set_result(predictions[start : start + len(item_rows)])
+            start += len(item_rows)
+
+    def _run(self):
+        while True:
+            batch = []
+            # The worker must outlive any error, or every later request would hang.
+            try:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._run_batch(batch)
+            except Exception as e:
+                logger.error(f"Error in the batching worker: {e}")
+                for _, future in batch or []:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+class PredictionService:
+    """
+    Keeps a trained model and its preprocessor warm and serves micro-batched
+    predictions for raw housing rows.
+
+    Parameters
+    ----------
+    model : object
+        The trained machine learning model.
+
+    preprocessor : HousingPreprocessor
+        The fitted preprocessor persisted next to the model.
+
+    max_batch_size : int, optional
+        The maximum number of rows per batch. Default is 256.
+
+    max_wait_ms : float, optional
+        The maximum time a request waits for others to join its batch. Default is 5.
+    """
+
+    def __init__(self, model, preprocessor, max_batch_size=256, max_wait_ms=5):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(
+            lambda rows: predict_raw(model, preprocessor, rows),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            stats=self.stats,
+        )
+
+    def predict(self, rows):
+        """
+        Predicts the target variable for raw housing rows.
+
+        Parameters
+        ----------
+        rows : list of dict
+            The raw housing rows.
+
+        Returns
+        -------
+        list of float
+            The predictions for the rows.
+        """
+        start = time.perf_counter()
+        predictions = self.batcher.predict(rows)
+        self.stats.record_request(time.perf_counter() - start, len(rows))
+        return predictions
+
+    def close(self):
+        self.batcher.close()
+
+
+def load_service(model_path, compact=False, **kwargs):
+    """
+    Loads the model and preprocessor from the model directory.
+
+    Parameters
+    ----------
+    model_path : str
+        The directory holding `final_model.pkl` and `preprocessor.pkl`.
+
+    compact : bool, optional
+        If True, the compact forest `final_model.cforest` is loaded instead of the
+        pickled model when it exists. Default is False.
+
+    **kwargs
+        The batching parameters of `PredictionService`.
+
+    Returns
+    -------
+    PredictionService
+        The service keeping the model warm.
+    """
+    model = get_model_cache().load_path(model_path, compact=compact)
+    preprocessor = load_preprocessor(os.path.join(model_path, "preprocessor.pkl"))
+    return PredictionService(model, preprocessor, **kwargs)
+
+
+class _PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.service.stats.snapshot())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            rows = payload["rows"] if isinstance(payload, dict) else payload
+            if isinstance(rows, dict):
+                rows = [rows]
+            validate_rows(rows)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+        try:
+            predictions = self.service.predict(rows)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"predictions": predictions})
+
+
+def make_server(service, host="127.0.0.1", port=8080):
+    """
+    Creates the HTTP/JSON server of a prediction service.
+
+    The server answers `POST /predict` with a body `{"rows": [...]}` of raw housing
+    rows, `GET /metrics` and `GET /health`.
+
+    Parameters
+    ----------
+    service : PredictionService
+        The service answering the requests.
+
+    host : str, optional
+        The host to bind to. Default is '127.0.0.1'.
+
+    port : int, optional
+        The port to bind to, or 0 for any free port. Default is 8080.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        The server, not yet serving.
+    """
+    handler = type("PredictionHandler", (_PredictionHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,460 @@
+"""
+tracking module contains the non-blocking MLflow logging of the House Pricing Predictor
+project.
+
+Metrics and params are queued and sent in batches by a background thread, and artifacts
+and models are uploaded concurrently by a thread pool, so the pipeline does not wait for
+the tracking server. Calls that still fail after a few retries are spooled to a local
+directory and can be replayed once the server is back.
+
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "house_pricing_predictor", "mlflow_spool"
+)
+
+# The limits of a single MLflow log_batch call.
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+
+_STOP = object()
+_CLAIM_SUFFIX = ".replaying"
+
+_run_loggers = {}
+_run_loggers_lock = threading.Lock()
+
+
+def get_run_logger(run_id):
+    """
+    Returns the open asynchronous logger of a run.
+
+    Parameters
+    ----------
+    run_id : str
+        The MLflow run ID.
+
+    Returns
+    -------
+    AsyncRunLogger or None
+        The logger, or None if no logger of the run is open.
+    """
+    with _run_loggers_lock:
+        return _run_loggers.get(run_id)
+
+
+def _retry(func, max_retries, retry_delay, description):
+    """
+    Calls a function until it succeeds, with exponential backoff.
+
+    Returns
+    -------
+    bool
+        True if a call succeeded.
+    """
+    for attempt in range(max_retries):
+        try:
+            func()
+            return True
+        except Exception as e:
+            logger.warning(
+                f"Error while {description} (attempt {attempt + 1}/{max_retries}): {e}"
+            )
+            if attempt + 1 < max_retries:
+                time.sleep(retry_delay * 2**attempt)
+    return False
+
+
+def _batches(metrics, params):
+    """
+    Splits metrics and params into chunks within the MLflow log_batch limits.
+    """
+    for start in range(0, len(params), MAX_PARAMS_PER_BATCH):
+        yield [], params[start : start + MAX_PARAMS_PER_BATCH]
+    for start in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+        yield metrics[start : start + MAX_METRICS_PER_BATCH], []
+
+
+class AsyncRunLogger:
+    """
+    A non-blocking logger of the metrics, params, artifacts and models of an MLflow run.
+
+    All calls return immediately. `flush` waits for everything logged so far, and
+    leaving the logger as a context manager flushes and closes it, so it should be
+    opened inside the `mlflow.start_run` block of the run.
+
+    Parameters
+    ----------
+    run_id : str
+        The MLflow run ID.
+
+    client : mlflow.tracking.MlflowClient, optional
+        The tracking client. Default is a client of the current tracking URI.
+
+    spool_dir : str, optional
+        The directory the failed calls are spooled to. Default is
+        `~/.cache/house_pricing_predictor/mlflow_spool`.
+
+    max_workers : int, optional
+        The number of concurrent artifact uploads. Default is 4.
+
+    max_retries : int, optional
+        The number of attempts of every call before it is spooled. Default is 3.
+
+    retry_delay : float, optional
+        The delay in seconds before the first retry, doubled at every retry. Default
+        is 0.5.
+
+    replay : bool, optional
+        If True, the calls spooled by earlier loggers are replayed by a background
+        thread. Its errors are logged, and `flush` and `close` do not wait for it.
+        Default is False.
+    """
+
+    def __init__(
+        self,
+        run_id,
+        client=None,
+        spool_dir=None,
+        max_workers=4,
+        max_retries=3,
+        retry_delay=0.5,
+        replay=False,
+    ):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.spool_dir = spool_dir or DEFAULT_SPOOL_DIR
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.spooled = 0
+        self._queue = queue.Queue()
+        self._uploads = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="mlflow-upload"
+        )
+        self._futures = []
+        self._futures_lock = threading.Lock()
+        self._sender = threading.Thread(
+            target=self._send_loop, name="mlflow-batch", daemon=True
+        )
+        self._sender.start()
+        self._closed = False
+        with _run_loggers_lock:
+            _run_loggers[run_id] = self
+        self._stop_replay = threading.Event()
+        if replay:
+            # Not a daemon, so an exiting interpreter lets the current entry finish.
+            threading.Thread(
+                target=self._replay, name="mlflow-replay", daemon=False
+            ).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def log_metric(self, key, value, step=0):
+        timestamp = int(time.time() * 1000)
+        self._queue.put(Metric(key, float(value), timestamp, step))
+
+    def log_metrics(self, metrics, step=0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step=step)
+
+    def log_param(self, key, value):
+        self._queue.put(Param(key, str(value)))
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_artifact(self, local_path, artifact_path=None):
+        """
+        Uploads a file to the run artifacts in the background.
+
+        Parameters
+        ----------
+        local_path : str
+            The path of the file. It must not change until the logger is flushed.
+
+        artifact_path : str, optional
+            The directory of the file in the run artifacts. Default is the root.
+        """
+        self._submit(self._upload, local_path, artifact_path)
+
+    def log_model(self, model, artifact_path):
+        """
+        Logs a scikit-learn model to the run with `mlflow.sklearn.log_model` in the
+        background.
+
+        The model is logged to the tracking URI of the current thread. If it still
+        fails after the retries, the serialized model directory is spooled as plain
+        artifacts.
+
+        Parameters
+        ----------
+        model : sklearn.base.BaseEstimator
+            The fitted model. It must not be modified until the logger is flushed.
+
+        artifact_path : str
+            The path of the model in the run artifacts.
+        """
+        self._submit(self._upload_model, model, artifact_path)
+
+    def flush(self):
+        """
+        Waits until everything logged so far is sent or spooled.
+        """
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        while True:
+            with self._futures_lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                break
+            for future in futures:
+                future.result()
+
+    def close(self):
+        """
+        Flushes the logger and stops its threads.
+        """
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._stop_replay.set()
+        self._queue.put(_STOP)
+        self._sender.join()
+        self._uploads.shutdown()
+        with _run_loggers_lock:
+            if _run_loggers.get(self.run_id) is self:
+                del _run_loggers[self.run_id]
+        if self.spooled:
+            logger.warning(
+                f"{self.spooled} MLflow calls of run {self.run_id} were spooled to "
+                f"{self.spool_dir}; replay them with `replay_spool`."
+            )
+
+    def _replay(self):
+        try:
+            replay_spool(self.spool_dir, self.client, stop=self._stop_replay)
+        except Exception as e:
+            logger.error(f"Error while replaying the MLflow spool: {e}")
+
+    def _submit(self, func, *args):
+        future = self._uploads.submit(func, *args)
+        with self._futures_lock:
+            self._futures.append(future)
+
+    def _send_loop(self):
+        while True:
+            items = [self._queue.get()]
+            # Everything queued while the previous batch was sent goes in this one.
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            metrics = [item for item in items if isinstance(item, Metric)]
+            params = [item for item in items if isinstance(item, Param)]
+            try:
+                for metric_batch, param_batch in _batches(metrics, params):
+                    self._send_batch(metric_batch, param_batch)
+            except Exception as e:
+                logger.error(f"Error while sending a batch to run {self.run_id}: {e}")
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in items):
+                return
+
+    def _send_batch(self, metrics, params):
+        sent = _retry(
+            lambda: self.client.log_batch(self.run_id, metrics=metrics, params=params),
+            self.max_retries,
+            self.retry_delay,
+            f"logging a batch to run {self.run_id}",
+        )
+        if not sent:
+            self._spool(
+                {
+                    "kind": "batch",
+                    "metrics": [
+                        [m.key, m.value, m.timestamp, m.step] for m in metrics
+                    ],
+                    "params": [[p.key, p.value] for p in params],
+                }
+            )
+
+    def _upload(self, local_path, artifact_path):
+        sent = _retry(
+            lambda: self.client.log_artifact(self.run_id, local_path, artifact_path),
+            self.max_retries,
+            self.retry_delay,
+            f"uploading {local_path} to run {self.run_id}",
+        )
+        if not sent:
+            self._spool(
+                {"kind": "file", "artifact_path": artifact_path}, local_path
+            )
+
+    def _upload_model(self, model, artifact_path):
+        import mlflow.sklearn
+
+        # log_model keeps the logged model entity and its metadata, which a plain
+        # upload of the saved directory would lose.
+        sent = _retry(
+            lambda: mlflow.sklearn.log_model(
+                model, name=artifact_path, run_id=self.run_id
+            ),
+            self.max_retries,
+            self.retry_delay,
+            f"logging the model {artifact_path} to run {self.run_id}",
+        )
+        if sent:
+            return
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            model_dir = os.path.join(tmp_dir, os.path.basename(artifact_path))
+            try:
+                mlflow.sklearn.save_model(model, model_dir)
+            except Exception as e:
+                logger.error(f"Error while serializing the model {artifact_path}: {e}")
+                return
+            self._spool({"kind": "dir", "artifact_path": artifact_path}, model_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _spool(self, entry, local_path=None):
+        """
+        Stores a failed call under `<spool_dir>/<run_id>/<entry id>/`.
+        """
+        entry_dir = os.path.join(
+            self.spool_dir, self.run_id, f"{time.time_ns()}-{uuid.uuid4().hex}"
+        )
+        tmp_dir = entry_dir + ".tmp"
+        os.makedirs(tmp_dir)
+        if local_path is not None:
+            files_dir = os.path.join(tmp_dir, "files")
+            if os.path.isdir(local_path):
+                shutil.copytree(local_path, files_dir)
+            else:
+                os.makedirs(files_dir)
+                shutil.copy2(local_path, files_dir)
+        with open(os.path.join(tmp_dir, "entry.json"), "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_dir, entry_dir)
+        self.spooled += 1
+        logger.warning(f"Spooled a {entry['kind']} MLflow call to {entry_dir}.")
+
+
+def _replay_entry(client, run_id, entry_dir):
+    """
+    Sends one spooled call.
+    """
+    with open(os.path.join(entry_dir, "entry.json")) as f:
+        entry = json.load(f)
+    files_dir = os.path.join(entry_dir, "files")
+    if entry["kind"] == "batch":
+        client.log_batch(
+            run_id,
+            metrics=[Metric(*metric) for metric in entry["metrics"]],
+            params=[Param(*param) for param in entry["params"]],
+        )
+    elif entry["kind"] == "file":
+        (file_name,) = os.listdir(files_dir)
+        client.log_artifact(
+            run_id, os.path.join(files_dir, file_name), entry["artifact_path"]
+        )
+    else:
+        client.log_artifacts(run_id, files_dir, entry["artifact_path"])
+
+
+def replay_spool(spool_dir=None, client=None, stop=None):
+    """
+    Sends the spooled MLflow calls, in the order they were spooled.
+
+    Every entry is claimed by renaming it with a '.replaying' suffix before it is sent,
+    so concurrent replays never send an entry twice, and it is removed once sent. The
+    replay of a run stops at its first failure or at an entry claimed by another
+    replay, so the remaining entries keep their order. An entry claimed by a killed
+    replay keeps its suffix; removing the suffix queues it again.
+
+    Parameters
+    ----------
+    spool_dir : str, optional
+        The spool directory. Default is `~/.cache/house_pricing_predictor/mlflow_spool`.
+
+    client : mlflow.tracking.MlflowClient, optional
+        The tracking client. Default is a client of the current tracking URI.
+
+    stop : threading.Event, optional
+        If given, the replay stops before the next entry once it is set. Default is
+        None.
+
+    Returns
+    -------
+    int
+        The number of replayed entries.
+    """
+    spool_dir = spool_dir or DEFAULT_SPOOL_DIR
+    if not os.path.isdir(spool_dir):
+        return 0
+    client = client or MlflowClient()
+    replayed = 0
+    for run_id in sorted(os.listdir(spool_dir)):
+        run_dir = os.path.join(spool_dir, run_id)
+        try:
+            entries = sorted(
+                name
+                for name in os.listdir(run_dir)
+                if not name.endswith((".tmp", _CLAIM_SUFFIX))
+            )
+        except OSError:
+            # Removed by a concurrent replay.
+            continue
+        for name in entries:
+            if stop is not None and stop.is_set():
+                break
+            entry_dir = os.path.join(run_dir, name)
+            claimed_dir = entry_dir + _CLAIM_SUFFIX
+            try:
+                os.rename(entry_dir, claimed_dir)
+            except OSError:
+                # Claimed by a concurrent replay, which keeps the order of the run.
+                break
+            try:
+                _replay_entry(client, run_id, claimed_dir)
+            except Exception as e:
+                logger.error(f"Error while replaying {entry_dir}: {e}")
+                os.rename(claimed_dir, entry_dir)
+                break
+            shutil.rmtree(claimed_dir, ignore_errors=True)
+            replayed += 1
+        try:
+            os.rmdir(run_dir)
+        except OSError:
+            # Not empty, or removed by a concurrent replay.
+            pass
+    if replayed:
+        logger.info(f"Replayed {replayed} spooled MLflow calls.")
+    return replayed
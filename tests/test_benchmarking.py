@@ -0,0 +1,58 @@
+"""
+This module contains the function to test the benchmarking module of the House
+Pricing Predictor project.
+
+"""
+
+import pandas as pd
+
+from house_pricing_predictor_YUKTHAMAJELLA.benchmarking import (
+    compare_to_baseline,
+    generate_housing_data,
+    measure,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import load_housing_data
+
+
+def test_generate_housing_data_schema(tmp_path):
+    generate_housing_data(2500, str(tmp_path), chunk_size=1000)
+    housing = load_housing_data(str(tmp_path))
+
+    assert len(housing) == 2500
+    assert list(housing.columns) == [
+        "longitude",
+        "latitude",
+        "housing_median_age",
+        "total_rooms",
+        "total_bedrooms",
+        "population",
+        "households",
+        "median_income",
+        "median_house_value",
+        "ocean_proximity",
+    ]
+    assert housing["total_bedrooms"].isna().any()
+    assert housing["median_house_value"].max() <= 500001
+    assert set(housing["ocean_proximity"]) <= {
+        "<1H OCEAN",
+        "INLAND",
+        "ISLAND",
+        "NEAR BAY",
+        "NEAR OCEAN",
+    }
+
+
+def test_measure_and_compare_to_baseline():
+    result, record = measure("sum", sum, range(1000), n_rows=1000)
+    assert result == sum(range(1000))
+    assert record["rows"] == 1000
+    assert record["wall_s"] >= 0 and record["peak_traced_mb"] is not None
+
+    baseline = [{"meta": {"n_rows": 10}, "stages": [{"stage": "a", "wall_s": 1.0}]}]
+    results = [{"meta": {"n_rows": 10}, "stages": [{"stage": "a", "wall_s": 1.1}]}]
+    assert compare_to_baseline(results, baseline, tolerance=0.2) == []
+
+    results[0]["stages"][0]["wall_s"] = 1.5
+    (regression,) = compare_to_baseline(results, baseline, tolerance=0.2)
+    assert regression["stage"] == "a" and regression["metric"] == "wall_s"
+    assert regression["ratio"] == 1.5
@@ -0,0 +1,68 @@
+"""
+This module contains the function to test the compact_forest module of the House
+Pricing Predictor project.
+
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import (
+    export_forest,
+    load_compact_forest,
+)
+
+
+def test_compact_forest_matches_sklearn(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 5)), columns=list("abcde"))
+    labels = df["a"] * 1000 + rng.normal(size=300)
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(df, labels)
+    X_new = pd.DataFrame(rng.normal(size=(500, 5)), columns=list("abcde"))
+
+    path = export_forest(model, str(tmp_path / "final_model.cforest"))
+    forest = load_compact_forest(path)
+
+    assert isinstance(forest.threshold, np.memmap)
+    assert list(forest.feature_names_in_) == list("abcde")
+    np.testing.assert_allclose(forest.predict(X_new), model.predict(X_new), rtol=1e-6)
+    # Thresholds rounded down to float32 split float32 features the same way.
+    np.testing.assert_allclose(forest.predict(df), model.predict(df), rtol=1e-6)
+
+    restored = pickle.loads(pickle.dumps(forest))
+    assert restored.path == path
+    np.testing.assert_array_equal(restored.predict(X_new), forest.predict(X_new))
+
+
+def test_compact_forest_routes_missing_values(tmp_path):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 3))
+    labels = X[:, 0] * 10 + rng.normal(size=400)
+    X[rng.random(size=X.shape) < 0.2] = np.nan
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, labels)
+    X_new = rng.normal(size=(300, 3))
+    X_new[rng.random(size=X_new.shape) < 0.3] = np.nan
+
+    forest = load_compact_forest(export_forest(model, str(tmp_path / "m.cforest")))
+
+    np.testing.assert_allclose(
+        forest.predict(X_new), model.predict(X_new), rtol=1e-6, atol=1e-5
+    )
+
+
+def test_compact_forest_rejects_other_versions(tmp_path):
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(100, 2))
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, X[:, 0])
+    path = export_forest(model, str(tmp_path / "m.cforest"))
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b'"version": 1', b'"version": 2', 1))
+
+    with pytest.raises(ValueError, match="version 2"):
+        load_compact_forest(path)
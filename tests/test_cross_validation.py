@@ -0,0 +1,141 @@
+"""
+This module contains the function to test the cross_validation module of the House
+Pricing Predictor project.
+
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import GridSearchCV, cross_val_score
+
+from house_pricing_predictor_YUKTHAMAJELLA.cross_validation import (
+    FoldCache,
+    FoldSearchCV,
+    OOBForestSearchCV,
+    WarmStartForestSearchCV,
+    evaluate_on_folds,
+    rank_agreement,
+)
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(100, 4)), columns=["a", "b", "c", "d"])
+    labels = pd.Series(df["a"] * 3 - df["b"] + rng.normal(size=100))
+    return df, labels
+
+
+def test_fold_search_matches_grid_search():
+    df, labels = _data()
+    param_grid = {"n_estimators": [3, 10], "max_features": [1, 3]}
+    folds = FoldCache(df, labels, n_splits=5)
+
+    search = FoldSearchCV(
+        RandomForestRegressor(random_state=42), param_grid=param_grid, cv=folds
+    ).fit(df, labels)
+    expected = GridSearchCV(
+        RandomForestRegressor(random_state=42),
+        param_grid,
+        cv=5,
+        scoring="neg_mean_squared_error",
+    ).fit(df, labels)
+
+    assert search.best_params_ == expected.best_params_
+    np.testing.assert_allclose(search.best_score_, expected.best_score_)
+    np.testing.assert_allclose(
+        search.cv_results_["mean_test_score"], expected.cv_results_["mean_test_score"]
+    )
+    assert list(search.best_estimator_.feature_names_in_) == ["a", "b", "c", "d"]
+
+
+def test_evaluate_on_folds():
+    df, labels = _data()
+    folds = FoldCache(df, labels, n_splits=5)
+
+    scores = evaluate_on_folds(LinearRegression(), folds)
+
+    expected = cross_val_score(
+        LinearRegression(), df, labels, cv=5, scoring="neg_mean_squared_error"
+    )
+    np.testing.assert_allclose(scores, expected)
+
+
+def test_warm_start_forest_search_matches_fold_search():
+    df, labels = _data()
+    param_grid = [
+        {"n_estimators": [3, 10, 30], "max_features": [1, 3]},
+        {"bootstrap": [False], "n_estimators": [3, 10], "max_features": [2]},
+    ]
+    folds = FoldCache(df, labels, n_splits=5)
+
+    search = WarmStartForestSearchCV(
+        RandomForestRegressor(random_state=42),
+        param_grid=param_grid,
+        cv=folds,
+        return_train_score=True,
+    ).fit(df, labels)
+    expected = FoldSearchCV(
+        RandomForestRegressor(random_state=42),
+        param_grid=param_grid,
+        cv=folds,
+        return_train_score=True,
+    ).fit(df, labels)
+
+    assert search.best_params_ == expected.best_params_
+    for key in ["mean_test_score", "split0_test_score", "mean_train_score"]:
+        np.testing.assert_allclose(search.cv_results_[key], expected.cv_results_[key])
+
+
+def test_oob_forest_search():
+    df, labels = _data()
+    param_grid = [
+        {"n_estimators": [10, 30], "max_features": [1, 3]},
+        {"bootstrap": [False], "n_estimators": [3], "max_features": [2]},
+    ]
+    folds = FoldCache(df, labels, n_splits=5)
+
+    search = OOBForestSearchCV(
+        RandomForestRegressor(random_state=42), param_grid=param_grid, cv=folds
+    ).fit(df, labels)
+
+    assert list(search.cv_results_["score_method"]) == ["oob"] * 4 + ["kfold"]
+    oob_forest = RandomForestRegressor(
+        n_estimators=30, max_features=3, random_state=42, oob_score=True
+    ).fit(df, labels)
+    expected = -np.mean((oob_forest.oob_prediction_ - labels) ** 2)
+    np.testing.assert_allclose(search.cv_results_["mean_test_score"][3], expected)
+    kfold = FoldSearchCV(
+        RandomForestRegressor(random_state=42), param_grid=param_grid[1], cv=folds
+    ).fit(df, labels)
+    np.testing.assert_allclose(
+        search.cv_results_["mean_test_score"][4], kfold.best_score_
+    )
+
+
+def test_rank_agreement():
+    df, labels = _data()
+    param_grid = {"max_features": [1, 2, 3, 4], "n_estimators": [3, 10]}
+    full = FoldSearchCV(
+        RandomForestRegressor(random_state=0), param_grid=param_grid, refit=False
+    ).fit(df, labels)
+
+    agreement = rank_agreement(full, full, top_k=2)
+    assert agreement == pytest.approx(
+        {
+            "n_candidates": 8,
+            "spearman": 1.0,
+            "kendall": 1.0,
+            "top_k_overlap": 1.0,
+            "best_rank": 1,
+        }
+    )
+
+    sampled = FoldSearchCV(
+        RandomForestRegressor(random_state=0), param_grid=param_grid, refit=False
+    ).fit(df.iloc[:40], labels.iloc[:40])
+    agreement = rank_agreement(sampled, full)
+    assert -1 <= agreement["spearman"] <= 1
+    assert 1 <= agreement["best_rank"] <= 8
@@ -4,10 +4,22 @@ Predictor project.
 
 """
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn.impute import SimpleImputer
 
-from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import add_features
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import (
+    StreamingMedianImputer,
+    add_features,
+    data_manipulation,
+    fit_imputer_chunks,
+    hash_split_chunks,
+    prepare_dataframe,
+    prepare_test_data,
+    prepare_train_data,
+    stratified_split_chunks,
+)
 
 
 def test_loading_data():
@@ -32,3 +44,123 @@ def test_loading_data():
     assert df["rooms_per_household"].iloc[0] == 880 / 126
     assert df["bedrooms_per_room"].iloc[0] == 129 / 880
     assert df["population_per_household"].iloc[0] == 322 / 126
+
+
+def test_stratified_split_chunks():
+    df = pd.DataFrame(
+        {
+            'median_income': np.tile([1.0, 2.0, 3.5, 5.0, 7.0], 200).astype('float32'),
+            'median_house_value': np.arange(1000, dtype='float32'),
+        }
+    )
+    chunks = (df.iloc[i : i + 64].copy() for i in range(0, len(df), 64))
+
+    train_parts, test_parts = zip(*stratified_split_chunks(chunks, test_size=0.2))
+    train_set, test_set = pd.concat(train_parts), pd.concat(test_parts)
+
+    assert len(train_set) == 800
+    assert len(test_set) == 200
+    assert (test_set["income_cat"].value_counts() == 40).all()
+    assert set(train_set.index).isdisjoint(test_set.index)
+
+
+def test_hash_split_chunks():
+    df = pd.DataFrame(
+        {
+            'median_income': np.tile([1.0, 2.0, 3.5, 5.0, 7.0], 200).astype('float32'),
+            'median_house_value': np.arange(1000, dtype='float32'),
+        }
+    )
+
+    def split(chunksize):
+        chunks = (
+            df.iloc[i : i + chunksize].copy() for i in range(0, len(df), chunksize)
+        )
+        train_parts, test_parts = zip(*hash_split_chunks(chunks, window=64))
+        return pd.concat(train_parts), pd.concat(test_parts)
+
+    train_set, test_set = split(64)
+    assert len(train_set) == 800
+    assert len(test_set) == 200
+    assert (test_set["income_cat"].value_counts() == 40).all()
+    assert set(train_set.index).isdisjoint(test_set.index)
+    assert sorted(split(333)[1].index) == sorted(test_set.index)
+
+
+def test_streaming_median_imputer():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            'longitude': rng.normal(-119.5, 2.0, 10_001),
+            'total_rooms': rng.lognormal(7.5, 0.7, 10_001),
+            'housing_median_age': rng.integers(1, 53, 10_001).astype(float),
+        }
+    )
+    df.iloc[::10, 1] = np.nan
+
+    chunks = [df.iloc[i : i + 1000] for i in range(0, len(df), 1000)]
+    left, right = StreamingMedianImputer(), StreamingMedianImputer()
+    for chunk in chunks[:4]:
+        left.partial_fit(chunk)
+    for chunk in chunks[4:]:
+        right.partial_fit(chunk)
+    imputer = left.merge(right)
+
+    exact = df.median().to_numpy()
+    assert np.all(np.abs(imputer.statistics_ / exact - 1) <= 0.001)
+    assert np.array_equal(
+        imputer.statistics_, StreamingMedianImputer().fit(df).statistics_
+    )
+    assert list(imputer.feature_names_in_) == list(df.columns)
+    assert not np.isnan(imputer.transform(df)).any()
+
+
+def test_prepare_data_fused():
+    df = pd.DataFrame(
+        {
+            'longitude': [-122.23, -121.46, -117.23, -118.25],
+            'latitude': [37.88, 38.52, 33.09, 36.77],
+            'housing_median_age': [25.0, 29.0, 7.0, 15.0],
+            'total_rooms': [880.0, 3873.0, 5320.0, 2105.0],
+            'total_bedrooms': [129.0, np.nan, 855.0, 410.0],
+            'population': [322.0, 2237.0, 2015.0, 1532.0],
+            'households': [126.0, 706.0, 768.0, 525.0],
+            'median_income': [8.3252, 2.1736, 6.3373, 3.5065],
+            'median_house_value': [452600.0, 72100.0, 279600.0, 185000.0],
+            'ocean_proximity': ['<1H OCEAN', 'INLAND', 'NEAR BAY', 'INLAND'],
+        }
+    )
+    housing, _, housing_num = data_manipulation(df)
+    imputer = SimpleImputer(strategy="median").fit(housing_num)
+    expected = prepare_dataframe(imputer.transform(housing_num), housing_num, housing)
+
+    prepared = prepare_train_data(imputer, housing)
+    assert (prepared.dtypes == np.float32).all()
+    assert list(prepared.columns[-4:]) == [
+        'ocean_proximity_INLAND',
+        'ocean_proximity_ISLAND',
+        'ocean_proximity_NEAR BAY',
+        'ocean_proximity_NEAR OCEAN',
+    ]
+    expected = expected.reindex(columns=prepared.columns, fill_value=0)
+    np.testing.assert_allclose(prepared, expected.to_numpy(dtype=float), rtol=1e-6)
+
+    X_test, y_test = prepare_test_data(df.iloc[2:], imputer)
+    assert list(X_test.columns) == list(prepared.columns)
+    np.testing.assert_array_equal(X_test, prepared.iloc[2:])
+    assert y_test.tolist() == [279600.0, 185000.0]
+
+    sketch = StreamingMedianImputer().fit(housing_num)
+    np.testing.assert_allclose(
+        prepare_train_data(sketch, housing), prepared, rtol=1e-3
+    )
+
+
+@pytest.mark.parametrize('method', ['sample', 'sketch'])
+def test_fit_imputer_chunks_without_rows(method):
+    empty = pd.DataFrame({'total_rooms': pd.Series([], dtype='float32')})
+
+    with pytest.raises(ValueError, match="no rows"):
+        fit_imputer_chunks(iter([]), method=method)
+    with pytest.raises(ValueError, match="no rows"):
+        fit_imputer_chunks(iter([empty]), method=method)
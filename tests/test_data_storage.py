@@ -0,0 +1,107 @@
+"""
+This module contains the function to test the data storage module of the House Pricing
+Predictor project.
+
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from house_pricing_predictor_YUKTHAMAJELLA.data_storage import (
+    DATASET_FORMATS,
+    load_artifact,
+    load_dataset,
+    read_header,
+    save_artifact,
+    save_artifact_chunks,
+    save_dataset,
+)
+
+pytest.importorskip("pyarrow")
+
+
+def test_dataset_round_trip(tmp_path):
+    df = pd.DataFrame(
+        {
+            'median_income': [2.1736, 6.3373, 3.5065, 4.8902],
+            'households': [706.0, 768.0, 525.0, 987.0],
+            'ocean_proximity_INLAND': [True, False, False, True],
+        },
+        index=[12655, 15502, 12656, 15503],
+    )
+    labels = pd.Series(
+        [72100.0, 279600.0, 185000.0, 235000.0],
+        index=df.index,
+        name='median_house_value',
+    )
+
+    save_artifact(df, str(tmp_path), 'housing_prepared')
+    save_artifact(labels, str(tmp_path), 'housing_labels')
+
+    pd.testing.assert_frame_equal(load_artifact(str(tmp_path), 'housing_prepared'), df)
+    pd.testing.assert_series_equal(
+        load_artifact(str(tmp_path), 'housing_labels'), labels
+    )
+
+    projected = load_artifact(str(tmp_path), 'housing_prepared', columns=['households'])
+    assert list(projected.columns) == ['households']
+    assert list(projected.index) == list(df.index)
+
+    header = read_header(str(tmp_path / 'housing_prepared.parquet'))
+    assert header['version'] == 1
+    assert header['n_rows'] == 4
+
+
+def test_dataset_row_groups(tmp_path):
+    df = pd.DataFrame({'median_income': range(10)}, dtype='float32')
+    path = save_dataset(df, str(tmp_path / 'data.parquet'), row_group_size=4)
+
+    second = load_dataset(path, row_groups=[1])
+
+    assert list(second['median_income']) == [4.0, 5.0, 6.0, 7.0]
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'pickle'])
+def test_save_artifact_chunks(tmp_path, fmt):
+    df = pd.DataFrame({'median_income': range(10)}, dtype='float32')
+    labels = pd.Series(range(10), name='median_house_value', dtype='float64')
+    chunks = ((df.iloc[i : i + 4], labels.iloc[i : i + 4]) for i in range(0, 10, 4))
+
+    paths = save_artifact_chunks(
+        chunks, str(tmp_path), ['housing_prepared', 'housing_labels'], fmt
+    )
+
+    assert [os.path.basename(path) for path in paths] == [
+        'housing_prepared' + DATASET_FORMATS[fmt],
+        'housing_labels' + DATASET_FORMATS[fmt],
+    ]
+    pd.testing.assert_frame_equal(
+        load_artifact(str(tmp_path), 'housing_prepared'), df
+    )
+    pd.testing.assert_series_equal(
+        load_artifact(str(tmp_path), 'housing_labels'), labels
+    )
+    if fmt == 'parquet':
+        assert read_header(paths[0])['n_rows'] == 10
+        assert len(load_dataset(paths[0], row_groups=[2])) == 2
+
+
+def test_load_artifact_format(tmp_path, caplog):
+    parquet = pd.Series([1.0, 2.0], name='y_test')
+    pickled = pd.Series([3.0, 4.0], name='y_test')
+    save_artifact(parquet, str(tmp_path), 'y_test', 'parquet')
+    save_artifact(pickled, str(tmp_path), 'y_test', 'pickle')
+    os.utime(tmp_path / 'y_test.parquet', (0, 0))
+
+    pd.testing.assert_series_equal(
+        load_artifact(str(tmp_path), 'y_test', fmt='parquet'), parquet
+    )
+    pd.testing.assert_series_equal(
+        load_artifact(str(tmp_path), 'y_test', fmt='pickle'), pickled
+    )
+    pd.testing.assert_series_equal(load_artifact(str(tmp_path), 'y_test'), pickled)
+    assert 'several formats' in caplog.text
+    with pytest.raises(FileNotFoundError):
+        load_artifact(str(tmp_path), 'X_test_prepared')
@@ -0,0 +1,162 @@
+"""
+This module contains the function to test the downloader module of the House Pricing
+Predictor project against a local HTTP server.
+
+"""
+
+import base64
+import hashlib
+import io
+import os
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from house_pricing_predictor_YUKTHAMAJELLA import data_ingestion
+from house_pricing_predictor_YUKTHAMAJELLA.downloader import (
+    DownloadError,
+    download_file,
+    remote_version,
+)
+
+
+def make_archive():
+    csv = b"median_income,median_house_value\n" + b"3.5,452600.0\n" * 20000
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        info = tarfile.TarInfo("housing.csv")
+        info.size = len(csv)
+        tar.addfile(info, io.BytesIO(csv))
+    return buffer.getvalue(), csv
+
+
+@pytest.fixture
+def server():
+    archive, _ = make_archive()
+    state = {"ranges": [], "fail_once": False, "headers": {}, "archive": archive}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            archive = state["archive"]
+            start, end = 0, len(archive) - 1
+            header = self.headers.get("Range")
+            state["ranges"].append(header)
+            if header:
+                first, _, last = header[len("bytes=") :].partition("-")
+                start, end = int(first), int(last) if last else end
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(archive)}")
+            else:
+                self.send_response(200)
+            body = archive[start : end + 1]
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in state["headers"].items():
+                self.send_header(name, value)
+            self.end_headers()
+            if state["fail_once"] and start == 0 and len(body) > 1:
+                state["fail_once"] = False
+                self.wfile.write(body[: len(body) // 2])
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/housing.tgz"
+    yield url, archive, state
+    httpd.shutdown()
+
+
+def test_parallel_download_with_extraction(server, tmp_path):
+    url, archive, state = server
+    _, csv = make_archive()
+    dest = str(tmp_path / "housing.tgz")
+    sha256 = hashlib.sha256(archive).hexdigest()
+
+    digest = download_file(
+        url, dest, sha256=sha256, extract_to=str(tmp_path / "data"), n_parts=4
+    )
+
+    assert digest == sha256
+    with open(dest, "rb") as f:
+        assert f.read() == archive
+    with open(tmp_path / "data" / "housing.csv", "rb") as f:
+        assert f.read() == csv
+    assert len([r for r in state["ranges"] if r != "bytes=0-0"]) == 4
+    assert not os.path.exists(dest + ".part")
+
+
+def test_download_resumes_after_dropped_connection(server, tmp_path):
+    url, archive, state = server
+    state["fail_once"] = True
+    dest = str(tmp_path / "housing.tgz")
+
+    download_file(url, dest, n_parts=1, retries=2, backoff=0)
+
+    with open(dest, "rb") as f:
+        assert f.read() == archive
+    resumed = [r for r in state["ranges"] if r and not r.startswith("bytes=0-")]
+    assert resumed
+
+
+def test_download_checksum_mismatch(server, tmp_path):
+    url, _, _ = server
+    dest = str(tmp_path / "housing.tgz")
+
+    with pytest.raises(DownloadError):
+        download_file(url, dest, sha256="0" * 64)
+
+    assert not os.path.exists(dest)
+
+
+def test_remote_version(server):
+    url, archive, state = server
+    assert remote_version(url) is None
+
+    state["headers"] = {"Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"}
+    assert remote_version(url) == (
+        f"modified:Sat, 17 Oct 2026 10:00:00 GMT:{len(archive)}"
+    )
+
+    state["headers"]["ETag"] = '"v1"'
+    assert remote_version(url) == 'etag:"v1"'
+    state["headers"]["ETag"] = '"v2"'
+    assert remote_version(url) == 'etag:"v2"'
+
+
+def test_download_checks_header_digests(server, tmp_path):
+    url, archive, state = server
+    sha256 = base64.b64encode(hashlib.sha256(archive).digest()).decode()
+    state["headers"] = {"Repr-Digest": f"sha-256=:{sha256}:"}
+
+    digest = download_file(url, str(tmp_path / "housing.tgz"))
+    assert digest == hashlib.sha256(archive).hexdigest()
+
+    state["headers"] = {"Digest": f"MD5={base64.b64encode(b'0' * 16).decode()}"}
+    with pytest.raises(DownloadError, match="md5"):
+        download_file(url, str(tmp_path / "other.tgz"))
+    assert not os.path.exists(tmp_path / "other.tgz")
+
+
+def test_housing_archive_checksum_is_pinned(server, tmp_path, monkeypatch):
+    url, archive, state = server
+    pin_path = str(tmp_path / "housing_sha256.json")
+    monkeypatch.setattr(data_ingestion, "HOUSING_SHA256_PATH", pin_path)
+
+    digest = data_ingestion.download_housing_archive(url, str(tmp_path / "a.tgz"))
+    assert data_ingestion.pinned_housing_sha256(url) == digest
+    assert data_ingestion.housing_archive_version(url) == f"sha256:{digest}"
+
+    state["archive"] = archive + b"\0"
+    with pytest.raises(DownloadError, match="pinned"):
+        data_ingestion.download_housing_archive(url, str(tmp_path / "b.tgz"))
+
+    os.remove(pin_path)
+    data_ingestion.download_housing_archive(url, str(tmp_path / "b.tgz"))
+    assert data_ingestion.pinned_housing_sha256(url) != digest
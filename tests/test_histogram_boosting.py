@@ -0,0 +1,87 @@
+"""
+This module contains the function to test the histogram boosting module of the House
+Pricing Predictor project.
+
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.pipeline import make_pipeline
+
+from house_pricing_predictor_YUKTHAMAJELLA.histogram_boosting import FeatureBinner
+from house_pricing_predictor_YUKTHAMAJELLA.model_training import (
+    fit_grid_search,
+    make_cv,
+)
+
+
+def test_feature_binner():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            'median_income': rng.lognormal(1.2, 0.5, 1000),
+            'ocean_proximity_INLAND': rng.integers(0, 2, 1000).astype(float),
+        }
+    )
+    df.iloc[0, 0] = np.nan
+
+    binner = FeatureBinner(max_bins=16).fit(df)
+    codes = binner.transform(df)
+
+    assert codes.dtype == np.float32
+    assert np.isnan(codes[0, 0])
+    assert codes[1:, 0].max() == 15
+    income = df['median_income'].to_numpy()[1:]
+    order = np.argsort(income)
+    assert np.all(np.diff(codes[1:, 0][order].astype(int)) >= 0)
+    np.testing.assert_array_equal(codes[:, 1], df['ocean_proximity_INLAND'])
+
+
+def test_hist_gradient_boosting_search():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 8)), columns=[f"f{i}" for i in range(8)])
+    labels = pd.Series(df["f0"] * 2 + rng.normal(size=300))
+    df.iloc[0, 1] = np.nan
+
+    cv = make_cv(df, labels, search="shared")
+    grid_search = fit_grid_search(
+        df,
+        labels,
+        cv=cv,
+        search="shared",
+        model_family="hist_gradient_boosting",
+    )
+
+    assert set(grid_search.best_params_) == {
+        "max_iter",
+        "learning_rate",
+        "max_leaf_nodes",
+    }
+    binner, model = grid_search.best_estimator_
+    assert isinstance(binner, FeatureBinner)
+    codes = binner.transform(df)
+    n_codes = [len(np.unique(column[~np.isnan(column)])) for column in codes.T]
+    np.testing.assert_array_equal(model._bin_mapper.n_bins_non_missing_, n_codes)
+    np.testing.assert_allclose(
+        grid_search.predict(df), model.predict(binner.transform(df))
+    )
+
+
+def test_binned_boosting_matches_raw_features_with_missing_values():
+    rng = np.random.default_rng(0)
+    # Few distinct values, so the binning is lossless.
+    X = rng.integers(0, 50, size=(500, 3)).astype(float) * 1.5
+    y = X[:, 0] - 2 * X[:, 1] + rng.normal(size=500)
+    X[rng.random(500) < 0.1, 0] = np.nan
+    y[np.isnan(X[:, 0])] += 100
+    X_test = X[:100].copy()
+    X_test[:10, 1] = np.nan
+
+    params = dict(max_iter=20, max_leaf_nodes=15, random_state=0, early_stopping=False)
+    raw = HistGradientBoostingRegressor(**params).fit(X, y)
+    binned = make_pipeline(
+        FeatureBinner(), HistGradientBoostingRegressor(**params)
+    ).fit(X, y)
+
+    np.testing.assert_allclose(binned.predict(X_test), raw.predict(X_test))
@@ -0,0 +1,51 @@
+"""
+This module contains the function to test the incremental linear module of the House
+Pricing Predictor project.
+
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from house_pricing_predictor_YUKTHAMAJELLA.incremental_linear import (
+    SufficientStatsLinearRegression,
+    fit_partitions,
+)
+
+
+def _housing_like(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            'longitude': rng.normal(-119.5, 2.0, n_rows),
+            'total_rooms': rng.lognormal(7.5, 0.7, n_rows),
+            'bedrooms_per_room': rng.normal(0.2, 0.03, n_rows),
+            'ocean_proximity_INLAND': rng.integers(0, 2, n_rows).astype(float),
+            'ocean_proximity_ISLAND': np.zeros(n_rows),
+        }
+    )
+    labels = pd.Series(
+        -3000 * df['longitude']
+        + 20 * df['total_rooms']
+        - 1e5 * df['bedrooms_per_room']
+        + rng.normal(0, 1000, n_rows)
+    )
+    return df, labels
+
+
+def test_sufficient_stats_linear_regression():
+    df, labels = _housing_like(1000)
+    expected = LinearRegression().fit(df, labels)
+
+    model = SufficientStatsLinearRegression(chunk_size=128).fit(df, labels)
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-8, atol=1e-8)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=1e-8)
+    assert model.coef_[-1] == 0
+
+    partitions = [(df.iloc[i : i + 300], labels.iloc[i : i + 300]) for i in (0, 300)]
+    sharded = fit_partitions(partitions, n_jobs=2)
+    sharded.partial_fit(df.iloc[600:], labels.iloc[600:])
+    assert sharded.n_samples_seen_ == 1000
+    np.testing.assert_allclose(sharded.coef_, model.coef_, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(sharded.predict(df), model.predict(df), rtol=1e-9)
@@ -0,0 +1,66 @@
+"""
+This module contains the function to test the ingestion cache module of the House
+Pricing Predictor project.
+
+"""
+
+import os
+
+import pytest
+
+from house_pricing_predictor_YUKTHAMAJELLA.ingestion_cache import (
+    IngestionCache,
+    link_files,
+    stage_key,
+)
+
+
+def test_stage_key():
+    key = stage_key("split", "abc", test_size=0.2, random_state=42)
+
+    assert key == stage_key("split", "abc", random_state=42, test_size=0.2)
+    assert key != stage_key("split", "abc", test_size=0.3, random_state=42)
+    assert key != stage_key("split", "abd", test_size=0.2, random_state=42)
+
+
+def test_cache_recomputes_only_on_miss(tmp_path):
+    cache = IngestionCache(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"median": 3.5}
+
+    key = stage_key("imputer", "abc")
+    assert cache.cached("imputer", key, compute) == {"median": 3.5}
+    assert cache.cached("imputer", key, compute) == {"median": 3.5}
+    assert len(calls) == 1
+
+    def write_csv(path):
+        with open(os.path.join(path, "housing.csv"), "w") as f:
+            f.write("median_income\n3.5\n")
+
+    entry = cache.cached_dir("extract", key, write_csv)
+    assert os.path.exists(os.path.join(entry, "housing.csv"))
+    assert cache.cached_dir("extract", key, pytest.fail) == entry
+
+    IngestionCache(str(tmp_path), enabled=False).cached("imputer", key, compute)
+    assert len(calls) == 2
+
+
+def test_link_files(tmp_path):
+    entry = tmp_path / "entry"
+    (entry / "sub").mkdir(parents=True)
+    (entry / "data.csv").write_text("a,b\n")
+    (entry / "sub" / "part.csv").write_text("c\n")
+    output = tmp_path / "output"
+    output.mkdir()
+    (output / "data.csv").write_text("stale\n")
+
+    link_files(str(entry), str(output))
+    link_files(str(entry), str(output))
+
+    assert (output / "data.csv").read_text() == "a,b\n"
+    assert (output / "sub" / "part.csv").read_text() == "c\n"
+    (output / "data.csv").unlink()
+    assert (entry / "data.csv").exists()
@@ -0,0 +1,84 @@
+"""
+This module contains the function to test the instrumentation module of the House
+Pricing Predictor project.
+
+"""
+
+import logging
+import sys
+import threading
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+
+from house_pricing_predictor_YUKTHAMAJELLA.instrumentation import PeakRss, instrument
+
+
+@instrument
+def double_rows(data):
+    return pd.concat([data, data])
+
+
+def test_instrument_logs_and_mlflow_metrics(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path / 'mlruns'}")
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    data = pd.DataFrame({"a": range(5)})
+
+    with caplog.at_level(logging.INFO):
+        with mlflow.start_run() as run:
+            assert len(double_rows(data)) == 10
+    (record,) = [r for r in caplog.records if hasattr(r, "stage_metrics")]
+    assert record.stage_metrics["stage"] == "double_rows"
+    assert record.stage_metrics["rows"] == 5
+    assert record.stage_metrics["wall_s"] >= 0
+
+    metrics = mlflow.get_run(run.info.run_id).data.metrics
+    assert metrics["double_rows_rows"] == 5
+    assert {
+        "double_rows_wall_s",
+        "double_rows_cpu_s",
+        "double_rows_max_rss_mb",
+        "double_rows_rss_delta_mb",
+    } <= set(metrics)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="RSS is only sampled on Linux")
+def test_peak_rss_is_per_stage():
+    with PeakRss() as outer:
+        with PeakRss() as large:
+            block = np.ones(64 << 17)  # 64 MiB
+            time.sleep(0.05)
+            del block
+        with PeakRss() as small:
+            pass
+
+    assert large.delta_mb > 48
+    assert small.delta_mb < 16
+    assert outer.mb >= large.mb
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="RSS is only sampled on Linux")
+def test_peak_rss_of_concurrent_blocks():
+    allocated, measured = threading.Event(), threading.Event()
+
+    def allocate(result):
+        with PeakRss() as peak:
+            block = np.ones(64 << 17)  # 64 MiB
+            allocated.set()
+            measured.wait()
+            del block
+        result.append(peak)
+
+    result = []
+    thread = threading.Thread(target=allocate, args=(result,))
+    thread.start()
+    allocated.wait()
+    with PeakRss():
+        pass
+    measured.set()
+    thread.join()
+
+    assert result[0].delta_mb > 48
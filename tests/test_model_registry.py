@@ -0,0 +1,60 @@
+"""
+This module contains the function to test the model_registry module of the House
+Pricing Predictor project.
+
+"""
+
+import os
+import pickle
+
+import mlflow
+import numpy as np
+
+from house_pricing_predictor_YUKTHAMAJELLA.model_registry import ModelCache
+
+
+def _save_model(model_path, payload):
+    os.makedirs(model_path, exist_ok=True)
+    with open(os.path.join(model_path, "final_model.pkl"), "wb") as f:
+        pickle.dump(payload, f)
+
+
+def test_model_cache_lru_and_versions(tmp_path):
+    paths = [str(tmp_path / name) for name in "abc"]
+    for path in paths:
+        _save_model(path, np.zeros(1000))
+    size = os.path.getsize(os.path.join(paths[0], "final_model.pkl"))
+    cache = ModelCache(max_bytes=2 * size)
+
+    first = cache.load_path(paths[0])
+    assert cache.load_path(paths[0]) is first
+    cache.load_path(paths[1])
+    cache.load_path(paths[0])
+    cache.load_path(paths[2])
+
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 3, 1)
+    assert len(cache) == 2 and cache.n_bytes == 2 * size
+    assert cache.load_path(paths[0]) is first
+
+    _save_model(paths[0], np.ones(1000))
+    os.utime(os.path.join(paths[0], "final_model.pkl"), ns=(0, 1))
+    assert cache.load_path(paths[0])[0] == 1
+
+
+def test_artifact_mirror(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path / 'mlruns'}")
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    artifact = tmp_path / "preprocessor.pkl"
+    artifact.write_bytes(b"preprocessor")
+    with mlflow.start_run() as run:
+        mlflow.log_artifact(str(artifact))
+
+    cache = ModelCache(mirror_dir=str(tmp_path / "mirror"))
+    local_path = cache.artifact_path(run.info.run_id, "preprocessor.pkl")
+    assert open(local_path, "rb").read() == b"preprocessor"
+
+    def fail(**kwargs):
+        raise AssertionError("the artifact was downloaded twice")
+
+    monkeypatch.setattr(mlflow.artifacts, "download_artifacts", fail)
+    assert cache.artifact_path(run.info.run_id, "preprocessor.pkl") == local_path
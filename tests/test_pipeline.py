@@ -0,0 +1,78 @@
+"""
+This module contains the function to test the pipeline module of the House Pricing
+Predictor project.
+
+"""
+
+import threading
+
+from house_pricing_predictor_YUKTHAMAJELLA.pipeline import Pipeline, Stage
+
+
+def test_pipeline_order_skip_and_failure(tmp_path):
+    raw, doubled, other = tmp_path / "raw.txt", tmp_path / "doubled.txt", tmp_path / "o"
+    raw.write_text("1")
+    calls = []
+    lock = threading.Lock()
+
+    def record(name):
+        with lock:
+            calls.append(name)
+
+    def double():
+        record("double")
+        doubled.write_text(raw.read_text() * 2)
+
+    def independent():
+        record("independent")
+        other.write_text("x")
+
+    def fail():
+        raise RuntimeError("boom")
+
+    stages = [
+        Stage("double", double, inputs=[str(raw)], outputs=[str(doubled)]),
+        Stage("independent", independent, outputs=[str(other)], params={"v": 1}),
+    ]
+    pipeline = Pipeline(stages, str(tmp_path / "state"))
+    assert pipeline.run() == {"double": "ran", "independent": "ran"}
+    assert pipeline.run() == {"double": "fresh", "independent": "fresh"}
+
+    raw.write_text("2")
+    assert pipeline.run()["double"] == "ran"
+    assert doubled.read_text() == "22"
+    assert calls.count("double") == 2 and calls.count("independent") == 1
+
+    stages = [
+        Stage("fail", fail, outputs=[str(tmp_path / "never")]),
+        Stage("after", lambda: None, inputs=[str(tmp_path / "never")]),
+    ]
+    statuses = Pipeline(stages, str(tmp_path / "state")).run()
+    assert statuses == {"fail": "failed", "after": "blocked"}
+
+
+def test_always_run_stage_only_reruns_changed_dependents(tmp_path):
+    source, copied, doubled = "1", tmp_path / "copied.txt", tmp_path / "doubled.txt"
+    calls = []
+
+    def copy():
+        calls.append("copy")
+        if not copied.exists() or copied.read_text() != source:
+            copied.write_text(source)
+
+    def double():
+        calls.append("double")
+        doubled.write_text(copied.read_text() * 2)
+
+    stages = [
+        Stage("copy", copy, outputs=[str(copied)], always_run=True),
+        Stage("double", double, inputs=[str(copied)], outputs=[str(doubled)]),
+    ]
+    pipeline = Pipeline(stages, str(tmp_path / "state"))
+    assert pipeline.run() == {"copy": "ran", "double": "ran"}
+    assert pipeline.run() == {"copy": "ran", "double": "fresh"}
+
+    source = "2"
+    assert pipeline.run() == {"copy": "ran", "double": "ran"}
+    assert doubled.read_text() == "22"
+    assert calls == ["copy", "double", "copy", "copy", "double"]
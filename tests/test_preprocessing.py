@@ -0,0 +1,48 @@
+"""
+This module contains the function to test the preprocessing module of the House Pricing
+Predictor project.
+
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import (
+    data_manipulation,
+    prepare_dataframe,
+)
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import HousingPreprocessor
+
+
+def test_housing_preprocessor():
+    eg_data = {
+        'longitude': [-122.23, -121.46, -117.23, -118.25],
+        'latitude': [37.88, 38.52, 33.09, 36.77],
+        'housing_median_age': [25.0, 29.0, 7.0, 15.0],
+        'total_rooms': [880.0, 3873.0, 5320.0, 2105.0],
+        'total_bedrooms': [129.0, np.nan, 855.0, 410.0],
+        'population': [322.0, 2237.0, 2015.0, 1532.0],
+        'households': [126.0, 706.0, 768.0, 525.0],
+        'median_income': [8.3252, 2.1736, 6.3373, 3.5065],
+        'median_house_value': [452600.0, 72100.0, 279600.0, 185000.0],
+        'ocean_proximity': ['<1H OCEAN', 'INLAND', 'NEAR BAY', 'NEAR OCEAN'],
+    }
+    df = pd.DataFrame(eg_data)
+
+    preprocessor = HousingPreprocessor().fit(df)
+    prepared = preprocessor.transform_frame(df)
+
+    housing, _, housing_num = data_manipulation(df)
+    imputer = SimpleImputer(strategy="median").fit(housing_num)
+    expected = prepare_dataframe(imputer.transform(housing_num), housing_num, housing)
+    expected = expected.reindex(columns=prepared.columns, fill_value=0)
+    assert 'ocean_proximity_ISLAND' in prepared.columns
+    np.testing.assert_allclose(prepared.to_numpy(), expected.to_numpy(dtype=float))
+
+    row = {k: v[1] for k, v in eg_data.items()}
+    row['total_bedrooms'] = None
+    one_row = preprocessor.transform([row])
+    assert one_row.shape == (1, 15)
+    np.testing.assert_allclose(one_row[0], prepared.iloc[1].to_numpy())
@@ -4,11 +4,23 @@ Predictor project.
 
 """
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error
 
-from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import model_scoring
+from house_pricing_predictor_YUKTHAMAJELLA.compact_forest import CompactForest
+from house_pricing_predictor_YUKTHAMAJELLA.model_scoring import (
+    _SHARED,
+    ParallelPredictor,
+    RunningErrorMetrics,
+    batch_model_scoring,
+    model_scoring,
+)
 from house_pricing_predictor_YUKTHAMAJELLA.model_training import model_training
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import HousingPreprocessor
 
 
 def test_model_training():
@@ -76,3 +88,85 @@ def test_model_training():
     assert mse is not None
     assert rmse is not None
     assert mae is not None
+
+
+def test_batch_model_scoring(tmp_path):
+    rng = np.random.default_rng(42)
+    n = 1000
+    df = pd.DataFrame(
+        {
+            'longitude': rng.uniform(-124, -114, n),
+            'latitude': rng.uniform(32, 42, n),
+            'housing_median_age': rng.integers(1, 52, n).astype(float),
+            'total_rooms': rng.uniform(100, 8000, n),
+            'total_bedrooms': rng.uniform(20, 1600, n),
+            'population': rng.uniform(50, 5000, n),
+            'households': rng.uniform(20, 1500, n),
+            'median_income': rng.uniform(0.5, 15, n),
+            'median_house_value': rng.uniform(15000, 500000, n),
+            'ocean_proximity': rng.choice(['<1H OCEAN', 'INLAND', 'NEAR BAY'], n),
+        }
+    )
+    input_path = str(tmp_path / 'raw.csv')
+    df.to_csv(input_path, index=False)
+
+    preprocessor = HousingPreprocessor().fit(df)
+    model = LinearRegression().fit(preprocessor.transform(df), df['median_house_value'])
+    expected = model.predict(preprocessor.transform(df))
+
+    output_path = str(tmp_path / 'predictions.csv')
+    n_rows, (mse, rmse, mae) = batch_model_scoring(
+        model, preprocessor, input_path, output_path, batch_size=128
+    )
+
+    predictions = pd.read_csv(output_path)
+    assert n_rows == n
+    np.testing.assert_allclose(predictions['prediction'], expected, rtol=1e-5)
+
+    metrics = RunningErrorMetrics()
+    for start in range(0, n, 128):
+        metrics.update(
+            df['median_house_value'][start : start + 128], expected[start : start + 128]
+        )
+    full_mse = mean_squared_error(df['median_house_value'], expected)
+    assert metrics.result()[0] == pytest.approx(full_mse, rel=1e-12)
+    assert metrics.result()[2] == pytest.approx(
+        mean_absolute_error(df['median_house_value'], expected), rel=1e-12
+    )
+    assert mse == pytest.approx(full_mse, rel=1e-5)
+
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver", "spawn", None])
+def test_parallel_predictor(start_method):
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(500, 8))
+    y = X[:, 0] * 3 + rng.normal(size=500)
+    model = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+    other = LinearRegression().fit(X, y)
+
+    with ParallelPredictor(model, n_jobs=3, start_method=start_method) as predictor:
+        with ParallelPredictor(other, n_jobs=2, start_method=start_method) as second:
+            np.testing.assert_allclose(second.predict(X), other.predict(X))
+        predictions = predictor.predict(X)
+
+    # Without fork, the workers predict with the compact forest in float32.
+    np.testing.assert_allclose(predictions, model.predict(X), rtol=1e-6, atol=1e-5)
+
+
+def _shared_model_arrays(token):
+    model = _SHARED[token]
+    return type(model).__name__, isinstance(model.threshold, np.memmap)
+
+
+def test_parallel_predictor_maps_compact_forest():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(500, 8))
+    y = X[:, 0] * 3 + rng.normal(size=500)
+    model = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+
+    with ParallelPredictor(model, n_jobs=2, start_method="spawn") as predictor:
+        predictions = predictor.predict(X)
+        shared = predictor._pool.apply(_shared_model_arrays, (predictor._token,))
+
+    assert shared == (CompactForest.__name__, True)
+    np.testing.assert_allclose(predictions, model.predict(X), rtol=1e-6, atol=1e-5)
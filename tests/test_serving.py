@@ -0,0 +1,139 @@
+"""
+This module contains the function to test the serving module of the House Pricing
+Predictor project.
+
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from house_pricing_predictor_YUKTHAMAJELLA.preprocessing import HousingPreprocessor
+from house_pricing_predictor_YUKTHAMAJELLA.serving import (
+    MicroBatcher,
+    PredictionService,
+    make_server,
+)
+
+
+def test_prediction_server():
+    eg_data = {
+        'longitude': [-122.23, -121.46, -117.23, -118.25, -120.67],
+        'latitude': [37.88, 38.52, 33.09, 36.77, 37.36],
+        'housing_median_age': [25.0, 29.0, 7.0, 15.0, 25.0],
+        'total_rooms': [880.0, 3873.0, 5320.0, 2105.0, 4572.0],
+        'total_bedrooms': [129.0, 797.0, 855.0, 410.0, 806.0],
+        'population': [322.0, 2237.0, 2015.0, 1532.0, 3195.0],
+        'households': [126.0, 706.0, 768.0, 525.0, 987.0],
+        'median_income': [8.3252, 2.1736, 6.3373, 3.5065, 4.8902],
+        'median_house_value': [452600.0, 72100.0, 279600.0, 185000.0, 235000.0],
+        'ocean_proximity': ['NEAR BAY', 'INLAND', 'NEAR OCEAN', 'ISLAND', 'INLAND'],
+    }
+    df = pd.DataFrame(eg_data)
+    preprocessor = HousingPreprocessor().fit(df)
+    model = LinearRegression().fit(preprocessor.transform(df), df['median_house_value'])
+    expected = model.predict(preprocessor.transform(df))
+
+    service = PredictionService(model, preprocessor, max_batch_size=64, max_wait_ms=20)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rows = df.drop(columns='median_house_value').to_dict(orient='records')
+
+    def post(row):
+        request = urllib.request.Request(
+            url + "/predict",
+            data=json.dumps({"rows": [row]}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())["predictions"][0]
+
+    try:
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            predictions = list(pool.map(post, rows * 4))
+
+        np.testing.assert_allclose(predictions, np.tile(expected, 4))
+
+        with urllib.request.urlopen(url + "/metrics") as response:
+            metrics = json.loads(response.read())
+        assert metrics["requests"] == 20
+        assert metrics["rows"] == 20
+        assert metrics["batches"] <= 20
+        assert metrics["p99_ms"] >= metrics["p50_ms"]
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_micro_batcher_isolates_bad_requests():
+    def predict_fn(rows):
+        if any(row is None for row in rows):
+            raise ValueError("bad row")
+        return [row["x"] * 2 for row in rows]
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=64, max_wait_ms=50)
+    try:
+        with pytest.raises(TypeError):
+            batcher.submit(5)
+        good = batcher.submit([{"x": 1}])
+        bad = batcher.submit([None])
+        other = batcher.submit([{"x": 2}, {"x": 3}])
+        assert good.result(timeout=5) == [2]
+        assert other.result(timeout=5) == [4, 6]
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+        assert batcher.predict([{"x": 4}], timeout=5) == [8]
+    finally:
+        batcher.close()
+
+
+def test_prediction_server_rejects_invalid_rows():
+    df = pd.DataFrame(
+        {
+            'longitude': [-122.23, -121.46],
+            'latitude': [37.88, 38.52],
+            'housing_median_age': [25.0, 29.0],
+            'total_rooms': [880.0, 3873.0],
+            'total_bedrooms': [129.0, 797.0],
+            'population': [322.0, 2237.0],
+            'households': [126.0, 706.0],
+            'median_income': [8.3252, 2.1736],
+            'median_house_value': [452600.0, 72100.0],
+            'ocean_proximity': ['NEAR BAY', 'INLAND'],
+        }
+    )
+    preprocessor = HousingPreprocessor().fit(df)
+    model = LinearRegression().fit(preprocessor.transform(df), df['median_house_value'])
+    service = PredictionService(model, preprocessor)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+
+    def post(payload):
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode(), method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    try:
+        rows = df.drop(columns='median_house_value').to_dict(orient='records')
+        assert post({"rows": 5}) == 400
+        assert post({"rows": [5]}) == 400
+        assert post({"rows": [{"longitude": 1.0}]}) == 400
+        assert post({"rows": rows}) == 200
+    finally:
+        server.shutdown()
+        service.close()
@@ -0,0 +1,120 @@
+"""
+This module contains the function to test the tracking module of the House Pricing
+Predictor project.
+
+"""
+
+import json
+import os
+import threading
+
+import mlflow
+import mlflow.sklearn
+import numpy as np
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LinearRegression
+
+from house_pricing_predictor_YUKTHAMAJELLA.tracking import AsyncRunLogger, replay_spool
+
+
+class FailingClient:
+    def log_batch(self, *args, **kwargs):
+        raise ConnectionError("tracking server is down")
+
+    def log_artifact(self, *args, **kwargs):
+        raise ConnectionError("tracking server is down")
+
+
+def test_async_logger_and_spool_replay(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path / 'mlruns'}")
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    spool_dir = str(tmp_path / "spool")
+    artifact = tmp_path / "artifact.txt"
+    artifact.write_text("predictions")
+
+    with mlflow.start_run() as run:
+        with AsyncRunLogger(run.info.run_id, spool_dir=spool_dir) as tracker:
+            tracker.log_metrics({"rmse": 1.5, "mae": 1.0})
+            tracker.log_param("search", "oob")
+            tracker.log_artifact(str(artifact))
+        with AsyncRunLogger(
+            run.info.run_id, client=FailingClient(), spool_dir=spool_dir, retry_delay=0
+        ) as tracker:
+            tracker.log_metric("n_rows", 10)
+            tracker.log_artifact(str(artifact), "spooled")
+        assert tracker.spooled == 2
+
+    run_data = mlflow.get_run(run.info.run_id).data
+    assert run_data.metrics == {"rmse": 1.5, "mae": 1.0}
+    assert run_data.params == {"search": "oob"}
+
+    assert replay_spool(spool_dir, MlflowClient()) == 2
+    assert not os.listdir(spool_dir)
+    assert mlflow.get_run(run.info.run_id).data.metrics["n_rows"] == 10
+    artifacts = MlflowClient().list_artifacts(run.info.run_id, "spooled")
+    assert [a.path for a in artifacts] == ["spooled/artifact.txt"]
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def log_batch(self, run_id, metrics, params):
+        with self.lock:
+            self.calls.extend(metric.key for metric in metrics)
+
+
+def test_concurrent_spool_replays(tmp_path):
+    run_dir = tmp_path / "spool" / "run"
+    for i in range(50):
+        entry_dir = run_dir / f"{i:04d}"
+        entry_dir.mkdir(parents=True)
+        entry = {"kind": "batch", "metrics": [[f"m{i}", 1.0, 0, 0]], "params": []}
+        (entry_dir / "entry.json").write_text(json.dumps(entry))
+    (run_dir / "0050.tmp").mkdir()
+    client = CountingClient()
+
+    threads = [
+        threading.Thread(target=replay_spool, args=(str(tmp_path / "spool"), client))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    replay_spool(str(tmp_path / "spool"), client)
+
+    assert sorted(client.calls) == sorted(f"m{i}" for i in range(50))
+    assert os.listdir(run_dir) == ["0050.tmp"]
+
+
+def test_failed_replay_does_not_fail_the_run(tmp_path):
+    entry_dir = tmp_path / "spool" / "run" / "0001"
+    entry_dir.mkdir(parents=True)
+    (entry_dir / "entry.json").write_text("not json")
+
+    tracker = AsyncRunLogger(
+        "run", client=FailingClient(), spool_dir=str(tmp_path / "spool"), replay=True
+    )
+    tracker.close()
+
+    assert os.path.isdir(entry_dir) or os.path.isdir(str(entry_dir) + ".replaying")
+
+
+def test_log_model_records_a_logged_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path / 'mlruns'}")
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    X = np.arange(20, dtype=float).reshape(-1, 2)
+    model = LinearRegression().fit(X, X.sum(axis=1))
+
+    with mlflow.start_run() as run:
+        with AsyncRunLogger(run.info.run_id, spool_dir=str(tmp_path)) as tracker:
+            tracker.log_model(model, "model")
+
+    logged = mlflow.search_logged_models(
+        filter_string=f"source_run_id = '{run.info.run_id}'", output_format="list"
+    )
+    assert [m.name for m in logged] == ["model"]
+    loaded = mlflow.sklearn.load_model(logged[0].model_uri)
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
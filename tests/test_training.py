@@ -7,10 +7,17 @@ Predictor project.
 import os
 import sys
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn.ensemble import RandomForestRegressor
 
-from house_pricing_predictor_YUKTHAMAJELLA.model_training import model_training
+from house_pricing_predictor_YUKTHAMAJELLA.data_ingestion import stratified_subsample
+from house_pricing_predictor_YUKTHAMAJELLA.model_training import (
+    fit_grid_search,
+    make_search,
+    model_training,
+)
 
 
 def test_model_training():
@@ -47,3 +54,69 @@ def test_model_training():
     assert tree_reg is not None
     assert rnd_search is not None
     assert grid_search is not None
+
+
+@pytest.mark.parametrize("backend", ["processes", "threads"])
+def test_model_training_parallel(backend):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(60, 8)), columns=[f"f{i}" for i in range(8)])
+    labels = pd.Series(df["f0"] * 2 + rng.normal(size=60))
+
+    serial = model_training(df, labels)
+    parallel = model_training(df, labels, n_jobs=2, forest_n_jobs=2, backend=backend)
+
+    assert serial[3].best_params_ == parallel[3].best_params_
+    np.testing.assert_allclose(serial[3].best_score_, parallel[3].best_score_)
+    np.testing.assert_allclose(serial[2].best_score_, parallel[2].best_score_)
+
+
+def test_model_training_unknown_backend():
+    with pytest.raises(ValueError):
+        model_training(pd.DataFrame({"a": [1.0]}), pd.Series([1.0]), backend="gpu")
+
+
+@pytest.mark.parametrize("resource", ["n_samples", "n_estimators"])
+def test_halving_search(resource):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 8)), columns=[f"f{i}" for i in range(8)])
+    labels = pd.Series(df["f0"] * 2 + rng.normal(size=300))
+    param_grid = [{"n_estimators": [3, 10, 30], "max_features": [2, 4, 6, 8]}]
+
+    search = make_search(
+        RandomForestRegressor(random_state=42),
+        param_grid,
+        search="halving",
+        halving_resource=resource,
+        cv=5,
+        scoring="neg_mean_squared_error",
+    )
+    search.fit(df, labels)
+
+    assert set(search.best_params_) == {"n_estimators", "max_features"}
+    assert search.best_score_ < 0
+    assert search.n_iterations_ > 1
+    if resource == "n_estimators":
+        assert search.max_resources_ == 30
+
+
+def test_subsample_search():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(400, 8)), columns=[f"f{i}" for i in range(8)])
+    df["median_income"] = rng.lognormal(1.2, 0.5, 400)
+    labels = pd.Series(df["f0"] * 2 + df["median_income"] + rng.normal(size=400))
+
+    grid_search = fit_grid_search(df, labels, subsample=0.25)
+
+    assert grid_search.n_splits_ == 5
+    # The search ran on 100 rows, the best forest is refitted on all 400.
+    assert grid_search.cv_results_["split0_train_score"].shape == (18,)
+    tree = grid_search.best_estimator_.estimators_[0].tree_
+    assert tree.weighted_n_node_samples[0] == 400
+
+    X, y = stratified_subsample(df, labels, 50)
+    assert len(X) == 50 and list(X.index) == list(y.index)
+    assert stratified_subsample(df, labels, 1.0)[0] is df
+    with pytest.raises(ValueError, match="income strata"):
+        stratified_subsample(df, labels, 1)
+    with pytest.raises(ValueError):
+        stratified_subsample(df, labels, 1.5)